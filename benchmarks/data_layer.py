@@ -0,0 +1,185 @@
+"""Throughput and p50/p99 latency of the utils.db operations the cogs hit hardest.
+
+Seeds synthetic guilds with users and punishment histories spread over the
+last 40 days (so about half is expired), then drives each operation from
+--concurrency tasks. The mongo backend writes to --database, which must not
+be the production database; it is dropped and reseeded on every run.
+
+Usage: python -m benchmarks.data_layer [--backend memory|mongo] [--users 20000] [--guilds 20]
+       [--history 20] [--ops 5000] [--concurrency 32] [-o results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from utils import db
+
+REASONS = ["Spam", "NSFW", "Harassment", "Advertising", "Off-topic"]
+OPERATIONS = ["add_warning", "add_punishment", "check_expired_points", "deductpoints", "get_user_info",
+              "get_leaderboard_users"]
+SEED_CHUNK = 1000
+
+
+def make_users(args, rng):
+    now = datetime.utcnow()
+    for guild_id in range(1, args.guilds + 1):
+        for user_id in range(1, args.users // args.guilds + 1):
+            history = sorted(
+                ({"reason": rng.choice(REASONS), "points": rng.randint(1, 5),
+                  "timestamp": now - timedelta(seconds=rng.uniform(0, 40 * 86400)), "warning_count": 0}
+                 for _ in range(rng.randint(0, args.history))),
+                key=lambda p: p["timestamp"])
+            yield {
+                "_id": ObjectId(),
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "total_points": sum(p["points"] for p in history if p["timestamp"] > now - timedelta(days=20)),
+                "warnings": [],
+                "punishments": history,
+                "version": len(history),
+            }
+
+
+async def seed(backend, args, rng) -> int:
+    users = make_users(args, rng)
+    if args.backend == "memory":
+        count = 0
+        for user in users:
+            backend._users[user["guild_id"]][user["user_id"]] = user
+            count += 1
+        return count
+
+    database = db.get_database()
+    await database["Users"].drop()
+    await database["UsersArchive"].drop()
+    await backend.ensure_indexes()
+    count = 0
+    chunk = []
+    for user in users:
+        chunk.append(user)
+        if len(chunk) == SEED_CHUNK:
+            await database["Users"].insert_many(chunk, ordered=False)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        await database["Users"].insert_many(chunk, ordered=False)
+        count += len(chunk)
+    return count
+
+
+def make_call(operation, args, rng):
+    guild_id = rng.randint(1, args.guilds)
+    user_id = rng.randint(1, args.users // args.guilds)
+    if operation == "add_warning":
+        return db.add_warning(guild_id, user_id, 1, "bench")
+    if operation == "add_punishment":
+        return db.add_punishment(guild_id, user_id, rng.choice(REASONS), rng.randint(1, 5))
+    if operation == "check_expired_points":
+        return db.check_expired_points(guild_id, user_id)
+    if operation == "deductpoints":
+        return db.deductpoints(guild_id, user_id, rng.randint(1, 3))
+    if operation == "get_user_info":
+        return db.get_user_info(guild_id, user_id, recent=3)
+    return db.get_leaderboard_users(guild_id)
+
+
+async def run_operation(operation, total, args, rng):
+    timings = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            call = make_call(operation, args, rng)
+            t = time.perf_counter()
+            try:
+                await call
+            except Exception:
+                errors += 1
+            timings.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "ops": total,
+        "errors": errors,
+        "throughput": round(total / elapsed, 1),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p99_ms": round(timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1000, 3),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\nvs {baseline_path}:")
+    for operation, current in results.items():
+        before = baseline.get(operation)
+        if not before:
+            continue
+        print(f"{operation:<22} throughput x{current['throughput'] / before['throughput']:.2f} "
+              f"p50 x{current['p50_ms'] / max(before['p50_ms'], 1e-6):.2f} "
+              f"p99 x{current['p99_ms'] / max(before['p99_ms'], 1e-6):.2f}")
+
+
+async def run(args):
+    if args.backend == "mongo":
+        if args.database == db.DATABASE_NAME:
+            sys.exit(f"refusing to reseed the production database {db.DATABASE_NAME!r}")
+        db.DATABASE_NAME = args.database
+    backend = db.create_backend(args.backend)
+    db.set_backend(backend)
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    seeded = await seed(backend, args, rng)
+    print(f"seeded {seeded} users in {args.guilds} guilds ({args.backend}) in {time.perf_counter() - start:.1f}s")
+
+    results = {}
+    for operation in args.operations:
+        total = args.leaderboard_ops if operation == "get_leaderboard_users" else args.ops
+        results[operation] = await run_operation(operation, total, args, rng)
+        r = results[operation]
+        print(f"{operation:<22} {r['throughput']:10.1f} ops/s p50={r['p50_ms']:.3f}ms "
+              f"p99={r['p99_ms']:.3f}ms errors={r['errors']}")
+    await db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--database", default="SentinelOneBench", help="mongo database to seed (dropped first)")
+    parser.add_argument("--users", type=int, default=20000, help="total users, split evenly over the guilds")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--history", type=int, default=20, help="max punishments per user")
+    parser.add_argument("--ops", type=int, default=5000, help="calls per operation")
+    parser.add_argument("--leaderboard-ops", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    args = parser.parse_args()
+    args.history = min(args.history, db.HOT_PUNISHMENT_LIMIT)
+
+    results = asyncio.run(run(args))
+    if args.output:
+        params = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+        with open(args.output, "w") as f:
+            json.dump({"params": params, "results": results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Replay gateway events through the Punishments, Points and ReportSystem cogs.
+
+Runs the real cogs against fake guilds, members and channels (see
+benchmarks/fakes.py) whose REST calls have simulated latency and rate
+limits, with the in-memory storage backend in place of Mongo. Events are
+dispatched at their trace timestamps the way discord.py dispatches
+listeners, each in its own task, and the run reports handler latency per
+event type (measured from the event's due time, so loop delays count),
+event-loop lag, and queue depths sampled while it runs.
+
+Traces are JSON lines, one event per line, ordered by "t" (seconds from start):
+  {"t": 0.5, "type": "message", "guild_id": 1, "channel_id": 10, "user_id": 5, "message_id": 900, "content": "hi"}
+  {"t": 0.9, "type": "reaction", "guild_id": 1, "channel_id": 10, "user_id": 6, "message_id": 900, "emoji": "🆘"}
+  {"t": 2.0, "type": "dm", "user_id": 6, "content": "spam"}
+  {"t": 2.5, "type": "command", "name": "punish", "guild_id": 1, "channel_id": 10, "user_id": 2, "target_id": 5,
+   "reason": "warning"}
+"name" is "punish" or "points". Without --trace a raid scenario is generated:
+background chat, a flood of identical messages from fresh accounts, a 🆘
+reaction storm with DM replies, and a burst of !punish on the raiders.
+
+Report handlers wait REPORT_TIMEOUT for the reporter's reply; the harness
+shortens it to --report-timeout and leaves that wait out of reaction latency.
+Ban votes run in the background as in the bot, for BAN_VOTE_DURATION shortened
+to --vote-duration; they are not part of punish latency. After the last event
+the run waits up to --drain-timeout for handlers and votes to finish, then
+cancels the rest and reports them as unfinished.
+
+Usage: python -m benchmarks.event_replay [--duration 30] [--raiders 200] [--reactions 300] [--punishes 150]
+       [--latency-ms 80] [--rate-limit-scale 1.0] [--vote-duration 2] [--drain-timeout 60]
+       [--trace events.jsonl] [--record events.jsonl]
+       [-o results.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeMessage, FakeREST, FakeRole, rest_summary
+
+MODERATOR_ID = 2
+SAMPLE_INTERVAL = 0.05  # seconds between loop lag / queue depth samples
+CHAT = ["gm", "did you see the match", "lol", "who's playing tonight", "that ref was blind", "anyone here?"]
+RAID_TEXT = "FREE NITRO for everyone click here discord-gift.example/claim"
+REASONS = ["notice", "warning", "penalty", "advisory"]
+
+
+def make_trace(args, rng):
+    """A raid scenario over --duration seconds in one guild."""
+    events = []
+    channels = [10 + i for i in range(args.channels)]
+    regulars = [1000 + i for i in range(args.members)]
+    raiders = [50000 + i for i in range(args.raiders)]
+    message_id = 10 ** 12
+    posted = []
+
+    t = 0.0
+    while t < args.duration:
+        t += rng.expovariate(args.chat_rate)
+        message_id += 1
+        posted.append((t, rng.choice(channels), message_id))
+        events.append({"t": t, "type": "message", "guild_id": 1, "channel_id": posted[-1][1],
+                       "user_id": rng.choice(regulars), "message_id": message_id, "content": rng.choice(CHAT)})
+
+    raid_start = args.duration * 0.3
+    raid_window = args.duration * 0.2
+    raid_posts = []
+    for raider in raiders:
+        for _ in range(args.raid_messages):
+            message_id += 1
+            t = raid_start + rng.uniform(0, raid_window)
+            channel_id = rng.choice(channels)
+            raid_posts.append((t, channel_id, message_id))
+            events.append({"t": t, "type": "message", "guild_id": 1, "channel_id": channel_id,
+                           "user_id": raider, "message_id": message_id, "content": RAID_TEXT})
+
+    for _ in range(args.reactions):
+        t = raid_start + rng.uniform(0.5, raid_window + 5)
+        candidates = [p for p in raid_posts if p[0] < t] or [p for p in posted if p[0] < t]
+        if not candidates:
+            continue
+        _, channel_id, target = rng.choice(candidates)
+        reporter = rng.choice(regulars)
+        events.append({"t": t, "type": "reaction", "guild_id": 1, "channel_id": channel_id,
+                       "user_id": reporter, "message_id": target, "emoji": "🆘"})
+        if rng.random() < args.reply_fraction:
+            events.append({"t": t + rng.uniform(0.5, args.report_timeout * 0.8), "type": "dm",
+                           "user_id": reporter, "content": "raid spam"})
+
+    for _ in range(args.punishes):
+        t = raid_start + rng.uniform(1, raid_window + 10)
+        events.append({"t": t, "type": "command", "name": "punish", "guild_id": 1, "channel_id": channels[0],
+                       "user_id": MODERATOR_ID, "target_id": rng.choice(raiders), "reason": rng.choice(REASONS)})
+    for _ in range(args.punishes // 5):
+        events.append({"t": rng.uniform(0, args.duration), "type": "command", "name": "points", "guild_id": 1,
+                       "channel_id": channels[0], "user_id": MODERATOR_ID, "target_id": rng.choice(raiders)})
+
+    events.sort(key=lambda e: e["t"])
+    return events
+
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+
+    def pick(q):
+        return round(samples[min(int(len(samples) * q), len(samples) - 1)] * 1000, 2)
+
+    return {"count": len(samples), "p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99),
+            "max_ms": round(samples[-1] * 1000, 2)}
+
+
+class Harness:
+    def __init__(self, args, rest, bot, punishments, points, reports):
+        self.args = args
+        self.rest = rest
+        self.bot = bot
+        self.punishments = punishments
+        self.points = points
+        self.reports = reports
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.unfinished = defaultdict(int)
+        self.in_flight = 0
+        self.loop_lag = []
+        self.depths = defaultdict(list)
+        self._tasks = set()
+        self._votes = set()
+        self.ban_votes = 0
+        # the cog runs votes with create_task; track them so the run can wait for them
+        run_vote = punishments._run_ban_vote
+
+        async def tracked_vote(vote):
+            task = asyncio.current_task()
+            self._votes.add(task)
+            self.ban_votes += 1
+            try:
+                await run_vote(vote)
+            finally:
+                self._votes.discard(task)
+
+        punishments._run_ban_vote = tracked_vote
+
+    def prepare(self, events):
+        """Create the guilds, channels and members a trace refers to."""
+        for event in events:
+            if "guild_id" not in event:
+                continue
+            guild = self.bot.guild(event["guild_id"])
+            guild.channel(event["channel_id"])
+            guild.member(event["user_id"], moderator=event["user_id"] == MODERATOR_ID)
+            if "target_id" in event:
+                guild.member(event["target_id"])
+        from cogs.punish import MOD_CHANNEL_ID, ROLE_ON_PUNISH_ID
+        from cogs.reports import LOG_CHANNEL_ID
+        for guild in self.bot.guilds:
+            guild.roles[ROLE_ON_PUNISH_ID] = FakeRole(ROLE_ON_PUNISH_ID, "punished")
+            guild.channel(LOG_CHANNEL_ID)
+            guild.channel(MOD_CHANNEL_ID)
+
+    def _user(self, user_id):
+        for guild in self.bot.guilds:
+            member = guild.get_member(user_id)
+            if member:
+                return member
+        return None
+
+    def _handler(self, event):
+        kind = event["type"]
+        if kind == "dm":
+            user = self._user(event["user_id"])
+            message = FakeMessage(user.dm_channel, user, int(event["t"] * 1e6), event["content"])
+            return "dm", self.reports.on_message(message)
+
+        guild = self.bot.get_guild(event["guild_id"])
+        channel = guild.get_channel(event["channel_id"])
+        author = guild.get_member(event["user_id"])
+        if kind == "message":
+            message = FakeMessage(channel, author, event["message_id"], event.get("content", ""))
+            channel.messages[message.id] = message
+            return "message", self.reports.on_message(message)
+        if kind == "reaction":
+            payload = SimpleNamespace(emoji=event.get("emoji", "🆘"), user_id=author.id, member=author,
+                                      guild_id=guild.id, channel_id=channel.id, message_id=event["message_id"])
+            return "reaction", self.reports.on_raw_reaction_add(payload)
+
+        target = guild.get_member(event["target_id"])
+        ctx = FakeContext(self.bot, guild, channel, author, FakeMessage(channel, author, 0, f"!{event['name']}"))
+        if event["name"] == "punish":
+            return "punish", self.punishments.punish.callback(self.punishments, ctx, target, reason=event["reason"])
+        return "points", self.points.points.callback(self.points, ctx, target)
+
+    async def _run(self, kind, coro, due):
+        self.in_flight += 1
+        try:
+            await coro
+        except asyncio.CancelledError:
+            self.unfinished[kind] += 1  # still running when the drain timeout hit
+            raise
+        except Exception:
+            self.errors[kind] += 1
+        finally:
+            self.in_flight -= 1
+        latency = time.perf_counter() - due
+        if kind == "reaction":
+            latency = max(0.0, latency - self.args.report_timeout)
+        self.latencies[kind].append(latency)
+
+    async def _sample(self):
+        from utils.locks import member_locks
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + SAMPLE_INTERVAL
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            self.loop_lag.append(max(0.0, loop.time() - expected))
+            self.depths["handlers_in_flight"].append(self.in_flight)
+            self.depths["tasks"].append(len(asyncio.all_tasks()))
+            self.depths["rest_waiting"].append(self.rest.waiting)
+            self.depths["evidence_queue"].append(self.reports.evidence.queue.qsize())
+            self.depths["role_timers"].append(len(self.punishments.timer_tasks))
+            self.depths["member_locks"].append(len(member_locks))
+
+    async def replay(self, events):
+        sampler = asyncio.create_task(self._sample())
+        start = time.perf_counter()
+        for event in events:
+            due = start + event["t"] / self.args.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind, coro = self._handler(event)
+            task = asyncio.create_task(self._run(kind, coro, due))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        # rate-limited sends can keep handlers busy long after the trace ends; stop waiting at some point
+        drain_until = time.perf_counter() + self.args.drain_timeout
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=self.args.drain_timeout)
+        await asyncio.sleep(0)  # let votes started by the last handlers register
+        if self._votes:
+            await asyncio.wait(set(self._votes), timeout=max(0.0, drain_until - time.perf_counter()))
+        elapsed = time.perf_counter() - start
+        leftover = self._tasks | self._votes
+        for task in leftover:
+            task.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+        sampler.cancel()
+        return elapsed
+
+    def summary(self, elapsed, events):
+        return {
+            "events": len(events),
+            "elapsed_s": round(elapsed, 2),
+            "latency": {kind: percentiles(samples) for kind, samples in sorted(self.latencies.items())},
+            "errors": dict(self.errors),
+            "unfinished": dict(self.unfinished),
+            "ban_votes": self.ban_votes,
+            "loop_lag": percentiles(self.loop_lag),
+            "queue_depth": {name: {"max": max(values), "mean": round(sum(values) / len(values), 2)}
+                            for name, values in self.depths.items() if values},
+            "rest": rest_summary(self.rest),
+        }
+
+
+async def run(args, events):
+    os.environ.setdefault("EVIDENCE_DIR", tempfile.mkdtemp(prefix="sentinel-replay-"))
+    from utils import db
+    import cogs.punish
+    import cogs.reports
+    from cogs.points import Points
+    from cogs.punish import Punishments
+    from cogs.reports import ReportSystem
+
+    db.set_backend(db.create_backend("memory"))
+    cogs.reports.REPORT_TIMEOUT = args.report_timeout
+    cogs.punish.BAN_VOTE_DURATION = args.vote_duration
+
+    rest = FakeREST(args.latency_ms, args.jitter_ms, args.rate_limit_scale, random.Random(args.seed))
+    bot = FakeBot(rest)
+    reports = ReportSystem(bot)
+    harness = Harness(args, rest, bot, Punishments(bot), Points(bot), reports)
+    for cog in (harness.punishments, harness.points, reports):
+        bot.cogs[type(cog).__name__] = cog
+    harness.prepare(events)
+    await reports.cog_load()
+    try:
+        # the cogs print per event; writing that to a terminal would dominate the numbers
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+            elapsed = await harness.replay(events)
+    finally:
+        await reports.cog_unload()
+        for task in list(harness.punishments.timer_tasks.values()):
+            task.cancel()
+        await db.close()
+    return harness.summary(elapsed, events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="replay this JSONL trace instead of generating one")
+    parser.add_argument("--record", help="write the generated trace here")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay this many times faster than recorded")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--chat-rate", type=float, default=20.0, help="background messages per second")
+    parser.add_argument("--raiders", type=int, default=200)
+    parser.add_argument("--raid-messages", type=int, default=3, help="messages per raider")
+    parser.add_argument("--reactions", type=int, default=300)
+    parser.add_argument("--reply-fraction", type=float, default=0.7)
+    parser.add_argument("--punishes", type=int, default=150)
+    parser.add_argument("--report-timeout", type=float, default=5.0)
+    parser.add_argument("--vote-duration", type=float, default=2.0, help="seconds each ban vote stays open")
+    parser.add_argument("--drain-timeout", type=float, default=60.0,
+                        help="seconds to wait for handlers still running after the last event")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="mean simulated REST latency")
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--rate-limit-scale", type=float, default=1.0, help="multiply every route's rate limit")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="keep the cogs' own output")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.trace:
+        events = load_trace(args.trace)
+    else:
+        events = make_trace(args, random.Random(args.seed))
+        if args.record:
+            with open(args.record, "w") as f:
+                f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+
+    results = asyncio.run(run(args, events))
+    print(f"replayed {results['events']} events in {results['elapsed_s']}s")
+    print(f"ban votes  {results['ban_votes']}")
+    for kind, stats in results["latency"].items():
+        if stats["count"]:
+            print(f"{kind:<10} n={stats['count']:<6} p50={stats['p50_ms']:.1f}ms p90={stats['p90_ms']:.1f}ms "
+                  f"p99={stats['p99_ms']:.1f}ms max={stats['max_ms']:.1f}ms errors={results['errors'].get(kind, 0)} "
+                  f"unfinished={results['unfinished'].get(kind, 0)}")
+    lag = results["loop_lag"]
+    print(f"loop lag   p50={lag.get('p50_ms', 0):.1f}ms p99={lag.get('p99_ms', 0):.1f}ms max={lag.get('max_ms', 0):.1f}ms")
+    for name, depth in results["queue_depth"].items():
+        print(f"{name:<20} max={depth['max']} mean={depth['mean']}")
+    for route, counts in sorted(results["rest"].items()):
+        print(f"rest {route:<16} calls={counts['calls']} held by rate limit={counts['rate_limited']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
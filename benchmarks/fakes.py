@@ -0,0 +1,307 @@
+"""Stand-ins for the discord.py objects the cogs touch, backed by a simulated REST API.
+
+Only the attributes and coroutines the cogs actually use are implemented.
+Every REST call goes through FakeREST, which sleeps for a sampled latency
+and enforces per-route token buckets the way Discord's rate limits do. A
+call that finds its bucket empty is held until a token frees up, as
+discord.py's HTTP client does, and counted as rate limited.
+"""
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+
+def _not_found(what: str) -> discord.NotFound:
+    return discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), f"Unknown {what}")
+
+
+class FakeREST:
+    """Simulated Discord REST API: latency, per-route buckets and call accounting."""
+
+    # (requests, per seconds) for each route family; anything else shares "default"
+    ROUTE_LIMITS = {
+        "member_edit": (10, 10.0),      # timeouts and role changes, per guild
+        "channel_message": (5, 5.0),    # sends in one channel
+        "dm": (5, 5.0),                 # per recipient
+        "default": (50, 1.0),
+    }
+
+    def __init__(self, latency_ms: float = 80.0, jitter_ms: float = 40.0, limit_scale: float = 1.0,
+                 rng: Optional[random.Random] = None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.limit_scale = limit_scale
+        self.rng = rng or random.Random(0)
+        self._buckets: Dict[Tuple[str, Hashable], List[float]] = {}
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.waiting = 0
+
+    def _delay(self) -> float:
+        return max(0.0, self.rng.gauss(self.latency, self.jitter))
+
+    def _reserve(self, route: str, key: Hashable) -> float:
+        """Take a token from the route's bucket, going into debt if empty; returns the wait."""
+        rate, per = self.ROUTE_LIMITS.get(route, self.ROUTE_LIMITS["default"])
+        rate = max(1.0, rate * self.limit_scale)
+        now = time.monotonic()
+        bucket = self._buckets.setdefault((route, key), [rate, now])
+        bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate / per) - 1
+        bucket[1] = now
+        return max(0.0, -bucket[0] * per / rate)
+
+    async def call(self, route: str, key: Hashable = None):
+        self.calls[route] += 1
+        self.waiting += 1
+        try:
+            wait = self._reserve(route, key)
+            if wait:
+                # discord.py reads the bucket headers and holds the request until it may go out
+                self.rate_limited[route] += 1
+                await asyncio.sleep(wait)
+            await asyncio.sleep(self._delay())
+        finally:
+            self.waiting -= 1
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str = "role"):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeUser:
+    def __init__(self, rest: FakeREST, user_id: int, bot: bool = False):
+        self.rest = rest
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.bot = bot
+        self.dm_channel = FakeDMChannel(rest, self)
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.call("dm", self.id)
+        return self.dm_channel.record(content, kwargs.get("embed"))
+
+
+class FakeMember(FakeUser):
+    def __init__(self, rest: FakeREST, guild: "FakeGuild", user_id: int, moderator: bool = False):
+        super().__init__(rest, user_id)
+        self.guild = guild
+        self.roles: List[FakeRole] = []
+        self.guild_permissions = discord.Permissions(manage_messages=moderator)
+        self.display_avatar = SimpleNamespace(url=f"https://cdn.example/avatars/{user_id}.png")
+
+    async def timeout(self, duration, reason=None):
+        await self.rest.call("member_edit", self.guild.id)
+
+    async def add_roles(self, *roles, reason=None):
+        await self.rest.call("member_edit", self.guild.id)
+        self.roles.extend(r for r in roles if r not in self.roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.rest.call("member_edit", self.guild.id)
+        self.roles = [r for r in self.roles if r not in roles]
+
+    async def ban(self, reason=None):
+        await self.rest.call("ban", self.guild.id)
+
+
+class FakeMessage:
+    def __init__(self, channel, author, message_id: int, content: str = "", reference_id: Optional[int] = None):
+        self.id = message_id
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.author = author
+        self.content = content or ""
+        self.attachments = []
+        self.embeds = []
+        self.reactions = []
+        self.mentions = []
+        self.raw_mentions = []
+        self.raw_role_mentions = []
+        self.mention_everyone = False
+        self.reference = SimpleNamespace(message_id=reference_id) if reference_id else None
+        self.created_at = discord.utils.utcnow()
+        guild_id = self.guild.id if self.guild else "@me"
+        self.jump_url = f"https://discord.com/channels/{guild_id}/{channel.id}/{message_id}"
+
+    async def add_reaction(self, emoji):
+        await self.channel.rest.call("reaction", self.channel.id)
+
+
+class _MessageStore:
+    def record(self, content=None, embed=None, author=None) -> FakeMessage:
+        self._next_id += 1
+        message = FakeMessage(self, author or self.bot_user, self._next_id, content or "")
+        if embed is not None:
+            message.embeds.append(embed)
+        self.sent += 1
+        if hasattr(self, "messages"):
+            self.messages[message.id] = message  # so fetch_message finds what the bot posted
+        return message
+
+
+class FakeTextChannel(_MessageStore):
+    def __init__(self, rest: FakeREST, guild: "FakeGuild", channel_id: int, bot_user: FakeUser):
+        self.rest = rest
+        self.guild = guild
+        self.id = channel_id
+        self.name = f"channel-{channel_id}"
+        self.mention = f"<#{channel_id}>"
+        self.bot_user = bot_user
+        self.messages: Dict[int, FakeMessage] = {}
+        self.sent = 0
+        self._next_id = channel_id * 1_000_000
+
+    async def send(self, content=None, embed=None, delete_after=None, **kwargs):
+        await self.rest.call("channel_message", self.id)
+        return self.record(content, embed)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self.rest.call("get_message", self.id)
+        message = self.messages.get(message_id)
+        if message is None:
+            raise _not_found("Message")
+        return message
+
+
+class FakeDMChannel(_MessageStore, discord.DMChannel):
+    """A DMChannel as far as isinstance checks go; nothing from its __init__ is needed."""
+
+    def __init__(self, rest: FakeREST, recipient: FakeUser):
+        self.rest = rest
+        self.id = recipient.id
+        self.recipients = [recipient]  # DMChannel.recipient reads this
+        self.bot_user = None
+        self.sent = 0
+        self._next_id = 0
+
+
+class FakeGuild:
+    def __init__(self, rest: FakeREST, guild_id: int, bot_user: FakeUser):
+        self.rest = rest
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.bot_user = bot_user
+        self.members: Dict[int, FakeMember] = {}
+        self.channels: Dict[int, FakeTextChannel] = {}
+        self.roles: Dict[int, FakeRole] = {}
+
+    def member(self, user_id: int, moderator: bool = False) -> FakeMember:
+        if user_id not in self.members:
+            self.members[user_id] = FakeMember(self.rest, self, user_id, moderator)
+        return self.members[user_id]
+
+    def channel(self, channel_id: int) -> FakeTextChannel:
+        if channel_id not in self.channels:
+            self.channels[channel_id] = FakeTextChannel(self.rest, self, channel_id, self.bot_user)
+        return self.channels[channel_id]
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self.members.get(user_id)
+
+    async def fetch_member(self, user_id: int) -> FakeMember:
+        await self.rest.call("get_member", self.id)
+        member = self.members.get(user_id)
+        if member is None:
+            raise _not_found("Member")
+        return member
+
+    async def query_members(self, user_ids=None, limit=5, cache=True):
+        await self.rest.call("gateway_query", self.id)
+        return [self.members[u] for u in user_ids or () if u in self.members]
+
+    def get_channel(self, channel_id: int) -> Optional[FakeTextChannel]:
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self.roles.get(role_id)
+
+
+class FakeBot:
+    """What the cogs reach for on self.bot."""
+
+    def __init__(self, rest: FakeREST, bot_id: int = 1):
+        self.rest = rest
+        self.user = FakeUser(rest, bot_id, bot=True)
+        self.cogs: Dict[str, object] = {}
+        self._guilds: Dict[int, FakeGuild] = {}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return asyncio.get_running_loop()
+
+    @property
+    def guilds(self) -> List[FakeGuild]:
+        return list(self._guilds.values())
+
+    def guild(self, guild_id: int) -> FakeGuild:
+        if guild_id not in self._guilds:
+            self._guilds[guild_id] = FakeGuild(self.rest, guild_id, self.user)
+        return self._guilds[guild_id]
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self._guilds.get(guild_id)
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def get_channel(self, channel_id: int):
+        for guild in self._guilds.values():
+            channel = guild.get_channel(channel_id)
+            if channel:
+                return channel
+        return None
+
+    async def fetch_channel(self, channel_id: int):
+        await self.rest.call("get_channel")
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            raise _not_found("Channel")
+        return channel
+
+    async def wait_for(self, event, check=None, timeout=None):
+        # nobody clicks confirmation reactions during a replay
+        await asyncio.sleep(timeout or 0)
+        raise asyncio.TimeoutError
+
+
+class FakeContext:
+    """A prefix-command context: send() posts in the channel, defer() is a no-op."""
+
+    def __init__(self, bot: FakeBot, guild: FakeGuild, channel: FakeTextChannel, author: FakeMember,
+                 message: FakeMessage):
+        self.bot = bot
+        self.guild = guild
+        self.channel = channel
+        self.author = author
+        self.message = message
+        self.interaction = None
+
+    async def send(self, content=None, embed=None, **kwargs):
+        return await self.channel.send(content, embed=embed, **kwargs)
+
+    async def defer(self, **kwargs):
+        pass
+
+
+def rest_summary(rest: FakeREST) -> Dict[str, Dict[str, int]]:
+    routes = defaultdict(dict)
+    for route, count in rest.calls.items():
+        routes[route]["calls"] = count
+        routes[route]["rate_limited"] = rest.rate_limited.get(route, 0)
+    return dict(routes)
@@ -0,0 +1,104 @@
+"""Compare memory held by the default cache configuration and LOW_MEMORY mode.
+
+Feeds a synthetic guild (members + message traffic) through discord.py's
+connection state under each configuration and reports tracemalloc peaks.
+
+Usage: python -m benchmarks.member_cache_memory [--members 50000] [--messages 20000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+import discord
+from discord.ext import commands
+
+from utils.members import cache_options
+
+GUILD_ID = 700000000000000000
+CHANNEL_ID = 700000000000000001
+
+
+def _user(user_id: int) -> dict:
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def _member(user_id: int) -> dict:
+    return {"user": _user(user_id), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+
+
+def guild_payload(member_count: int) -> dict:
+    return {
+        "id": str(GUILD_ID),
+        "name": "benchmark",
+        "owner_id": "1",
+        "member_count": member_count,
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(CHANNEL_ID), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}],
+        "members": [_member(1000 + i) for i in range(member_count)],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+    }
+
+
+def message_payload(message_id: int, author_id: int) -> dict:
+    return {
+        "id": str(message_id),
+        "channel_id": str(CHANNEL_ID),
+        "guild_id": str(GUILD_ID),
+        "author": _user(author_id),
+        "member": {k: v for k, v in _member(author_id).items() if k != "user"},
+        "content": "lorem ipsum dolor sit amet " * 4,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+def measure(low_memory: bool, members: int, messages: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    bot = commands.Bot(command_prefix="!", intents=intents, **cache_options(low_memory))
+    state = bot._connection
+    state.dispatch = lambda *args, **kwargs: None  # no event loop; only the caches matter here
+
+    guild = discord.Guild(data=guild_payload(members), state=state)
+    state._add_guild(guild)
+    for i in range(messages):
+        state.parse_message_create(message_payload(800000000000000000 + i, 1000 + i % members))
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": "low-memory" if low_memory else "default",
+        "cached_members": len(guild._members),
+        "cached_messages": len(state._messages) if state._messages is not None else 0,
+        "retained_mb": current / 1e6,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=50000)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    for low_memory in (False, True):
+        r = measure(low_memory, args.members, args.messages)
+        print(f"{r['mode']:<11} members={r['cached_members']:<7} messages={r['cached_messages']:<5} "
+              f"retained={r['retained_mb']:7.1f} MB  peak={r['peak_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Decode time and memory of Users documents: full dict decode vs lazy UserRecord.
+
+Reading the last few entries still decodes the whole array, which is why
+db.get_user_info(recent=N) slices them on the server instead.
+
+Usage: python -m benchmarks.record_decode [--punishments 500] [--docs 2000]
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+from utils.models import RAW_CODEC_OPTIONS, UserRecord
+
+REASONS = ["advisory", "notice", "warning", "penalty", "suspension"]
+
+
+def make_document(user_id: int, punishments: int) -> bytes:
+    now = datetime(2025, 1, 1)
+    return bson.encode({
+        "guild_id": 1,
+        "user_id": user_id,
+        "version": punishments,
+        "total_points": 7,
+        "warnings": [],
+        "punishments": [
+            {
+                "reason": REASONS[i % len(REASONS)],
+                "points": i % 5,
+                "timestamp": now - timedelta(hours=i),
+                "warning_count": 0,
+            }
+            for i in range(punishments)
+        ],
+    })
+
+
+def dict_total(raw: bytes):
+    doc = bson.decode(raw)
+    return doc, doc.get("total_points", 0)
+
+
+def record_total(raw: bytes):
+    record = UserRecord(RawBSONDocument(raw, RAW_CODEC_OPTIONS))
+    return record, record.total_points
+
+
+def dict_recent(raw: bytes):
+    doc = bson.decode(raw)
+    return doc, doc.get("total_points", 0), [(p["reason"], p["points"], p["timestamp"]) for p in doc["punishments"][-3:]]
+
+
+def record_recent(raw: bytes):
+    record = UserRecord(RawBSONDocument(raw, RAW_CODEC_OPTIONS))
+    return record, record.total_points, [(p.reason, p.points, p.timestamp) for p in record.recent_punishments(3)]
+
+
+def measure(label, fn, payloads):
+    start = time.perf_counter()
+    for raw in payloads:
+        fn(raw)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    kept = [fn(raw)[0] for raw in payloads]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    per_doc = elapsed / len(payloads)
+    print(f"{label:<26} {per_doc * 1e6:9.1f} us/doc {current / len(payloads) / 1024:9.1f} KiB/doc retained")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--punishments", type=int, default=500)
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = [make_document(i, args.punishments) for i in range(args.docs)]
+    print(f"{args.docs} documents x {args.punishments} punishments "
+          f"({len(payloads[0]) / 1024:.1f} KiB BSON each)")
+    measure("dict, total", dict_total, payloads)
+    measure("UserRecord, total", record_total, payloads)
+    measure("dict, total + last 3", dict_recent, payloads)
+    measure("UserRecord, total + last 3", record_recent, payloads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Lookup latency of the roast club index with thousands of synthetic clubs.
+
+Usage: python -m benchmarks.roast_lookup [--clubs 5000] [--lookups 20000]
+"""
+import argparse
+import random
+import string
+import time
+
+from utils.clubs import Club, ClubIndex
+
+PREFIXES = ["", "fc ", "ac ", "real ", "sporting ", "athletic "]
+SUFFIXES = ["", " united", " city", " town", " rovers", " fc", " athletic"]
+
+
+def _typo(rng, text):
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice(string.ascii_lowercase) + text[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clubs", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    clubs = []
+    for i in range(args.clubs):
+        stem = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        name = f"{rng.choice(PREFIXES)}{stem}{rng.choice(SUFFIXES)}".title()
+        clubs.append(Club(name, [stem[:4] + str(i)], ["roast"]))
+
+    start = time.perf_counter()
+    index = ClubIndex(clubs)
+    build = time.perf_counter() - start
+
+    queries = []
+    for _ in range(args.lookups):
+        name = rng.choice(clubs).name.lower()
+        queries.append(_typo(rng, name) if rng.random() < 0.5 else name)
+
+    timings = []
+    hits = 0
+    for query in queries:
+        t = time.perf_counter()
+        if index.lookup(query) is not None:
+            hits += 1
+        timings.append(time.perf_counter() - t)
+    timings.sort()
+
+    print(f"built index of {len(index)} clubs in {build * 1000:.1f}ms")
+    print(f"{args.lookups} lookups (half with a typo): hits={hits}")
+    print(f"p50={timings[len(timings) // 2] * 1e6:.1f}us p99={timings[int(len(timings) * 0.99)] * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+from utils.export import FORMATS, export_records, parse_date
+
+
+class ExportFlags(commands.FlagConverter, prefix="--", delimiter=" "):
+    format: str = "jsonl"
+    since: Optional[str] = None
+    until: Optional[str] = None
+    user: Tuple[discord.User, ...] = ()
+
+
+class Export(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="export")
+    @commands.has_permissions(manage_messages=True)
+    async def export(self, ctx, *, flags: ExportFlags):
+        """Export moderation records. Example: !export --format csv --since 2024-01-01 --user @member"""
+        fmt = flags.format.lower()
+        if fmt not in FORMATS:
+            await ctx.send(f"❌ Invalid format. Use one of: {', '.join(FORMATS)}.")
+            return
+        try:
+            since, until = parse_date(flags.since), parse_date(flags.until)
+        except ValueError:
+            await ctx.send("❌ Invalid date. Use ISO format, e.g. `2024-01-31`.")
+            return
+
+        fd, path = tempfile.mkstemp(prefix=f"export-{ctx.guild.id}-", suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            async with ctx.typing():
+                count = await export_records(ctx.guild.id, path, fmt, since, until, [u.id for u in flags.user])
+
+            size = os.path.getsize(path)
+            if size > ctx.guild.filesize_limit:
+                await ctx.send(
+                    f"❌ Export is {size / 1e6:.1f} MB, over this server's upload limit. "
+                    f"Narrow the date range or run `python -m utils.export {ctx.guild.id}` on the host."
+                )
+                return
+
+            await ctx.send(
+                f"📦 Exported **{count}** records.",
+                file=discord.File(path, filename=f"moderation-{ctx.guild.id}.{fmt}")
+            )
+        except Exception as e:
+            print(f"[ERROR] export failed for guild {ctx.guild.id}: {e}")
+            await ctx.send("❌ An internal error occurred while exporting records.")
+        finally:
+            os.remove(path)
+
+
+async def setup(bot):
+    await bot.add_cog(Export(bot))
@@ -1,20 +1,63 @@
+import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands
 from utils import db
 from utils.mutepoint import MutePointSystem, OffenseLevel
+from utils.members import resolve_members
+from utils.cache import TTLCache
+from utils.pagination import PageView
+from utils.locks import member_locks
 from datetime import datetime, timedelta
 
+LEADERBOARD_PAGE_SIZE = 10
+HISTORY_PAGE_SIZE = 5
+ARCHIVE_INTERVAL = 3600  # seconds between moves of expired history to UsersArchive
+
 class Points(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-
-    @commands.command(name="points")
+        # short-lived so flipping pages back and forth stays off the database
+        self.page_cache = TTLCache(ttl=30.0)
+        self.archive_task = None
+
+    async def cog_load(self):
+        self.archive_task = asyncio.create_task(self._archive_loop())
+
+    async def cog_unload(self):
+        if self.archive_task:
+            self.archive_task.cancel()
+
+    def forget_history(self, guild_id: int, user_id: int):
+        """Drop cached !history pages for a member whose record just changed."""
+        self.page_cache.invalidate(("history", guild_id, user_id))
+
+    async def _archive_loop(self):
+        # one process archives for every guild; the others wait on the lease
+        lease = getattr(self.bot, "archiver_lease", None)
+        while True:
+            if lease:
+                await lease.wait_until_leader()
+            try:
+                moved = await db.archive_expired_history()
+                if moved:
+                    print(f"[DEBUG] archived {moved} expired punishments")
+            except Exception as e:
+                print(f"[ERROR] history archive failed: {e}")
+            await asyncio.sleep(ARCHIVE_INTERVAL)
+
+    @commands.hybrid_command(name="points")
+    @app_commands.describe(member="Member to look up")
     async def points(self, ctx, member: discord.Member):
         """Get detailed points and warnings information for a member"""
+        await ctx.defer()
         # Check for expired points first
-        total_points = await db.check_expired_points(ctx.guild.id, member.id)
-        user_info = await db.get_user_info(ctx.guild.id, member.id)
-        warnings = await db.get_warning_count(ctx.guild.id, member.id)
+        async with member_locks((ctx.guild.id, member.id)):
+            total_points = await db.check_expired_points(ctx.guild.id, member.id)
+            user_info = await db.get_user_info(ctx.guild.id, member.id, recent=3)
+        # counted from Reports so it drops as old reports expire, matching !reports
+        report_count, _ = await db.get_reports(ctx.guild.id, member.id, limit=0)
+        warnings = user_info.warning_count if user_info else 0
         
         embed = discord.Embed(
             title=f"Points Info for {member.display_name}",
@@ -39,7 +82,7 @@ class Points(commands.Cog):
         )
 
         # Add MP information
-        total_points = user_info.get("total_points", 0) if user_info else 0
+        total_points = user_info.total_points if user_info else 0
         embed.add_field(
             name="📊 Mute Points",
             value=(
@@ -49,19 +92,26 @@ class Points(commands.Cog):
             inline=False
         )
 
+        if report_count:
+            embed.add_field(
+                name="🚨 Reports",
+                value=f"Reported **{report_count}** time(s) • `!reports @user` for details",
+                inline=False
+            )
+
         # Add recent punishments
-        if user_info and user_info.get('punishments'):
-            recent_punishments = user_info['punishments'][-3:]  # Get last 3
+        recent_punishments = user_info.recent_punishments(3) if user_info else []  # Get last 3
+        if recent_punishments:
             punishment_list = []
             for p in recent_punishments:
-                points = p.get('points', 0)
+                points = p.points
                 if points > 0:
-                    timestamp = int(p['timestamp'].timestamp())
+                    timestamp = int(p.timestamp.timestamp())
                     punishment_list.append(
-                        f"• {p['reason']} ({points} MP) - <t:{timestamp}:R>"
+                        f"• {p.reason} ({points} MP) - <t:{timestamp}:R>"
                     )
                 else:
-                    timestamp = int(p['timestamp'].timestamp())
+                    timestamp = int(p.timestamp.timestamp())
                     punishment_list.append(
                         f"• Advisory Warning - <t:{timestamp}:R>"
                     )
@@ -72,17 +122,16 @@ class Points(commands.Cog):
                 inline=False
             )
 
-        if user_info and user_info.get('punishments'):
-            recent_punishments = user_info['punishments'][-3:]
+        if recent_punishments:
             punishment_list = []
             for p in recent_punishments:
-                timestamp = p['timestamp']
+                timestamp = p.timestamp
                 expiry_date = timestamp + timedelta(days=20)
                 remaining_days = (expiry_date - datetime.utcnow()).days
                 
                 if remaining_days > 0:
                     punishment_list.append(
-                        f"• {p['reason']} ({p['points']} MP) - Expires in {remaining_days} days"
+                        f"• {p.reason} ({p.points} MP) - Expires in {remaining_days} days"
                     )
             
             if punishment_list:
@@ -130,9 +179,14 @@ class Points(commands.Cog):
             await self.bot.wait_for('reaction_add', timeout=30.0, check=check)
             
             # Fix: Add await to database operations
-            await db.clear_points(ctx.guild.id, member.id)
-            await db.clear_warnings(ctx.guild.id, member.id)
-            await ctx.send(f"✅ All points and warnings cleared for {member.mention}")
+            async with member_locks((ctx.guild.id, member.id)):
+                cleared = await db.clear_points(ctx.guild.id, member.id)
+                await db.clear_warnings(ctx.guild.id, member.id)
+            self.forget_history(ctx.guild.id, member.id)
+            if cleared is db.QUEUED:
+                await ctx.send(f"⏳ Database unavailable: clearing {member.mention}'s points and warnings is queued and will apply once it is back.")
+            else:
+                await ctx.send(f"✅ All points and warnings cleared for {member.mention}")
 
         except TimeoutError:
             await ctx.send("❌ Command timed out. No changes were made.")
@@ -179,9 +233,15 @@ class Points(commands.Cog):
 
         utility_commands = [
             ("!points @user", "Check warnings and MP"),
+            ("!history @user [yes]", "Browse punishment history (yes = archived, older than 20 days)"),
+            ("!reports @user", "Report count and latest reports"),
+            ("!export [--format csv] [--since date] [--user @user]", "Download moderation records"),
+            ("!modstats [7d|30d|90d]", "Moderation activity summary"),
             ("!clearpoints @user", "Clear all warnings and MP"),
             ("!release @user", "Remove active mute"),
             ("!sybau @user <duration> [reason]", "Temporarily mute without MP"),
+            ("!masspunish <category> @users... [joined e.g. 10m]", "Raid response: punish many at once"),
+            ("!massmute <duration> @users... [joined e.g. 10m]", "Raid response: mute many at once"),
             ("Report", "React 🆘 to report message")
         ]
 
@@ -212,8 +272,10 @@ class Points(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    @commands.command(name="deduct")
+    @commands.hybrid_command(name="deduct")
     @commands.has_permissions(manage_messages=True)
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.describe(member="Member to deduct from", points="Mute points to remove")
     async def deduct(self, ctx, member: discord.Member, points: int):
         """Deduct mute points from a user"""
         try:
@@ -221,14 +283,23 @@ class Points(commands.Cog):
                 await ctx.send("❌ Points to deduct must be a positive integer.")
                 return
 
-            user_info = await db.get_user_info(ctx.guild.id, member.id)
-            current_points = user_info.get("total_points", 0) if user_info else 0
+            await ctx.defer()
 
-            if current_points == 0:
-                await ctx.send(f"❌ {member.mention} has no points to deduct.")
-                return
+            async with member_locks((ctx.guild.id, member.id)):
+                user_info = await db.get_user_info(ctx.guild.id, member.id, recent=0)
+                current_points = user_info.total_points if user_info else 0
+
+                if current_points == 0:
+                    await ctx.send(f"❌ {member.mention} has no points to deduct.")
+                    return
 
-            new_points = await db.deductpoints(ctx.guild.id, member.id, points)
+                new_points = await db.deductpoints(ctx.guild.id, member.id, points)
+            self.forget_history(ctx.guild.id, member.id)
+
+            if new_points is db.QUEUED:
+                # the new total is unknown until the journal is replayed
+                await ctx.send(f"⏳ Database unavailable: deducting **{points} MP** from {member.mention} is queued and will apply once it is back.")
+                return
 
             points_actually_deducted = current_points - new_points
 
@@ -256,16 +327,84 @@ class Points(commands.Cog):
             await ctx.send(f"❌ An unexpected error occurred. Please check the logs.")
             print(f"Error in !deduct command: {e}") 
 
-    @commands.command(name="leaderboard")
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        await db.set_member_present(member.guild.id, member.id, True)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        # raw event: member_remove only fires for cached members, which
+        # low-memory mode doesn't keep
+        await db.set_member_present(payload.guild_id, payload.user.id, False)
+
+    async def _leaderboard_rows(self, guild, after):
+        """
+        Collect up to one page of present members, starting after the
+        (points, user_id) key `after`. Returns (rows, next_key, has_more).
+        """
+        cache_key = ("leaderboard", guild.id, after)
+        cached = self.page_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        cursor = db.get_leaderboard_cursor(guild.id, batch_size=LEADERBOARD_PAGE_SIZE, after=after)
+        rows = []
+        pending = []
+        last_key = after
+        has_more = False
+
+        async def resolve_pending():
+            # departed users are filtered by the aggregation, this only catches
+            # stale flags (e.g. someone left while the bot was offline)
+            members = await resolve_members(guild, [u['user_id'] for u in pending])
+            for user in pending:
+                member = members.get(user['user_id'])
+                if member:
+                    rows.append((member, user.get('total_points', 0)))
+                else:
+                    await db.set_member_present(guild.id, user['user_id'], False)
+            pending.clear()
+
+        async for user in cursor:
+            if len(rows) >= LEADERBOARD_PAGE_SIZE:
+                has_more = True
+                break
+            pending.append(user)
+            last_key = (user.get('total_points', 0), user['user_id'])
+            if len(rows) + len(pending) >= LEADERBOARD_PAGE_SIZE:
+                await resolve_pending()
+        if pending:
+            await resolve_pending()
+        await cursor.close()
+
+        result = (rows, last_key, has_more)
+        self.page_cache.set(cache_key, result)
+        return result
+
+    @commands.hybrid_command(name="leaderboard")
     async def leaderboard(self, ctx):
         """Display the points leaderboard for the server based on recent activity"""
-        users = await db.get_leaderboard_users(ctx.guild.id) 
-
-        if not users:
-            await ctx.send("The server is clean. No recent infractions found.")
+        await ctx.defer()
+        # page_keys[n] is the keyset position page n starts after
+        page_keys = [None]
+
+        async def fetch_page(page):
+            rows, next_key, has_more = await self._leaderboard_rows(ctx.guild, page_keys[page])
+            if len(page_keys) == page + 1:
+                page_keys.append(next_key)
+            return self._leaderboard_embed(ctx, rows, page), has_more
+
+        rows, _, has_more = await self._leaderboard_rows(ctx.guild, None)
+        if not rows and not has_more:
+            if await db.get_leaderboard_cursor(ctx.guild.id, batch_size=1).to_list(length=1):
+                await ctx.send("All top offenders have left the server. No active offenders to display.")
+            else:
+                await ctx.send("The server is clean. No recent infractions found.")
             return
-        
 
+        await PageView(ctx.author.id, fetch_page).start(ctx)
+
+    def _leaderboard_embed(self, ctx, rows, page):
         embed = discord.Embed(
             title="WALL OF SHAME",
             description="A list of members most familiar with the rulebook, page by page.\n*This board tracks infractions from the last 20 days.*",
@@ -278,40 +417,57 @@ class Points(commands.Cog):
         leaderboard_lines = []
         
         medals = { 1: "💩", 2: "🤡", 3: "🤓" }
-        
-        # Only include members still in guild; skip users who left
-        displayed = 0
-        max_display = 10
-
-        for user in users:
-            if displayed >= max_display:
-                break
-
-            member = ctx.guild.get_member(user['user_id'])
-            if not member:
-                continue
 
-            points = user.get('total_points', 0)
-            rank = displayed + 1
+        for rank, (member, points) in enumerate(rows, start=page * LEADERBOARD_PAGE_SIZE + 1):
             rank_icon = medals.get(rank, "▫️")
-
             leaderboard_lines.append(f"{rank_icon} **{member.mention}**: {points} MP")
-            displayed += 1
 
-        if not leaderboard_lines:
-            await ctx.send("All top offenders have left the server. No active offenders to display.")
-            return
-        
         # Add the formatted list of users to the embed.
         embed.add_field(
             name="Top Offenders",
-            value="\n".join(leaderboard_lines),
+            value="\n".join(leaderboard_lines) or "No more offenders.",
             inline=False
         )
         
-        embed.set_footer(text="This is a list you don't want to be on. Behave.")
+        embed.set_footer(text=f"Page {page + 1} • This is a list you don't want to be on. Behave.")
+        return embed
 
-        await ctx.send(embed=embed)
+    @commands.hybrid_command(name="history")
+    @commands.has_permissions(manage_messages=True)
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.describe(member="Member whose history to browse", archived="Show punishments older than 20 days")
+    async def history(self, ctx, member: discord.Member, archived: bool = False):
+        """Browse a member's punishment history, newest first. Add `yes` for archived entries"""
+        await ctx.defer()
+        get_page = db.get_archive_page if archived else db.get_punishment_page
+
+        async def fetch_page(page):
+            cache_key = ("history", ctx.guild.id, member.id, archived, page)
+            cached = self.page_cache.get(cache_key)
+            if cached is None:
+                cached = await get_page(ctx.guild.id, member.id, page, HISTORY_PAGE_SIZE)
+                self.page_cache.set(cache_key, cached)
+            entries, total = cached
+
+            embed = discord.Embed(
+                title=f"{'Archived ' if archived else ''}Punishment History for {member.display_name}",
+                color=discord.Color.blue(),
+                timestamp=ctx.message.created_at
+            )
+            lines = []
+            for p in entries:
+                timestamp = int(p.timestamp.timestamp())
+                points = p.points
+                if points > 0:
+                    lines.append(f"• {p.reason} ({points} MP) - <t:{timestamp}:R>")
+                else:
+                    lines.append(f"• Advisory Warning - <t:{timestamp}:R>")
+            embed.add_field(name="📝 Actions", value="\n".join(lines) or "None", inline=False)
+            pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+            embed.set_footer(text=f"Page {page + 1}/{pages} • {total} total")
+            return embed, (page + 1) * HISTORY_PAGE_SIZE < total
+
+        await PageView(ctx.author.id, fetch_page).start(ctx)
             
 async def setup(bot):
     await bot.add_cog(Points(bot))
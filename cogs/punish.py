@@ -1,21 +1,94 @@
 from datetime import datetime, timedelta
 from asyncio import sleep
+from collections import defaultdict, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import List, Optional
 import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands
 from utils import db
 from utils.mutepoint import MutePointSystem
+from utils.members import get_or_fetch_member
+from utils.locks import member_locks
+from utils.members import resolve_members
+from utils.ratelimit import RateLimiter
+from utils.autocomplete import PrefixIndex
+from utils.lease import is_leader
 
 MAX_TIMEOUT_DAYS = 28  # Discord API max for member.timeout
 ROLE_ON_PUNISH_ID = 1371504865905344526
+MOD_CHANNEL_ID = 771072621595983893
+BAN_VOTE_DURATION = 120  # seconds moderators get to vote
+
+MASS_ACTION_LIMIT = 100     # members per !masspunish / !massmute
+RECENT_JOIN_HISTORY = 1000  # joins remembered per guild for join-window targeting
+TIMER_POLL_INTERVAL = 30    # seconds between the lease holder's scans for timers and ban votes other replicas stored
+
+DURATION_PRESETS = ["5m", "15m", "30m", "1h", "2h", "6h", "12h", "1d", "3d", "7d", "14d", "28d"]
+
+
+def _offense_choices():
+    # category names first, then every keyword pointing at its category
+    for category, points in MutePointSystem.POINTS.items():
+        yield f"{category} ({points} MP)", category
+    for category, subcategories in MutePointSystem.OFFENSE_CATEGORIES.items():
+        for keywords in subcategories.values():
+            for keyword in keywords:
+                yield f"{keyword} → {category}", category
+
+
+OFFENSE_INDEX = PrefixIndex(_offense_choices())
+DURATION_INDEX = PrefixIndex((preset, preset) for preset in DURATION_PRESETS)
 
 class Punishments(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-
-    async def log_punishment(self, ctx, target_user, reason, mp_given, duration):
+        self.timer_tasks = {}
+        self.vote_tasks = {}
+        self.timer_poller = None
+        self.recent_joins = defaultdict(lambda: deque(maxlen=RECENT_JOIN_HISTORY))
+        # member edits share one per-guild route bucket; stay under it
+        self.rest_limiter = RateLimiter(rate=5, per=1.0, concurrency=5)
+
+    async def cog_load(self):
+        # role removals and ban votes run only on the scheduler lease holder
+        lease = getattr(self.bot, "scheduler_lease", None)
+        if lease:
+            lease.on_elected(self._take_over_timers)
+            lease.on_demoted(self._stop_timers)
+
+    async def cog_unload(self):
+        await self._stop_timers()
+
+    async def _take_over_timers(self):
+        if self.timer_poller is None or self.timer_poller.done():
+            self.timer_poller = self.bot.loop.create_task(self._poll_timers())
+
+    async def _stop_timers(self):
+        """Drop this process's timer and ban vote tasks; both stay stored for the next lease holder."""
+        if self.timer_poller:
+            self.timer_poller.cancel()
+            self.timer_poller = None
+        for task in [*self.timer_tasks.values(), *self.vote_tasks.values()]:
+            task.cancel()
+
+    async def _poll_timers(self):
+        await self.bot.wait_until_ready()
+        while True:
+            await self.on_ready()
+            await sleep(TIMER_POLL_INTERVAL)
+
+    def _forget_history(self, guild_id: int, *user_ids: int):
+        # !history caches pages for 30s; a new punishment must show up right away
+        points = self.bot.get_cog("Points")
+        if points:
+            for user_id in user_ids:
+                points.forget_history(guild_id, user_id)
+
+    async def log_punishment(self, guild, moderator, target_user, reason, mp_given, duration):
         log_channel_id = 1406574258573803661  
-        log_channel = ctx.guild.get_channel(log_channel_id)
+        log_channel = guild.get_channel(log_channel_id)
         if log_channel:
             embed = discord.Embed(
                 title="🔨 Punishment Issued",
@@ -23,77 +96,201 @@ class Punishments(commands.Cog):
                 timestamp=datetime.utcnow()
             )
             embed.add_field(name="Punished User", value=target_user.mention, inline=True)
-            embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
+            embed.add_field(name="Moderator", value=moderator.mention, inline=True)
             embed.add_field(name="Reason", value=reason, inline=False)
             embed.add_field(name="Mute Points Given", value=str(mp_given), inline=True)
             embed.add_field(name="Timeout Duration", value=MutePointSystem.format_duration(duration) if duration else "N/A", inline=True)
             await log_channel.send(embed=embed)
 
     async def trigger_ban_vote(self, ctx, member):
-        mod_channel_id = 771072621595983893  
-        mod_channel = ctx.guild.get_channel(mod_channel_id)
-        mod_roles_ping = "@୧ : ASSISTANT REFREE ᐟ⋆ @୧ :REFEREE ᐟ⋆ @୧ : CLUB DIRECTOR ᐟ⋆"
+        """Store a ban vote for `member`; the scheduler lease holder opens and closes it.
 
-        if mod_channel:
-            embed = discord.Embed(
-                title="🚨 Ban Vote Triggered",
-                description=f"{mod_roles_ping}\n{member.mention} has reached **15 MP**. Vote to ban this user.",
-                color=discord.Color.red(),
-                timestamp=datetime.utcnow()
-            )
-            message = await mod_channel.send(embed=embed)
-            await message.add_reaction("✅")  # Yes
-            await message.add_reaction("❌")  # No
-
-            def check(reaction, user):
-                return (
-                    reaction.message.id == message.id
-                    and str(reaction.emoji) in ["✅", "❌"]
-                    and not user.bot
+        Stored like role-removal timers, so it runs whichever replica handled
+        the punishment, and a new lease holder finishes a vote left open.
+        """
+        vote = {"guild_id": ctx.guild.id, "user_id": member.id, "message_id": None, "closes_at": None}
+        vote["_id"] = await db.add_ban_vote(vote)
+        self._start_ban_vote(vote)
+
+    def _start_ban_vote(self, vote: dict):
+        # stored either way; the lease holder's next poll picks it up
+        if vote["_id"] in self.vote_tasks or not is_leader(self.bot):
+            return
+        task = self.bot.loop.create_task(self._run_ban_vote(vote))
+        self.vote_tasks[vote["_id"]] = task
+        task.add_done_callback(lambda _: self.vote_tasks.pop(vote["_id"], None))
+
+    async def _run_ban_vote(self, vote: dict):
+        try:
+            guild = self.bot.get_guild(vote["guild_id"])
+            if not guild:
+                # guild moved to another cluster; leave the vote for its owner
+                return
+            mod_channel = guild.get_channel(MOD_CHANNEL_ID)
+            if not mod_channel:
+                print(f"[ERROR] ban vote for {vote['user_id']} dropped: mod channel {MOD_CHANNEL_ID} not found")
+                await db.delete_ban_vote(vote["_id"])
+                return
+            mention = f"<@{vote['user_id']}>"
+
+            if vote["message_id"] is None:
+                mod_roles_ping = "@୧ : ASSISTANT REFREE ᐟ⋆ @୧ :REFEREE ᐟ⋆ @୧ : CLUB DIRECTOR ᐟ⋆"
+                embed = discord.Embed(
+                    title="🚨 Ban Vote Triggered",
+                    description=f"{mod_roles_ping}\n{mention} has reached **15 MP**. Vote to ban this user.",
+                    color=discord.Color.red(),
+                    timestamp=datetime.utcnow()
                 )
+                message = await mod_channel.send(embed=embed)
+                await message.add_reaction("✅")  # Yes
+                await message.add_reaction("❌")  # No
+                vote["message_id"] = message.id
+                vote["closes_at"] = datetime.utcnow() + timedelta(seconds=BAN_VOTE_DURATION)
+                await db.open_ban_vote(vote["_id"], vote["message_id"], vote["closes_at"])
+
+            delay = (vote["closes_at"] - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                await sleep(delay)
+            if not is_leader(self.bot):
+                return  # still stored; the next lease holder closes it
 
-            await sleep(120)  # Wait for 2 minutes
-            message = await mod_channel.fetch_message(message.id)
+            try:
+                message = await mod_channel.fetch_message(vote["message_id"])
+            except discord.NotFound:
+                await mod_channel.send(f"⚠️ The ban vote message for {mention} was deleted; the vote is void.")
+                await db.delete_ban_vote(vote["_id"])
+                return
 
-            yes_votes = sum(1 for r in message.reactions if str(r.emoji) == "✅" for _ in await r.users().flatten() if not _.bot)
-            no_votes = sum(1 for r in message.reactions if str(r.emoji) == "❌" for _ in await r.users().flatten() if not _.bot)
+            votes = {"✅": 0, "❌": 0}
+            for reaction in message.reactions:
+                if str(reaction.emoji) in votes:
+                    votes[str(reaction.emoji)] += sum([1 async for user in reaction.users() if not user.bot])
 
-            if yes_votes > no_votes:
+            if votes["✅"] > votes["❌"]:
                 try:
-                    await member.ban(reason="Reached 15 Mute Points - Voted Ban")
-                    await mod_channel.send(f"🔨 {member.mention} has been **banned** following a successful vote.")
+                    # the member may have left; a ban by id still keeps them out
+                    member = await get_or_fetch_member(guild, vote["user_id"])
+                    if member:
+                        await member.ban(reason="Reached 15 Mute Points - Voted Ban")
+                    else:
+                        await guild.ban(discord.Object(id=vote["user_id"]), reason="Reached 15 Mute Points - Voted Ban")
+                    await mod_channel.send(f"🔨 {mention} has been **banned** following a successful vote.")
                 except discord.Forbidden:
-                    await mod_channel.send(f"❌ Failed to ban {member.mention}. Please check permissions.")
+                    await mod_channel.send(f"❌ Failed to ban {mention}. Please check permissions.")
             else:
-                await mod_channel.send(f"✅ {member.mention} has been **spared**. Vote did not pass.")
+                await mod_channel.send(f"✅ {mention} has been **spared**. Vote did not pass.")
+            await db.delete_ban_vote(vote["_id"])
+        except Exception as e:
+            print(f"[ERROR] ban vote for {vote['user_id']} failed: {e}")
 
-    async def remove_yellow_card_after_timeout(self, member: discord.Member, duration: int):
-            
-            await sleep(duration)
-            guild = member.guild
-            member = guild.get_member(member.id)
-            if not member:
-                return
+    async def schedule_role_removal(self, member: discord.Member, role: discord.Role, duration: int, reason: str, notify: bool = False):
+        """Remove `role` from `member` after `duration` seconds.
 
-            yellow_card_role = discord.utils.get(guild.roles, name="ﾒ YELLOW CARD ᵎᵎ")
-            if yellow_card_role and yellow_card_role in member.roles:
-                await member.remove_roles(yellow_card_role, reason="Timeout duration expired")
+        The timer is stored in Mongo so the process that owns the guild picks
+        it up again after a restart or when its shard moves to another cluster.
+        """
+        due_at = datetime.utcnow() + timedelta(seconds=duration)
+        timer_id = await db.add_timer(member.guild.id, member.id, role.id, due_at, reason, notify)
+        self._start_timer({
+            "_id": timer_id,
+            "guild_id": member.guild.id,
+            "user_id": member.id,
+            "role_id": role.id,
+            "due_at": due_at,
+            "reason": reason,
+            "notify": notify
+        })
+
+    async def schedule_role_removals(self, members, role: discord.Role, duration: int, reason: str):
+        """schedule_role_removal for many members with a single insert."""
+        due_at = datetime.utcnow() + timedelta(seconds=duration)
+        timers = [{
+            "guild_id": member.guild.id,
+            "user_id": member.id,
+            "role_id": role.id,
+            "due_at": due_at,
+            "reason": reason,
+            "notify": False
+        } for member in members]
+        for timer, timer_id in zip(timers, await db.add_timers(timers)):
+            timer["_id"] = timer_id
+            self._start_timer(timer)
+
+    def _start_timer(self, timer: dict):
+        # stored either way; the lease holder's next poll picks it up
+        if timer["_id"] in self.timer_tasks or not is_leader(self.bot):
+            return
+        task = self.bot.loop.create_task(self._run_timer(timer))
+        self.timer_tasks[timer["_id"]] = task
+        task.add_done_callback(lambda _: self.timer_tasks.pop(timer["_id"], None))
 
-    async def remove_role_after_timeout(self, member: discord.Member, role: discord.Role, duration: int):
-            await sleep(duration)
-            guild = member.guild
-            member = guild.get_member(member.id)
-            if not member or not role:
+    async def _run_timer(self, timer: dict):
+        try:
+            delay = (timer["due_at"] - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                await sleep(delay)
+            if not is_leader(self.bot):
+                return
+            guild = self.bot.get_guild(timer["guild_id"])
+            if not guild:
+                # guild moved to another cluster; leave the timer for its owner
                 return
-            if role in member.roles:
-                await member.remove_roles(role, reason="Punishment role duration expired")
+            member = await get_or_fetch_member(guild, timer["user_id"])
+            role = guild.get_role(timer["role_id"])
+            if member and role and role in member.roles:
+                try:
+                    await member.remove_roles(role, reason=timer["reason"])
+                except Exception:
+                    pass
+                if timer.get("notify"):
+                    try:
+                        await member.send(f"Your long mute has ended in **{guild.name}**.")
+                    except:
+                        pass
+            await db.delete_timer(timer["_id"])
+        except Exception as e:
+            print(f"[ERROR] role removal timer failed: {e}")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Resume role removals and ban votes for the guilds this process serves."""
+        if not is_leader(self.bot):
+            return
+        guild_ids = [g.id for g in self.bot.guilds]
+        try:
+            timers = await db.get_timers(guild_ids)
+            votes = await db.get_ban_votes(guild_ids)
+        except Exception as e:
+            print(f"[ERROR] could not load role removal timers and ban votes: {e}")
+            return
+        for timer in timers:
+            self._start_timer(timer)
+        for vote in votes:
+            self._start_ban_vote(vote)
+
+    @staticmethod
+    def _escalated_duration(points: int, total_points: int) -> timedelta:
+        """Base duration for this offense, raised to the MP threshold the new total crosses."""
+        # Get base duration for this offense
+        base_duration = MutePointSystem.DURATIONS[points]
+
+        if total_points > points:
+            if total_points >= 10:
+                return max(base_duration, MutePointSystem.MP_THRESHOLDS[10])
+            elif total_points >= 8:
+                return max(base_duration, MutePointSystem.MP_THRESHOLDS[8])
+            elif total_points >= 5:
+                return max(base_duration, MutePointSystem.MP_THRESHOLDS[5])
+        return base_duration
 
     def get_punish_role(self, guild: discord.Guild):
             return guild.get_role(ROLE_ON_PUNISH_ID)
 
-    @commands.command()
+    @commands.hybrid_command()
     @commands.has_permissions(manage_messages=True)
-    async def punish(self, ctx, member: discord.Member, *, reason):
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.describe(member="Member to punish", reason="Offense category")
+    async def punish(self, ctx, member: discord.Member, *, reason: str):
         """Punish a user based on the offense reason."""
         # wrap whole command in try/except so a crash never leaves the mod
         # waiting in silence
@@ -102,128 +299,141 @@ class Punishments(commands.Cog):
                 await ctx.send("❌ You cannot punish yourself.")
                 return
 
-            total_points = await db.check_expired_points(ctx.guild.id, member.id)
+            # slash invocations must be acknowledged within 3s; DB work can take longer
+            await ctx.defer()
 
-            valid_reasons = list(MutePointSystem.POINTS.keys())
-            reason = reason.lower().strip()
+            # two mods punishing the same member at once must not interleave
+            async with member_locks((ctx.guild.id, member.id)):
+                await self._apply_punishment(ctx, member, reason)
 
-            if reason not in valid_reasons:
-                await ctx.send(f"❌ Invalid reason. Use one of: {', '.join(valid_reasons)}.")
-                return
+        except Exception as e:
+            # log for bot owner and inform mods
+            print(f"[ERROR] punish command crashed for guild {ctx.guild.id} user {member.id}: {e}")
+            await ctx.send("❌ An internal error occurred while processing the punishment.")
 
-            if reason == "advisory":
-                warning_count = await db.get_warning_count(ctx.guild.id, member.id)
-                warning_count, should_mute = await db.add_warning(ctx.guild.id, member.id, ctx.author.id, reason)
+    async def _apply_punishment(self, ctx, member: discord.Member, reason: str):
+        total_points = await db.check_expired_points(ctx.guild.id, member.id)
 
-                if warning_count == 1:
-                    await ctx.send(f"⚠️ **Warning #{warning_count}** issued to {member.mention}")
-                    duration = None
-                elif warning_count == 2:
-                    duration = MutePointSystem.DURATIONS[0]
-                    try:
-                        await member.timeout(duration, reason="Second advisory warning")
-                        await ctx.send(f"⏳ {member.mention} has been muted for **5 minutes** (Warning #{warning_count})")
-                        punish_role = self.get_punish_role(ctx.guild)
-                        if punish_role:
-                            await member.add_roles(punish_role, reason="Punish role assigned")
-                            self.bot.loop.create_task(
-                                self.remove_role_after_timeout(
-                                    member,
-                                    punish_role,
-                                    int(duration.total_seconds())
-                                )
-                            )
-                    except discord.Forbidden:
-                        await ctx.send("❌ I don't have permission to mute this user.")
-                else:
-                    points = 1
-                    total_points = await db.add_punishment(ctx.guild.id, member.id, "advisory_conversion", points)
-                    duration = MutePointSystem.DURATIONS[1]  # 15 minutes
-                    punish_role = self.get_punish_role(ctx.guild)
-                    if punish_role:
-                        await member.add_roles(punish_role, reason="Punish role assigned")
-                        self.bot.loop.create_task(
-                            self.remove_role_after_timeout(
-                                member,
-                                punish_role,
-                                int(duration.total_seconds())
-                            )
-                        )
-                    await member.timeout(duration, reason="Third advisory warning converted to MP")
-                    await ctx.send(f"⚠️ {member.mention} has received **1 MP** after 3 warnings")
-                    await db.clear_warnings(ctx.guild.id, member.id)
+        valid_reasons = list(MutePointSystem.POINTS.keys())
+        reason = reason.lower().strip()
 
-                await self.log_punishment(ctx, member, f"Advisory Warning #{warning_count}", 0, duration)
-                return
+        if reason not in valid_reasons:
+            await ctx.send(f"❌ Invalid reason. Use one of: {', '.join(valid_reasons)}.")
+            return
 
-            # Handle regular punishments
-            points = MutePointSystem.POINTS[reason]
-            total_points = await db.add_punishment(ctx.guild.id, member.id, reason, points)
+        if reason == "advisory":
+            warning_count = await self.issue_warning(ctx.guild, ctx.channel, ctx.author, member, reason, send=ctx.send)
+            if warning_count == 1:
+                await ctx.send(f"⚠️ **Warning #{warning_count}** issued to {member.mention}")
+            return
 
-            # Check MP thresholds first
-            if total_points >= 15:
-                await ctx.send(f"🚨 **Ban vote triggered for {member.mention}** (15 MP reached).")
-                await self.trigger_ban_vote(ctx, member)
-                return
-            
-            # Get base duration for this offense
-            base_duration = MutePointSystem.DURATIONS[points]
+        # Handle regular punishments
+        points = MutePointSystem.POINTS[reason]
+        total_points = await db.add_punishment(ctx.guild.id, member.id, reason, points)
+        queued = total_points is db.QUEUED
+        if queued:
+            # the database is down and the total unknown: escalate on this offense alone
+            total_points = points
+            await ctx.send(f"⚠️ Database unavailable: the {points} MP for {member.mention} are queued and will be recorded once it is back.")
+        self._forget_history(ctx.guild.id, member.id)
+        await db.record_daily_stat(ctx.guild.id, reason, ctx.author.id, ctx.channel.id)
+
+        # Check MP thresholds first
+        if total_points >= 15:
+            await ctx.send(f"🚨 **Ban vote triggered for {member.mention}** (15 MP reached).")
+            # only stores the vote; it runs in the background on the lease holder
+            await self.trigger_ban_vote(ctx, member)
+            return
             
-            if total_points > points:
-                if total_points >= 10:
-                    duration = max(base_duration, MutePointSystem.MP_THRESHOLDS[10])
-                elif total_points >= 8:
-                    duration = max(base_duration, MutePointSystem.MP_THRESHOLDS[8])
-                elif total_points >= 5:
-                    duration = max(base_duration, MutePointSystem.MP_THRESHOLDS[5])
-                else:
-                    duration = base_duration
-            else:
-                duration = base_duration
-
-            punish_role = self.get_punish_role(ctx.guild)
+        duration = self._escalated_duration(points, total_points)
 
-            try:
-                await member.timeout(duration, reason=f"Punished for: {reason}")
-                await ctx.send(f"⏳ {member.mention} has been muted for **{MutePointSystem.format_duration(duration)}**.")
+        punish_role = self.get_punish_role(ctx.guild)
 
-                if punish_role:
-                    await member.add_roles(punish_role, reason="Punish role assigned")
-                    self.bot.loop.create_task(
-                        self.remove_role_after_timeout(
-                            member,
-                            punish_role,
-                            int(duration.total_seconds())
-                        )
-                    )
-            except discord.Forbidden:
-                await ctx.send("❌ I don't have permission to mute or assign roles to this user.")
-            except Exception as e:
-                await ctx.send(f"⚠️ Failed to mute or assign role: {e}")
+        try:
+            await member.timeout(duration, reason=f"Punished for: {reason}")
+            await ctx.send(f"⏳ {member.mention} has been muted for **{MutePointSystem.format_duration(duration)}**.")
 
-            # Send DM
-            try:
-                await member.send(
-                    f"You have been punished in **{ctx.guild.name}** for **{reason}**.\n"
-                    f"Points added: **{points} MP**\n"
-                    f"Total mute points: **{total_points} MP**\n"
-                    f"Mute duration: **{MutePointSystem.format_duration(duration)}**"
-                )
-            except:
-                await ctx.send(f"⚠️ Could not send DM to {member.mention}.")
+            if punish_role:
+                await member.add_roles(punish_role, reason="Punish role assigned")
+                await self.schedule_role_removal(member, punish_role, int(duration.total_seconds()), "Punishment role duration expired")
+        except discord.Forbidden:
+            await ctx.send("❌ I don't have permission to mute or assign roles to this user.")
+        except Exception as e:
+            await ctx.send(f"⚠️ Failed to mute or assign role: {e}")
 
-            # Log the punishment
-            await self.log_punishment(ctx, member, reason, points, duration)
+        # Send DM
+        try:
+            await member.send(
+                f"You have been punished in **{ctx.guild.name}** for **{reason}**.\n"
+                f"Points added: **{points} MP**\n"
+                f"Total mute points: **{'pending' if queued else f'{total_points} MP'}**\n"
+                f"Mute duration: **{MutePointSystem.format_duration(duration)}**"
+            )
+        except:
+            await ctx.send(f"⚠️ Could not send DM to {member.mention}.")
 
-        except Exception as e:
-            # log for bot owner and inform mods
-            print(f"[ERROR] punish command crashed for guild {ctx.guild.id} user {member.id}: {e}")
-            await ctx.send("❌ An internal error occurred while processing the punishment.")
+        # Log the punishment
+        await self.log_punishment(ctx.guild, ctx.author, member, reason, points, duration)
 
-    @commands.command(name="release")
+    async def issue_warning(self, guild, channel, moderator, member: discord.Member, reason: str, send=None) -> int:
+        """
+        Record an advisory warning and escalate it: the second one mutes for
+        5 minutes, the third converts to 1 MP with a 15-minute mute. Shared by
+        !punish and the spam detector's automatic warnings; the caller holds the
+        member lock and announces a first warning itself. Returns the warning count,
+        or db.QUEUED when the database is down and the warning could only be queued.
+        """
+        send = send or channel.send
+        result = await db.add_warning(guild.id, member.id, moderator.id, reason)
+        if result is db.QUEUED:
+            # without the count there is nothing to escalate on
+            await send(f"⚠️ Database unavailable: the warning for {member.mention} is queued and will not escalate until it is recorded.")
+            await db.record_daily_stat(guild.id, "advisory", moderator.id, channel.id)
+            await self.log_punishment(guild, moderator, member, "Advisory Warning (queued)", 0, None)
+            return db.QUEUED
+        warning_count, should_mute = result
+
+        if warning_count == 1:
+            duration = None
+        elif warning_count == 2:
+            duration = MutePointSystem.DURATIONS[0]
+            try:
+                await member.timeout(duration, reason="Second advisory warning")
+                await send(f"⏳ {member.mention} has been muted for **5 minutes** (Warning #{warning_count})")
+                punish_role = self.get_punish_role(guild)
+                if punish_role:
+                    await member.add_roles(punish_role, reason="Punish role assigned")
+                    await self.schedule_role_removal(member, punish_role, int(duration.total_seconds()), "Punishment role duration expired")
+            except discord.Forbidden:
+                await send("❌ I don't have permission to mute this user.")
+        else:
+            points = 1
+            await db.add_punishment(guild.id, member.id, "advisory_conversion", points)
+            self._forget_history(guild.id, member.id)
+            duration = MutePointSystem.DURATIONS[1]  # 15 minutes
+            punish_role = self.get_punish_role(guild)
+            if punish_role:
+                await member.add_roles(punish_role, reason="Punish role assigned")
+                await self.schedule_role_removal(member, punish_role, int(duration.total_seconds()), "Punishment role duration expired")
+            await member.timeout(duration, reason="Third advisory warning converted to MP")
+            await send(f"⚠️ {member.mention} has received **1 MP** after 3 warnings")
+            await db.clear_warnings(guild.id, member.id)
+
+        await db.record_daily_stat(guild.id, "advisory", moderator.id, channel.id)
+        await self.log_punishment(guild, moderator, member, f"Advisory Warning #{warning_count}", 0, duration)
+        return warning_count
+
+    @punish.autocomplete("reason")
+    async def punish_reason_autocomplete(self, interaction: discord.Interaction, current: str):
+        return OFFENSE_INDEX.lookup(current)
+
+    @commands.hybrid_command(name="release")
     @commands.has_permissions(manage_messages=True)
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.describe(member="Member to unmute")
     async def release(self, ctx, member: discord.Member):
         """Release a user from timeout and remove the 'Yellow Card' role and long-mute role if present."""
+        await ctx.defer()
         yellow_card_role = discord.utils.get(ctx.guild.roles, name="ﾒ YELLOW CARD ᵎᎎ")
         long_muted_role = discord.utils.get(ctx.guild.roles, name="Muted (Long)")
         punish_role = ctx.guild.get_role(ROLE_ON_PUNISH_ID)
@@ -323,31 +533,10 @@ class Punishments(commands.Cog):
             embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
             await log_channel.send(embed=embed)
 
-    async def _long_mute_scheduler(self, guild_id: int, user_id: int, role_id: int, seconds: int):
-        """Background task to remove role-based long mutes. Not persistent across restarts."""
-        try:
-            await asyncio.sleep(seconds)
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                return
-            member = guild.get_member(user_id)
-            role = guild.get_role(role_id)
-            if member and role and role in member.roles:
-                try:
-                    await member.remove_roles(role, reason="Long mute expired")
-                except Exception:
-                    pass
-                # optional notify channel/DM
-                try:
-                    await member.send(f"Your long mute has ended in **{guild.name}**.")
-                except:
-                    pass
-            # If you persist long-mutes in DB, remove entry here.
-        except Exception as e:
-            print(f"[ERROR] long mute scheduler failed: {e}")
-
-    @commands.command(name="sybau")
+    @commands.hybrid_command(name="sybau")
     @commands.has_permissions(manage_messages=True)
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.describe(member="Member to mute", duration="e.g. 1d, 2h30m, 45m", reason="Shown in the log")
     async def mute(self, ctx, member: discord.Member, duration: str, *, reason: str = "Muted by staff"):
         """Temporarily mute a member. Examples: 1d, 2h30m, 45m, 90s, 1:30 (hh:mm).
         Uses Discord timeout for <=28 days; for longer durations assigns a 'Muted (Long)' role.
@@ -364,46 +553,218 @@ class Punishments(commands.Cog):
         max_td = timedelta(days=MAX_TIMEOUT_DAYS)
         yellow_card_role = discord.utils.get(ctx.guild.roles, name="ﾒ YELLOW CARD ᵎᵎ")
 
-        try:
-            if td <= max_td:
-                # Use Discord native timeout
-                await member.timeout(td, reason=reason)
-                if yellow_card_role:
-                    try:
-                        await member.add_roles(yellow_card_role, reason="Mute issued by bot")
-                    except discord.Forbidden:
-                        pass
-                    self.bot.loop.create_task(
-                        self.remove_yellow_card_after_timeout(member, int(td.total_seconds()))
-                    )
-                await ctx.send(f"⏳ {member.mention} muted for **{MutePointSystem.format_duration(td)}** (Discord timeout). Reason: {reason}")
-            else:
-                # Fallback to role-based long mute
-                role_name = "Muted (Long)"
-                guild = ctx.guild
-                muted_role = discord.utils.get(guild.roles, name=role_name)
-                if not muted_role:
-                    # Create role and set basic channel overwrites (requires manage_roles & manage_channels)
-                    muted_role = await guild.create_role(name=role_name, reason="Role for long mutes")
-                    for ch in guild.channels:
+        await ctx.defer()
+        async with member_locks((ctx.guild.id, member.id)):
+            try:
+                if td <= max_td:
+                    # Use Discord native timeout
+                    await member.timeout(td, reason=reason)
+                    if yellow_card_role:
                         try:
-                            await ch.set_permissions(muted_role, send_messages=False, speak=False, add_reactions=False)
-                        except Exception:
+                            await member.add_roles(yellow_card_role, reason="Mute issued by bot")
+                        except discord.Forbidden:
                             pass
+                        await self.schedule_role_removal(member, yellow_card_role, int(td.total_seconds()), "Timeout duration expired")
+                    await ctx.send(f"⏳ {member.mention} muted for **{MutePointSystem.format_duration(td)}** (Discord timeout). Reason: {reason}")
+                else:
+                    # Fallback to role-based long mute
+                    role_name = "Muted (Long)"
+                    guild = ctx.guild
+                    muted_role = discord.utils.get(guild.roles, name=role_name)
+                    if not muted_role:
+                        # Create role and set basic channel overwrites (requires manage_roles & manage_channels)
+                        muted_role = await guild.create_role(name=role_name, reason="Role for long mutes")
+                        for ch in guild.channels:
+                            try:
+                                await ch.set_permissions(muted_role, send_messages=False, speak=False, add_reactions=False)
+                            except Exception:
+                                pass
+
+                    await member.add_roles(muted_role, reason=f"Long mute: {duration} by {ctx.author}")
+                    await ctx.send(f"🔇 {member.mention} muted for **{MutePointSystem.format_duration(td)}** using role `{role_name}`. Reason: {reason}")
+
+                    # persisted, so the removal survives restarts and shard moves
+                    await self.schedule_role_removal(member, muted_role, int(td.total_seconds()), "Long mute expired", notify=True)
+
+                # Log (manual mute gives 0 MP)
+                await db.record_daily_stat(ctx.guild.id, "mute", ctx.author.id, ctx.channel.id)
+                await self.log_punishment(ctx.guild, ctx.author, member, reason, 0, td)
+            except discord.Forbidden:
+                await ctx.send("❌ I don't have permission to mute this user or manage roles.")
+            except Exception as e:
+                await ctx.send(f"⚠️ Failed to mute: {e}")
+
+    @mute.autocomplete("duration")
+    async def mute_duration_autocomplete(self, interaction: discord.Interaction, current: str):
+        return DURATION_INDEX.lookup(current)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.recent_joins[member.guild.id].append((member.id, member.joined_at or discord.utils.utcnow()))
+
+    async def _mass_targets(self, ctx, members, joined_within: Optional[str]) -> Optional[List[discord.Member]]:
+        """Explicit members plus everyone who joined inside the window; None if the input was bad."""
+        targets = {m.id: m for m in members}
+        if joined_within:
+            window = self._parse_duration(joined_within)
+            if not window:
+                await ctx.send("❌ Invalid join window. Examples: `10m`, `1h`.")
+                return None
+            cutoff = discord.utils.utcnow() - window
+            recent = {uid for uid, joined_at in self.recent_joins[ctx.guild.id] if joined_at >= cutoff}
+            recent.update(m.id for m in ctx.guild.members if m.joined_at and m.joined_at >= cutoff)
+            targets.update(await resolve_members(ctx.guild, [uid for uid in recent if uid not in targets]))
+
+        # never sweep up the moderator, the bot or other staff
+        targets = [
+            m for m in targets.values()
+            if m.id not in (ctx.author.id, self.bot.user.id) and not m.guild_permissions.manage_messages
+        ]
+        if not targets:
+            await ctx.send("❌ No members matched.")
+            return None
+        if len(targets) > MASS_ACTION_LIMIT:
+            await ctx.send(f"❌ {len(targets)} members matched; the limit is {MASS_ACTION_LIMIT} per command.")
+            return None
+        return targets
 
-                await member.add_roles(muted_role, reason=f"Long mute: {duration} by {ctx.author}")
-                await ctx.send(f"🔇 {member.mention} muted for **{MutePointSystem.format_duration(td)}** using role `{role_name}`. Reason: {reason}")
+    @staticmethod
+    @asynccontextmanager
+    async def _lock_members(guild_id: int, members):
+        """Hold every member's lock, as the single-member commands do for one."""
+        async with AsyncExitStack() as stack:
+            # sorted so concurrent mass actions can't deadlock on each other
+            for member in sorted(members, key=lambda m: m.id):
+                await stack.enter_async_context(member_locks((guild_id, member.id)))
+            yield
+
+    async def _timeout_member(self, member: discord.Member, duration: timedelta, reason: str, role: Optional[discord.Role]) -> bool:
+        """Timeout and (optionally) add a role, each call under the shared limiter."""
+        try:
+            async with self.rest_limiter:
+                await member.timeout(duration, reason=reason)
+            # add_roles touches only this role; a full role list from member.edit
+            # would overwrite changes made since the member was cached
+            if role and role not in member.roles:
+                async with self.rest_limiter:
+                    await member.add_roles(role, reason=reason)
+            return True
+        except discord.HTTPException as e:
+            print(f"[ERROR] mass action failed for {member.id}: {e}")
+            return False
+
+    async def log_mass_action(self, ctx, title: str, reason: str, applied, failed, extra: Optional[str] = None):
+        """Post one summary log entry for a whole mass action."""
+        log_channel_id = 1406574258573803661
+        log_channel = ctx.guild.get_channel(log_channel_id)
+        if not log_channel:
+            return
+        embed = discord.Embed(title=title, color=discord.Color.orange(), timestamp=datetime.utcnow())
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
+        embed.add_field(name="Reason", value=reason, inline=True)
+        embed.add_field(name="Applied", value=str(len(applied)), inline=True)
+        mentions = " ".join(m.mention for m in applied)
+        embed.add_field(name="Members", value=(mentions[:1020] + " …") if len(mentions) > 1024 else (mentions or "None"), inline=False)
+        if failed:
+            embed.add_field(name="Failed", value=" ".join(m.mention for m in failed)[:1024], inline=False)
+        if extra:
+            embed.add_field(name="Notes", value=extra, inline=False)
+        await log_channel.send(embed=embed)
+
+    @commands.command(name="masspunish")
+    @commands.has_permissions(manage_messages=True)
+    async def masspunish(self, ctx, reason: str, members: commands.Greedy[discord.Member], joined_within: Optional[str] = None):
+        """Punish many members at once. Usage: !masspunish <category> @a @b ... [joined-within, e.g. 10m]"""
+        reason = reason.lower().strip()
+        valid_reasons = [r for r in MutePointSystem.POINTS if r != "advisory"]
+        if reason not in valid_reasons:
+            await ctx.send(f"❌ Invalid reason. Use one of: {', '.join(valid_reasons)}.")
+            return
 
-                # schedule removal (in-memory). For persistence, save end timestamp to DB and re-schedule on startup.
-                seconds = int(td.total_seconds())
-                self.bot.loop.create_task(self._long_mute_scheduler(ctx.guild.id, member.id, muted_role.id, seconds))
+        targets = await self._mass_targets(ctx, members, joined_within)
+        if not targets:
+            return
 
-            # Log (manual mute gives 0 MP)
-            await self.log_punishment(ctx, member, reason, 0, td)
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to mute this user or manage roles.")
+        points = MutePointSystem.POINTS[reason]
+        try:
+            async with self._lock_members(ctx.guild.id, targets):
+                async with ctx.typing():
+                    totals = await db.bulk_add_punishments(ctx.guild.id, [m.id for m in targets], reason, points)
+                    queued = totals is db.QUEUED
+                    if queued:
+                        # the database is down and the totals unknown: escalate on this offense alone
+                        totals = {m.id: points for m in targets}
+                    self._forget_history(ctx.guild.id, *(m.id for m in targets))
+                    await db.record_daily_stat(ctx.guild.id, reason, ctx.author.id, ctx.channel.id, count=len(targets))
+
+                    ban_votes = [m for m in targets if totals.get(m.id, 0) >= 15]
+                    to_mute = [m for m in targets if totals.get(m.id, 0) < 15]
+                    punish_role = self.get_punish_role(ctx.guild)
+                    results = await asyncio.gather(*(
+                        self._timeout_member(
+                            m, self._escalated_duration(points, totals.get(m.id, points)),
+                            f"Mass punishment: {reason}", punish_role
+                        )
+                        for m in to_mute
+                    ))
+                    applied = [m for m, ok in zip(to_mute, results) if ok]
+                    failed = [m for m, ok in zip(to_mute, results) if not ok]
+
+                    if punish_role and applied:
+                        # role removals are grouped by duration so each group is one insert
+                        by_duration = defaultdict(list)
+                        for m in applied:
+                            by_duration[self._escalated_duration(points, totals.get(m.id, points))].append(m)
+                        for duration, group in by_duration.items():
+                            await self.schedule_role_removals(group, punish_role, int(duration.total_seconds()), "Punishment role duration expired")
+
+            for member in ban_votes:
+                await self.trigger_ban_vote(ctx, member)
+
+            await ctx.send(
+                f"🔨 Punished **{len(applied)}** members for **{reason}** ({points} MP each)."
+                + (f" ⚠️ {len(failed)} failed." if failed else "")
+                + (f" 🚨 {len(ban_votes)} reached 15 MP, ban votes started." if ban_votes else "")
+                + (" ⚠️ Database unavailable: the points are queued and will be recorded once it is back." if queued else "")
+            )
+            await self.log_mass_action(
+                ctx, "🔨 Mass Punishment Issued", f"{reason} ({points} MP)", applied + ban_votes, failed,
+                f"Ban votes: {' '.join(m.mention for m in ban_votes)}" if ban_votes else None
+            )
+        except Exception as e:
+            print(f"[ERROR] masspunish crashed for guild {ctx.guild.id}: {e}")
+            await ctx.send("❌ An internal error occurred while processing the mass punishment.")
+
+    @commands.command(name="massmute")
+    @commands.has_permissions(manage_messages=True)
+    async def massmute(self, ctx, duration: str, members: commands.Greedy[discord.Member], joined_within: Optional[str] = None):
+        """Timeout many members without MP. Usage: !massmute <duration> @a @b ... [joined-within, e.g. 10m]"""
+        td = self._parse_duration(duration)
+        if not td or td.total_seconds() <= 0 or td > timedelta(days=MAX_TIMEOUT_DAYS):
+            await ctx.send(f"❌ Invalid duration. Examples: `1d`, `2h30m`, `45m` (max {MAX_TIMEOUT_DAYS}d).")
+            return
+
+        targets = await self._mass_targets(ctx, members, joined_within)
+        if not targets:
+            return
+
+        try:
+            async with self._lock_members(ctx.guild.id, targets), ctx.typing():
+                results = await asyncio.gather(*(
+                    self._timeout_member(m, td, "Mass mute", None) for m in targets
+                ))
+                applied = [m for m, ok in zip(targets, results) if ok]
+                failed = [m for m, ok in zip(targets, results) if not ok]
+                await db.record_daily_stat(ctx.guild.id, "mute", ctx.author.id, ctx.channel.id, count=len(applied))
+
+            await ctx.send(
+                f"⏳ Muted **{len(applied)}** members for **{MutePointSystem.format_duration(td)}**."
+                + (f" ⚠️ {len(failed)} failed." if failed else "")
+            )
+            await self.log_mass_action(ctx, "⏳ Mass Mute Issued", MutePointSystem.format_duration(td), applied, failed)
         except Exception as e:
-            await ctx.send(f"⚠️ Failed to mute: {e}")
+            print(f"[ERROR] massmute crashed for guild {ctx.guild.id}: {e}")
+            await ctx.send("❌ An internal error occurred while processing the mass mute.")
 
 async def setup(bot):
     await bot.add_cog(Punishments(bot))
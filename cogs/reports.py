@@ -1,18 +1,30 @@
 import discord
 from discord.ext import commands
 import asyncio
+from utils import db
+from utils.members import get_or_fetch_member
+from utils.locks import member_locks
+from utils.spam import SpamDetector
+from utils.raid import RaidDetector
+from utils.evidence import EvidenceStore
+from utils.cache import TTLCache
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.reactions = True
-intents.guilds = True
-intents.members = True
-
-bot = commands.Bot(command_prefix="!", intents=intents)
+LOG_CHANNEL_ID = 1406574258573803661
+REPORT_TIMEOUT = 60.0
 
 class ReportSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.spam = SpamDetector()
+        self.raid = RaidDetector()
+        self.evidence = EvidenceStore()
+        self._captured = TTLCache(ttl=3600, maxsize=1024)
+
+    async def cog_load(self):
+        await self.evidence.start()
+
+    async def cog_unload(self):
+        await self.evidence.stop()
 
     async def _process_report(self, user, message, channel, guild):
         # Don't allow reporting your own messages
@@ -27,6 +39,15 @@ class ReportSystem(commands.Cog):
         if message.author.bot:
             return
 
+        # every replica sees the reaction or mention; one of them runs the report
+        if not await db.claim_event("report", message.id, user.id):
+            return
+
+        # capture now: the message may be deleted before the reporter replies
+        if self._captured.get(message.id) is None:
+            self._captured.set(message.id, True)
+            self.evidence.submit(message)
+
         try:
             # Create DM channel and send prompt
             await user.send(
@@ -35,49 +56,26 @@ class ReportSystem(commands.Cog):
                 f"**Message content:**\n"
                 f">>> {message.content[:1000] if message.content else '*[No text content]*'}\n\n"
                 f"**Please reply with your reason for reporting this message.**\n"
-                f"*You have 60 seconds to respond.*"
+                f"*You have {int(REPORT_TIMEOUT)} seconds to respond.*"
             )
 
             print(f"[DEBUG] DM sent to {user.display_name}. Waiting for response...")
 
-            # Wait for DM response
-            def check(m):
-                return (
-                    m.author.id == user.id and 
-                    isinstance(m.channel, discord.DMChannel) and 
-                    len(m.content.strip()) > 0  # Ensure they actually typed something
-                )
+            # The reply is picked up by on_message on whichever process receives
+            # DMs, which is not necessarily the one that owns this guild's shard.
+            report_id = await db.add_pending_report({
+                "reporter_id": user.id,
+                "guild_id": guild.id,
+                "channel_id": channel.id,
+                "message_id": message.id,
+                "author_id": message.author.id,
+                "content": message.content[:1024] if message.content else None,
+                "attachments": len(message.attachments),
+                "jump_url": message.jump_url
+            }, REPORT_TIMEOUT)
 
-            try:
-                response = await self.bot.wait_for('message', check=check, timeout=60.0)
-                print(f"[DEBUG] Received response: {response.content[:50]}...")
-
-                log_channel_id = 1406574258573803661
-                log_channel = guild.get_channel(log_channel_id)
-                
-                if log_channel:
-                    embed = discord.Embed(
-                        title="🚨 Message Reported",
-                        color=discord.Color.red(),
-                        timestamp=discord.utils.utcnow()
-                    )
-                    embed.add_field(name="Reported by", value=f"{user.mention} ({user.id})", inline=True)
-                    embed.add_field(name="Message author", value=f"{message.author.mention} ({message.author.id})", inline=True)
-                    embed.add_field(name="Channel", value=f"{channel.mention}", inline=True)
-                    embed.add_field(name="Message content", value=message.content[:1024] if message.content else "*[No text content]*", inline=False)
-                    embed.add_field(name="Report reason", value=response.content[:1024], inline=False)
-                    embed.add_field(name="Message link", value=f"[Jump to message]({message.jump_url})", inline=False)
-
-                    await log_channel.send(embed=embed)
-                    print("[DEBUG] Report successfully logged with embed.")
-                else:
-                    print(f"[ERROR] Log channel with ID {log_channel_id} not found.")
-
-                # Send confirmation
-                await user.send("✅ **Thank you for your report!**\nOur moderation team will review it shortly.")
-                print(f"[DEBUG] Report completed for {user.display_name}")
-
-            except asyncio.TimeoutError:
+            await asyncio.sleep(REPORT_TIMEOUT)
+            if await db.expire_pending_report(report_id):
                 await user.send("⏰ **Report timed out.**\nYou took too long to respond. Please try again if needed.")
                 print(f"[DEBUG] Report timed out for {user.display_name}")
 
@@ -99,6 +97,152 @@ class ReportSystem(commands.Cog):
             except:
                 pass
 
+    async def _get_log_channel(self):
+        log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
+        if not log_channel:
+            # the log channel's guild may be served by another cluster
+            try:
+                log_channel = await self.bot.fetch_channel(LOG_CHANNEL_ID)
+            except (discord.NotFound, discord.Forbidden):
+                log_channel = None
+        return log_channel
+
+    async def _complete_report(self, response):
+        """Log a pending report once the reporter has replied with a reason."""
+        report = await db.pop_pending_report(response.author.id)
+        if not report:
+            return
+        print(f"[DEBUG] Received response: {response.content[:50]}...")
+        reason = response.content[:1024]
+
+        # the report is already popped: post it before anything that can fail on the database
+        try:
+            await self._log_report(report, reason)
+        finally:
+            try:
+                await db.add_report(
+                    report["guild_id"], report["author_id"], report["reporter_id"],
+                    report["channel_id"], report["message_id"], report.get("content"), reason
+                )
+            except Exception as e:
+                print(f"[ERROR] report on message {report['message_id']} was logged but not stored: {e}")
+
+        # Send confirmation
+        await response.author.send("✅ **Thank you for your report!**\nOur moderation team will review it shortly.")
+        print(f"[DEBUG] Report completed for {response.author.display_name}")
+
+    async def _log_report(self, report, reason: str):
+        log_channel = await self._get_log_channel()
+        if log_channel:
+            embed = discord.Embed(
+                title="🚨 Message Reported",
+                color=discord.Color.red(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed.add_field(name="Reported by", value=f"<@{report['reporter_id']}> ({report['reporter_id']})", inline=True)
+            embed.add_field(name="Message author", value=f"<@{report['author_id']}> ({report['author_id']})", inline=True)
+            embed.add_field(name="Channel", value=f"<#{report['channel_id']}>", inline=True)
+            embed.add_field(name="Message content", value=report.get("content") or "*[No text content]*", inline=False)
+            embed.add_field(name="Report reason", value=reason, inline=False)
+            if report.get("attachments"):
+                embed.add_field(name="Evidence", value=f"{report['attachments']} attachment(s) captured to the evidence store", inline=False)
+            embed.add_field(name="Message link", value=f"[Jump to message]({report['jump_url']})", inline=False)
+
+            await log_channel.send(embed=embed)
+            print("[DEBUG] Report successfully logged with embed.")
+        else:
+            print(f"[ERROR] Log channel with ID {LOG_CHANNEL_ID} not found.")
+
+    async def _auto_warn(self, message, offense: str):
+        """Turn a spam detection into an advisory warning issued by the bot."""
+        member = message.author
+        if isinstance(member, discord.Member) and member.guild_permissions.manage_messages:
+            return
+        punishments = self.bot.get_cog("Punishments")
+        if punishments is None:
+            return
+        # each replica's detector flags the same message; only one may warn for it
+        if not await db.claim_event("auto-warn", message.id):
+            return
+
+        async def send(content):
+            await message.channel.send(content, delete_after=15)
+
+        try:
+            # same escalation as !punish advisory: mute on the 2nd, 1 MP on the 3rd
+            async with member_locks((message.guild.id, member.id)):
+                warning_count = await punishments.issue_warning(
+                    message.guild, message.channel, self.bot.user, member, f"auto: {offense}", send=send
+                )
+            if warning_count == 1:
+                await send(f"⚠️ {member.mention} automatic advisory warning for **{offense}** (warning #{warning_count}).")
+            print(f"[DEBUG] Auto-warned {member.id} in guild {message.guild.id} for {offense}")
+        except Exception as e:
+            print(f"[ERROR] auto-moderation warning failed: {e}")
+
+    @staticmethod
+    def _fit_field(items, template: str = "{}", limit: int = 1024) -> str:
+        """Join as many whole items as fit in one embed field and say how many were left out."""
+        value = template.format(" ".join(items))
+        if len(value) <= limit:
+            return value
+        room = limit - len(template.format("")) - len(f"\n+{len(items)} more not listed")
+        shown = 0
+        for item in items:
+            room -= len(item) + 1
+            if room < 0:
+                break
+            shown += 1
+        return template.format(" ".join(items[:shown])) + f"\n+{len(items) - shown} more not listed"
+
+    async def _raid_alert(self, guild, cluster):
+        """Hand a duplicate-content cluster to moderators as one alert."""
+        log_channel = await self._get_log_channel()
+        if not log_channel:
+            print(f"[ERROR] Raid cluster in guild {guild.id} but log channel {LOG_CHANNEL_ID} not found.")
+            return
+
+        author_ids = list(cluster.authors)
+        channels = sorted({channel_id for channel_id, _ in cluster.authors.values()})
+        embed = discord.Embed(
+            title="🚨 Possible Raid: Duplicate Messages",
+            description=f"**{len(author_ids)}** different accounts posted near-identical messages.",
+            color=discord.Color.dark_red(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(name="Sample", value=f">>> {cluster.sample[:1000]}", inline=False)
+        embed.add_field(name="Channels", value=self._fit_field([f"<#{c}>" for c in channels]), inline=False)
+        embed.add_field(name="Accounts", value=self._fit_field([f"<@{a}>" for a in author_ids]), inline=False)
+        # whole IDs only, so the command still parses when pasted
+        embed.add_field(
+            name="Respond",
+            value=self._fit_field([str(a) for a in author_ids], "```!massmute 1h {}```"),
+            inline=False
+        )
+        await log_channel.send(embed=embed)
+        print(f"[DEBUG] Raid cluster of {len(author_ids)} authors flagged in guild {guild.id}")
+
+    @commands.command(name="reports")
+    @commands.has_permissions(manage_messages=True)
+    async def reports(self, ctx, user: discord.User):
+        """Show how often a user has been reported and the latest reports"""
+        count, recent = await db.get_reports(ctx.guild.id, user.id)
+
+        embed = discord.Embed(
+            title=f"Reports for {user.display_name}",
+            description=f"**{count}** report(s) in the last {db.REPORT_RETENTION_DAYS} days.",
+            color=discord.Color.red(),
+            timestamp=ctx.message.created_at
+        )
+        lines = []
+        for r in recent:
+            timestamp = int(r['created_at'].timestamp())
+            link = f"https://discord.com/channels/{r['guild_id']}/{r['channel_id']}/{r['message_id']}"
+            lines.append(f"• <t:{timestamp}:R> by <@{r['reporter_id']}>: {r['reason'][:80]} ([message]({link}))")
+        embed.add_field(name="📝 Latest Reports", value="\n".join(lines)[:1024] or "None", inline=False)
+
+        await ctx.send(embed=embed)
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         # Check if it's the SOS emoji (🆘)
@@ -115,7 +259,7 @@ class ReportSystem(commands.Cog):
             return
 
         # Get user who reacted
-        user = guild.get_member(payload.user_id)
+        user = payload.member or await get_or_fetch_member(guild, payload.user_id)
         if not user or user.bot:
             print(f"[DEBUG] User is bot or not found. User: {user}")
             return
@@ -153,6 +297,22 @@ class ReportSystem(commands.Cog):
     async def on_message(self, message):
         if message.author.bot:
             return
+        if isinstance(message.channel, discord.DMChannel):
+            if message.content.strip():
+                await self._complete_report(message)
+            return
+
+        offense = self.spam.observe(
+            message.guild.id, message.author.id, message.content,
+            len(message.raw_mentions) + len(message.raw_role_mentions) + (1 if message.mention_everyone else 0)
+        )
+        if offense:
+            await self._auto_warn(message, offense)
+
+        cluster = self.raid.observe(message.guild.id, message.author.id, message.channel.id, message.id, message.content)
+        if cluster and await db.claim_event("raid-alert", message.id):
+            await self._raid_alert(message.guild, cluster)
+
         if not message.mentions or self.bot.user not in message.mentions:
             return
         if not message.reference:
@@ -0,0 +1,60 @@
+from collections import Counter
+
+import discord
+from discord.ext import commands
+
+from utils import db
+
+WINDOWS = {"7d": 7, "30d": 30, "90d": 90}
+
+
+class ModStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="modstats")
+    @commands.has_permissions(manage_messages=True)
+    async def modstats(self, ctx, window: str = "7d"):
+        """Moderation activity over the last 7, 30 or 90 days. Usage: !modstats [7d|30d|90d]"""
+        window = window.lower()
+        if window not in WINDOWS:
+            await ctx.send(f"❌ Invalid window. Use one of: {', '.join(WINDOWS)}.")
+            return
+
+        rollups = await db.get_daily_stats(ctx.guild.id, WINDOWS[window])
+        categories, moderators, channels = Counter(), Counter(), Counter()
+        total = 0
+        for day in rollups:
+            total += day.get("total", 0)
+            categories.update(day.get("categories", {}))
+            moderators.update(day.get("moderators", {}))
+            channels.update(day.get("channels", {}))
+
+        embed = discord.Embed(
+            title=f"📈 Moderation Stats ({window})",
+            description=f"**{total}** moderation actions recorded.",
+            color=discord.Color.blue(),
+            timestamp=ctx.message.created_at
+        )
+        embed.add_field(
+            name="By Category",
+            value="\n".join(f"• {name}: **{n}**" for name, n in categories.most_common()) or "None",
+            inline=False
+        )
+        embed.add_field(
+            name="Top Moderators",
+            value="\n".join(f"• <@{mod_id}>: **{n}**" for mod_id, n in moderators.most_common(5)) or "None",
+            inline=True
+        )
+        embed.add_field(
+            name="Top Channels",
+            value="\n".join(f"• <#{channel_id}>: **{n}**" for channel_id, n in channels.most_common(5)) or "None",
+            inline=True
+        )
+        embed.set_footer(text=f"From {len(rollups)} daily rollups")
+
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(ModStats(bot))
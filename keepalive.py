@@ -1,17 +1,30 @@
-from flask import Flask
+from flask import Flask, jsonify
 from threading import Thread
 
 
 app = Flask('')
+_health_provider = None
 
 @app.route('/')
 def home():
     return "sentinelone is online!"
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+@app.route('/health')
+def health():
+    if _health_provider is None:
+        return jsonify({"status": "unknown"})
+    try:
+        return jsonify(_health_provider())
+    except Exception as e:
+        return jsonify({"status": "error", "error": str(e)}), 500
 
-def keep_alive():
-    t = Thread(target=run)
+def run(port=8080):
+    app.run(host='0.0.0.0', port=port)
+
+def keep_alive(health=None, port=8080):
+    """Start the web server; `health` is a callable returning the /health payload."""
+    global _health_provider
+    _health_provider = health
+    t = Thread(target=run, args=(port,), daemon=True)
     t.start()
-    print("[DEBUG] Keep-alive server started.")
\ No newline at end of file
+    print("[DEBUG] Keep-alive server started.")
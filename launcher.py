@@ -0,0 +1,107 @@
+"""Cluster launcher: spreads shard ranges across several bot worker processes.
+
+Usage: python launcher.py
+
+CLUSTER_COUNT  number of worker processes (default: CPU count)
+SHARD_COUNT    total shards (default: Discord's recommended count)
+
+The shard plan is written to the `Clusters` collection; each worker reads its
+range on startup and writes heartbeats with per-shard latency back to it,
+which this process serves on /health.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from keepalive import keep_alive
+from utils import mongo
+from utils.cluster import HEARTBEAT_INTERVAL, plan_shards
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+RESTART_DELAY = 5
+
+
+def recommended_shard_count(token: str) -> int:
+    req = urllib.request.Request(GATEWAY_URL, headers={"Authorization": f"Bot {token}"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.load(resp)["shards"]
+
+
+def publish_plan(shard_count: int, plan):
+    clusters = mongo.get_clusters()
+    clusters.delete_many({"_id": {"$gte": len(plan)}})
+    for cluster_id, shard_ids in enumerate(plan):
+        clusters.replace_one(
+            {"_id": cluster_id},
+            {"_id": cluster_id, "shard_ids": shard_ids, "shard_count": shard_count},
+            upsert=True
+        )
+
+
+def cluster_health():
+    stale_before = datetime.utcnow() - timedelta(seconds=HEARTBEAT_INTERVAL * 3)
+    clusters = []
+    shards = {}
+    for doc in mongo.get_clusters().find().sort("_id", 1):
+        heartbeat = doc.get("heartbeat_at")
+        alive = heartbeat is not None and heartbeat > stale_before
+        clusters.append({
+            "cluster_id": doc["_id"],
+            "shard_ids": doc["shard_ids"],
+            "pid": doc.get("pid"),
+            "guilds": doc.get("guilds", 0),
+            "alive": alive,
+            "loop": doc.get("loop"),
+        })
+        shards.update(doc.get("latencies", {}) if alive else {str(s): None for s in doc["shard_ids"]})
+    return {
+        "status": "ok" if clusters and all(c["alive"] for c in clusters) else "degraded",
+        "clusters": clusters,
+        "shards": shards,
+    }
+
+
+def spawn(cluster_id: int) -> subprocess.Popen:
+    env = dict(os.environ, CLUSTER_ID=str(cluster_id))
+    print(f"[DEBUG] Starting cluster {cluster_id}")
+    return subprocess.Popen([sys.executable, "main.py"], env=env)
+
+
+def main():
+    load_dotenv()
+    token = os.getenv('DISCORD_BOT_TOKEN')
+    if not token:
+        raise ValueError("No DISCORD_BOT_TOKEN found in environment variables.")
+
+    shard_count = int(os.getenv("SHARD_COUNT") or 0) or recommended_shard_count(token)
+    cluster_count = int(os.getenv("CLUSTER_COUNT") or 0) or (os.cpu_count() or 1)
+    plan = plan_shards(shard_count, cluster_count)
+    publish_plan(shard_count, plan)
+    print(f"[DEBUG] {shard_count} shards across {len(plan)} clusters: {plan}")
+
+    keep_alive(health=cluster_health)
+    workers = {cluster_id: spawn(cluster_id) for cluster_id in range(len(plan))}
+    try:
+        while True:
+            time.sleep(RESTART_DELAY)
+            for cluster_id, proc in workers.items():
+                if proc.poll() is not None:
+                    print(f"[ERROR] Cluster {cluster_id} exited with code {proc.returncode}, restarting")
+                    workers[cluster_id] = spawn(cluster_id)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in workers.values():
+            proc.terminate()
+        for proc in workers.values():
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
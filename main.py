@@ -1,43 +1,166 @@
+import time
+_process_start = time.perf_counter()
+
 import sys
 import discord
+from discord import app_commands
 from discord.ext import commands
 import os
 import asyncio
 from dotenv import load_dotenv
 from keepalive import keep_alive
+from utils import db, cluster
+from utils.members import cache_options
+from utils.startup import StartupTimer
+from utils.loophealth import LoopMonitor, install_event_loop_policy
+from utils.lease import Lease
 
-load_dotenv()
-TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-if not TOKEN:
-    raise ValueError("No DISCORD_BOT_TOKEN found in environment variables.")
+startup = StartupTimer(_process_start)
+startup.since_start("imports")
 
-keep_alive()  # start flask thread
+INITIAL_EXTENSIONS = ['cogs.punish', 'cogs.points', 'cogs.reports', 'cogs.roast', 'cogs.export', 'cogs.stats']
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.reactions = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
 
-@bot.event
-async def on_ready():
-    print(f'✅ Logged in as {bot.user.name} (ID: {bot.user.id})')
-    print('------')
+class SentinelTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # replicas get the same interactions; the first to claim a slash command runs it
+        if interaction.type is not discord.InteractionType.application_command:
+            return True
+        return await db.claim_event("interaction", interaction.id)
+
+
+class SentinelMixin:
+    """Startup behaviour shared by the single-connection and sharded bots."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_started = time.perf_counter()
+        self.loop_monitor = LoopMonitor(stall_threshold=float(os.getenv("LOOP_STALL_MS", 100)) / 1000)
+        # replicas serving the same shards share the scheduler lease; the archiver covers every guild
+        cluster_id = cluster.get_cluster_id()
+        self.scheduler_lease = Lease(f"scheduler-{cluster_id}" if cluster_id is not None else "scheduler")
+        self.archiver_lease = Lease("archiver")
+
+    async def setup_hook(self):
+        self.loop_monitor.start()
+        # Extensions only register cogs, so they can load while the DB pool warms up
+        await asyncio.gather(self.load_extensions(), self.warmup_database())
+        self.scheduler_lease.start()
+        self.archiver_lease.start()
+        cluster_id = cluster.get_cluster_id()
+        if cluster_id is not None:
+            self.loop.create_task(cluster.heartbeat_loop(self, cluster_id))
+        if os.getenv("SYNC_COMMANDS") == "1" and cluster_id in (None, 0):
+            # Syncing is rate limited, so only do it on request and from one process
+            synced = await self.tree.sync()
+            print(f'🔁 Synced {len(synced)} slash commands')
+        self.connect_started = time.perf_counter()
+
+    async def load_extensions(self):
+        with startup.phase("extension load"):
+            await asyncio.gather(*(self._load_extension(ext) for ext in INITIAL_EXTENSIONS))
 
-async def load_extensions():
-    initial_extensions = ['cogs.punish','cogs.points','cogs.reports','cogs.roast']
-    for ext in initial_extensions:
+    async def _load_extension(self, ext: str):
         try:
-            await bot.load_extension(ext)
+            await self.load_extension(ext)
             print(f'🔧 Loaded extension: {ext}')
         except Exception as e:
             print(f'❌ Failed to load extension {ext}', file=sys.stderr)
             print(e)
 
-async def main():
-    await load_extensions()
-    await bot.start(TOKEN)
+    async def warmup_database(self):
+        start = time.perf_counter()
+        try:
+            await db.warmup()
+            await db.ensure_indexes()
+            if db.journal.pending:
+                print(f"[DEBUG] Replaying {db.journal.pending} journaled writes from the last outage")
+                db.start_replay()
+        except Exception as e:
+            print(f"[ERROR] Database warmup failed: {e}")
+            if os.getenv("DB_FALLBACK") == "memory":
+                db.set_backend(db.create_backend("memory"))
+                print("[WARN] Falling back to in-memory storage; nothing will persist across restarts")
+                if db.journal.pending:
+                    print(f"[WARN] Keeping {db.journal.pending} journaled writes for the next start against Mongo")
+        finally:
+            startup.record("db warmup", time.perf_counter() - start)
+
+    async def process_commands(self, message):
+        # replicas serving the same shards get the same messages; only the
+        # first to claim a command runs it, so nothing is applied twice
+        if message.author.bot:
+            return
+        ctx = await self.get_context(message)
+        if ctx.valid and not await db.claim_event("command", message.id):
+            return
+        await self.invoke(ctx)
+
+    async def close(self):
+        self.loop_monitor.stop()
+        # hand singleton jobs to a standby now rather than after the lease TTL
+        await asyncio.gather(self.scheduler_lease.release(), self.archiver_lease.release())
+        await super().close()
+        # queued stat counters and report records would otherwise be lost
+        await db.close()
+
+    async def on_ready(self):
+        print(f'✅ Logged in as {self.user.name} (ID: {self.user.id})')
+        if isinstance(self, commands.AutoShardedBot):
+            print(f'🧩 Running shards {sorted(self.shards)} of {self.shard_count}')
+        print('------')
+        if not startup.reported:
+            startup.record("gateway ready", time.perf_counter() - self.connect_started)
+            startup.print_report()
+
+
+class SentinelBot(SentinelMixin, commands.Bot):
+    pass
+
+
+class ShardedSentinelBot(SentinelMixin, commands.AutoShardedBot):
+    pass
+
+
+async def create_bot():
+    """Pick the bot flavour from the environment.
+
+    CLUSTER_ID set (by launcher.py): sharded, shard range read from Mongo.
+    SHARD_MODE=auto: AutoShardedBot in this process, SHARD_COUNT optional.
+    Otherwise: a single-connection commands.Bot.
+    LOW_MEMORY=1 applies to all of them (see utils.members.cache_options).
+    """
+    cluster_id = cluster.get_cluster_id()
+    if cluster_id is not None:
+        shard_ids, shard_count = await cluster.get_assignment(cluster_id)
+        print(f"[DEBUG] Cluster {cluster_id} running shards {shard_ids} of {shard_count}")
+        return ShardedSentinelBot(command_prefix='!', intents=intents, shard_ids=shard_ids, shard_count=shard_count, tree_cls=SentinelTree, **cache_options())
+
+    if os.getenv("SHARD_MODE", "off").lower() == "auto":
+        shard_count = os.getenv("SHARD_COUNT")
+        return ShardedSentinelBot(command_prefix='!', intents=intents, shard_count=int(shard_count) if shard_count else None, tree_cls=SentinelTree, **cache_options())
+
+    return SentinelBot(command_prefix='!', intents=intents, tree_cls=SentinelTree, **cache_options())
+
+async def main(token: str):
+    bot = await create_bot()
+    if cluster.get_cluster_id() is None:
+        # cluster workers report through Mongo; launcher.py serves /health for them
+        keep_alive(health=lambda: cluster.local_health(bot))
+    async with bot:
+        await bot.start(token)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    load_dotenv()
+    TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+    if not TOKEN:
+        raise ValueError("No DISCORD_BOT_TOKEN found in environment variables.")
+
+    if install_event_loop_policy():
+        print("[DEBUG] Using uvloop event loop")
+    asyncio.run(main(TOKEN))
@@ -0,0 +1,40 @@
+from typing import Dict, Iterable, List, Tuple
+
+from discord import app_commands
+
+MAX_CHOICES = 25  # Discord's autocomplete limit
+
+
+class PrefixIndex:
+    """Precomputed prefix -> choices map for app command autocomplete.
+
+    Every prefix (up to `max_prefix` characters) of every entry's name, and
+    of each word-start within it, maps straight to its choice list, so a
+    keystroke is answered with one dict lookup. Longer input filters the
+    `max_prefix` bucket.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]], max_prefix: int = 12):
+        self.max_prefix = max_prefix
+        self._index: Dict[str, List[app_commands.Choice]] = {}
+        choices = [app_commands.Choice(name=name, value=value) for name, value in entries]
+        self._all = choices[:MAX_CHOICES]
+        for choice in choices:
+            words = choice.name.lower().split()
+            starts = {" ".join(words[i:]) for i in range(len(words))}
+            seen = set()
+            for text in starts:
+                for n in range(1, min(len(text), max_prefix) + 1):
+                    prefix = text[:n]
+                    if prefix not in seen:
+                        seen.add(prefix)
+                        self._index.setdefault(prefix, []).append(choice)
+
+    def lookup(self, current: str) -> List[app_commands.Choice]:
+        current = " ".join(current.lower().split())
+        if not current:
+            return self._all
+        if len(current) <= self.max_prefix:
+            return self._index.get(current, [])[:MAX_CHOICES]
+        bucket = self._index.get(current[:self.max_prefix], [])
+        return [c for c in bucket if current in c.name.lower()][:MAX_CHOICES]
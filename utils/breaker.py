@@ -0,0 +1,59 @@
+import time
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling a dependency that keeps failing, then probes it again.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    allow() returns False for `reset_timeout` seconds. Then it lets one call
+    through (half-open): success closes it, failure opens it for another
+    `reset_timeout`. A probe that never reports back (cancelled, say) is
+    written off after `reset_timeout` and another is let through. `on_close`
+    runs whenever it closes after being open.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_close = on_close
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_started = None
+        if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.reset_timeout):
+            self._probe_started = now
+            return True
+        return False
+
+    def record_success(self):
+        was_open = self.state != CLOSED
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_started = None
+        if was_open:
+            print("[DEBUG] database circuit closed")
+            if self.on_close:
+                self.on_close()
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_started = None
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                print(f"[WARN] database circuit open after {self.failures} failures; retrying in {self.reset_timeout:.0f}s")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
@@ -0,0 +1,118 @@
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ROAST_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "roasts.json")
+
+MIN_SCORE = 0.5         # Dice similarity a fuzzy match needs to be accepted
+PROBE_MIN = 4           # a typo breaks at most 3 trigrams, so 4 probes always reach the target
+MAX_TEXT_LENGTH = 4000  # stay under Discord's 4096-char embed description limit
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation: 'Barça' -> 'barca', 'P.S.G' -> 'p s g'."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Club:
+    __slots__ = ("name", "aliases", "roasts")
+
+    def __init__(self, name: str, aliases: List[str], roasts: List[str]):
+        self.name = name
+        self.aliases = aliases
+        self.roasts = roasts
+
+
+def _capped_text(lines: List[str], sep: str) -> str:
+    out, size = [], 0
+    for i, line in enumerate(lines):
+        if size + len(line) + len(sep) > MAX_TEXT_LENGTH - 30:
+            out.append(f"…and {len(lines) - i} more")
+            break
+        out.append(line)
+        size += len(line) + len(sep)
+    return sep.join(out)
+
+
+class ClubIndex:
+    """Roast targets keyed by canonical name, with alias and typo-tolerant lookup.
+
+    Every name and alias is normalized once into an exact-match dict and a
+    trigram inverted index. A lookup is a dict hit, or on a miss a probe of
+    the rarest third of the query's trigrams for candidates, ranked by Dice
+    score. Common grams such as " fc" are never scanned, which keeps misses
+    sub-millisecond with thousands of clubs.
+    """
+
+    def __init__(self, clubs: Iterable[Club]):
+        self.clubs: List[Club] = sorted(clubs, key=lambda c: c.name.lower())
+        self._exact: Dict[str, Club] = {}
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._keys: List[Tuple[str, Club, frozenset]] = []  # (alias, club, trigrams)
+
+        for club in self.clubs:
+            for alias in (club.name, *club.aliases):
+                key = normalize(alias)
+                if not key or key in self._exact:
+                    continue
+                self._exact[key] = club
+                grams = frozenset(trigrams(key))
+                for gram in grams:
+                    self._postings[gram].append(len(self._keys))
+                self._keys.append((key, club, grams))
+
+        names = [club.name for club in self.clubs]
+        self.list_text = _capped_text(names, "\n")
+        self.summary = _capped_text(names, ", ")
+
+    @classmethod
+    def load(cls, path: str = ROAST_DATA) -> "ClubIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(Club(c["name"], c.get("aliases", []), c["roasts"]) for c in data["clubs"])
+
+    def __len__(self):
+        return len(self.clubs)
+
+    def lookup(self, query: str) -> Optional[Club]:
+        """Exact name/alias match, else the closest club by trigram similarity."""
+        key = normalize(query)
+        if not key:
+            return None
+        club = self._exact.get(key)
+        if club is not None:
+            return club
+
+        grams = trigrams(key)
+        postings = sorted((self._postings[g] for g in grams if g in self._postings), key=len)
+        candidates = set()
+        for posting in postings[:max(PROBE_MIN, math.ceil(len(grams) / 3))]:
+            candidates.update(posting)
+
+        best, best_score = None, MIN_SCORE
+        for i in candidates:
+            _, club, key_grams = self._keys[i]
+            score = 2 * len(grams & key_grams) / (len(grams) + len(key_grams))
+            if score > best_score:
+                best, best_score = club, score
+        return best
+
+    def choices(self) -> Iterator[Tuple[str, str]]:
+        """(label, canonical name) pairs for autocomplete: names, then aliases."""
+        for club in self.clubs:
+            yield club.name, club.name
+        for club in self.clubs:
+            for alias in club.aliases:
+                yield f"{alias} → {club.name}", club.name
@@ -0,0 +1,86 @@
+import asyncio
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils import db
+
+HEARTBEAT_INTERVAL = 15  # seconds between cluster heartbeats written to Mongo
+
+
+def _clusters():
+    return db.get_database()["Clusters"]
+
+
+def plan_shards(shard_count: int, cluster_count: int) -> List[List[int]]:
+    """Split shard ids 0..shard_count-1 into contiguous ranges, one per cluster."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    per_cluster = math.ceil(shard_count / cluster_count)
+    return [
+        list(range(start, min(start + per_cluster, shard_count)))
+        for start in range(0, shard_count, per_cluster)
+    ]
+
+
+def get_cluster_id() -> Optional[int]:
+    """Cluster id assigned by launcher.py, or None when running standalone."""
+    value = os.getenv("CLUSTER_ID")
+    return int(value) if value is not None else None
+
+
+async def get_assignment(cluster_id: int, timeout: float = 60.0) -> Tuple[List[int], int]:
+    """Wait for the launcher's plan and return (shard_ids, shard_count) for this cluster."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        doc = await _clusters().find_one({"_id": cluster_id})
+        if doc:
+            return doc["shard_ids"], doc["shard_count"]
+        if asyncio.get_running_loop().time() > deadline:
+            raise RuntimeError(f"No shard assignment found for cluster {cluster_id}")
+        await asyncio.sleep(1)
+
+
+def shard_latencies(bot) -> Dict[str, Optional[float]]:
+    """Per-shard gateway latency in milliseconds, None while a shard is connecting."""
+    if hasattr(bot, "latencies"):
+        pairs = bot.latencies
+    else:
+        pairs = [(bot.shard_id or 0, bot.latency)]
+    return {
+        str(shard_id): round(latency * 1000, 1) if math.isfinite(latency) else None
+        for shard_id, latency in pairs
+    }
+
+
+def local_health(bot) -> Dict:
+    health = {
+        "status": "ok" if bot.is_ready() else "starting",
+        "cluster_id": get_cluster_id(),
+        "shard_count": bot.shard_count,
+        "guilds": len(bot.guilds),
+        "shards": shard_latencies(bot),
+    }
+    if getattr(bot, "loop_monitor", None):
+        health["loop"] = bot.loop_monitor.metrics()
+    return health
+
+
+async def heartbeat_loop(bot, cluster_id: int):
+    """Publish this worker's shard latencies so the launcher can serve /health."""
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        try:
+            await _clusters().update_one(
+                {"_id": cluster_id},
+                {"$set": {
+                    "pid": os.getpid(),
+                    "guilds": len(bot.guilds),
+                    "latencies": shard_latencies(bot),
+                    "loop": bot.loop_monitor.summary() if getattr(bot, "loop_monitor", None) else None,
+                    "heartbeat_at": datetime.utcnow(),
+                }}
+            )
+        except Exception as e:
+            print(f"[ERROR] cluster {cluster_id} heartbeat failed: {e}")
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
@@ -1,264 +1,385 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+"""Data access for the cogs.
+
+The functions below forward to the active StorageBackend (see
+utils/storage.py). DB_BACKEND picks it: "mongo" (default) or "memory".
+Maintenance tools that run raw queries (utils.migrate, utils.export,
+utils.cluster) use get_database() directly and always talk to Mongo.
+
+Every call has a deadline (OP_DEADLINES, else DEFAULT_DEADLINE) and goes
+through one circuit breaker. While the breaker is open, reads raise
+DatabaseUnavailable at once, and writes (the wrappers using _mutate) are
+appended to a local write-ahead journal and answered with QUEUED instead of
+their usual result; the journal is replayed in order once the database answers again.
+Writes that time out while the breaker is still closed raise: the server
+may have applied them, so they are not journaled. The journal belongs to
+Mongo: a process running on the memory backend (DB_FALLBACK) neither
+journals nor replays, and leaves the file for the next process on Mongo.
+"""
+import asyncio
 import os
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import async_timeout
+from bson import ObjectId
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Tuple
-from pymongo import ReturnDocument
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, WTimeoutError
+
+from utils.breaker import CLOSED, CircuitBreaker
+from utils.journal import WriteAheadJournal
+from utils.models import Punishment, UserRecord
+from utils.storage import StorageBackend
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
 
 load_dotenv()
 
-MONGO_URI = os.getenv('MONGODB_URI')
-if not MONGO_URI:
-    raise ValueError("No MONGODB_URI found in environment variables.")
+DATABASE_NAME = "SentinelOne"
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["SentinelOne"]
-users_collection = db["Users"]
+# Users documents keep the newest entries only; expired punishments, and the
+# oldest ones beyond this cap, move to UsersArchive (see archive_expired_history).
+# Reaching it means 50 punishments inside the 20-day window, far past the
+# permanent-mute threshold. Warnings are not capped: the third one converts to
+# MP and clears them.
+HOT_PUNISHMENT_LIMIT = 50
+ARCHIVE_BATCH_SIZE = 200
 
-async def add_warning(guild_id: int, user_id: int, mod_id: int, reason: Optional[str] = None) -> Tuple[int, bool]:
-    """
-    Add a warning to a user's record
-    Returns: (warning_count, is_mutable)
-    is_mutable indicates if the warning should result in a mute
+REPORT_RETENTION_DAYS = 180
+EVIDENCE_RETENTION_DAYS = 90
+EVENT_CLAIM_RETENTION = 3600  # seconds; far longer than any gateway event takes to reach every replica
+
+MAX_VERSION_RETRIES = 5
+
+DEFAULT_DEADLINE = 3.0  # seconds; a moderator is waiting on most calls
+OP_DEADLINES = {
+    "warmup": 30.0,
+    "ensure_indexes": 60.0,
+    "get_leaderboard_users": 10.0,
+    "archive_expired_history": 120.0,
+    "close": 30.0,
+}
+BREAKER_FAILURES = 5    # consecutive failures that open the breaker
+BREAKER_RESET = 15.0    # seconds before an open breaker lets a probe through
+SERVER_SELECTION_TIMEOUT_MS = 5000  # the driver default of 30s outlives every deadline
+
+# errors that say the database is unreachable or overloaded, as opposed to a bad query
+UNAVAILABLE_ERRORS = (asyncio.TimeoutError, ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+
+class ConcurrentUpdateError(RuntimeError):
+    """A read-modify-write lost the version race too many times in a row."""
+
+
+class DatabaseUnavailable(RuntimeError):
+    """The circuit breaker is open, so the call was not attempted."""
+
+
+class _Queued:
+    """What a write returns when it was journaled instead of applied."""
+
+    def __repr__(self) -> str:
+        return "QUEUED"
+
+
+# the cogs check `result is db.QUEUED` and tell the moderator the write is pending
+QUEUED = _Queued()
+
+
+def day_start(when: datetime) -> datetime:
+    return datetime(when.year, when.month, when.day)
+
+
+_client: Optional["AsyncIOMotorClient"] = None
+
+
+def get_client() -> "AsyncIOMotorClient":
+    """Return the shared Motor client, creating it on first use."""
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        mongo_uri = os.getenv('MONGODB_URI')
+        if not mongo_uri:
+            raise ValueError("No MONGODB_URI found in environment variables.")
+        _client = AsyncIOMotorClient(mongo_uri, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+    return _client
+
+
+def get_database():
+    return get_client()[DATABASE_NAME]
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def create_backend(name: str) -> StorageBackend:
+    if name == "memory":
+        from utils.memory_backend import MemoryBackend
+        return MemoryBackend()
+    if name == "mongo":
+        from utils.motor_backend import MotorBackend
+        return MotorBackend()
+    raise ValueError(f"Unknown DB_BACKEND {name!r}; use 'mongo' or 'memory'.")
+
+
+def get_backend() -> StorageBackend:
+    """Return the active backend, creating it from DB_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(os.getenv("DB_BACKEND", "mongo").lower())
+    return _backend
+
+
+def set_backend(backend: StorageBackend) -> None:
+    """Swap the backend, e.g. for tests, benchmarks or a degraded-mode fallback."""
+    global _backend
+    _backend = backend
+
+
+def _journal_path() -> str:
+    cluster_id = os.getenv("CLUSTER_ID")
+    default = f"db-journal-{cluster_id}.jsonl" if cluster_id is not None else "db-journal.jsonl"
+    return os.getenv("DB_JOURNAL", default)
+
+
+def _journaling() -> bool:
+    return get_backend().journaled
+
+
+def _on_breaker_close():
+    if journal.pending and _journaling():
+        start_replay()
+
+
+breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET, on_close=_on_breaker_close)
+journal = WriteAheadJournal(_journal_path())
+_replay_task: Optional[asyncio.Task] = None
+
+
+async def _call(op: str, *args) -> Any:
+    """Run a backend operation under its deadline and the breaker."""
+    if not breaker.allow():
+        raise DatabaseUnavailable(f"database unavailable, {op} not attempted")
+    try:
+        # a timeout scope rather than wait_for: no extra task per call on the hot path
+        async with async_timeout.timeout(OP_DEADLINES.get(op, DEFAULT_DEADLINE)):
+            result = await getattr(get_backend(), op)(*args)
+    except UNAVAILABLE_ERRORS:
+        breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_success()  # the database answered, just not with what we wanted
+        raise
+    breaker.record_success()
+    return result
+
+
+async def _best_effort(op: str, fallback, *args) -> Any:
+    """_call, but answer `fallback` instead of raising while the breaker is open."""
+    try:
+        return await _call(op, *args)
+    except DatabaseUnavailable:
+        return fallback
+
+
+async def _mutate(op: str, *args) -> Any:
+    """_call for a write; journals it and returns QUEUED while the breaker is open.
+
+    Once anything is journaled, later writes queue behind it until replay
+    drains the journal, so they reach the database in the order they were made.
     """
-    warning = {
-        "timestamp": datetime.utcnow(),
-        "mod_id": mod_id,
-        "reason": reason
-    }
-    
-    await users_collection.update_one(
-        {"guild_id": guild_id, "user_id": user_id},
-        {
-            "$push": {"warnings": warning},
-            "$setOnInsert": {"total_points": 0, "punishments": []}
-        },
-        upsert=True
-    )
-    
-    user_data = await users_collection.find_one(
-        {"guild_id": guild_id, "user_id": user_id}
-    )
-    warning_count = len(user_data.get("warnings", []))
-    
-    # Second warning gets 5min mute, third warning converts to 1MP
-    return warning_count, warning_count in [2, 3]
+    if not _journaling():
+        return await _call(op, *args)
+    if journal.pending:
+        if not _replaying() and breaker.allow():
+            start_replay()  # the replay doubles as the breaker's probe
+        await journal.append(op, list(args))
+        return QUEUED
+    try:
+        return await _call(op, *args)
+    except DatabaseUnavailable:
+        await journal.append(op, list(args))
+        print(f"[WARN] database unavailable; journaled {op} ({journal.pending} pending)")
+        return QUEUED
+
+
+def _replaying() -> bool:
+    return _replay_task is not None and not _replay_task.done()
+
+
+def start_replay():
+    """Replay the journal in the background unless a replay is already running."""
+    global _replay_task
+    if not _replaying() and _journaling():
+        _replay_task = asyncio.get_running_loop().create_task(replay_journal())
+
+
+async def replay_journal() -> int:
+    """Apply journaled writes in order; stops at the first availability error."""
+    if not _journaling():
+        # the entries were meant for Mongo; keep them (and the file) for a process that has it
+        print(f"[WARN] not replaying {journal.pending} journaled writes into {type(get_backend()).__name__}")
+        return 0
+    applied = 0
+    while journal.pending:
+        for entry in await journal.unapplied():
+            try:
+                async with async_timeout.timeout(OP_DEADLINES.get(entry["op"], DEFAULT_DEADLINE)):
+                    await getattr(get_backend(), entry["op"])(*entry["args"])
+            except UNAVAILABLE_ERRORS as e:
+                breaker.record_failure()
+                print(f"[WARN] journal replay paused at #{entry['seq']}: {e!r}")
+                return applied
+            except Exception as e:
+                # retrying would fail the same way and block everything behind it
+                print(f"[ERROR] dropping journaled {entry['op']} #{entry['seq']}: {e}")
+            breaker.record_success()
+            await journal.mark_applied(entry["seq"])
+            applied += 1
+    await journal.truncate_if_drained()
+    if applied:
+        print(f"[DEBUG] replayed {applied} journaled writes")
+    return applied
+
+
+# Wrappers over the active backend; StorageBackend documents each contract.
+
+async def close() -> None:
+    if _replaying():
+        await asyncio.wait_for(asyncio.shield(_replay_task), OP_DEADLINES["close"])
+    await get_backend().close()
+
+async def warmup() -> float:
+    return await _call("warmup")
+
+async def ensure_indexes() -> None:
+    await _call("ensure_indexes")
+
+async def add_warning(guild_id: int, user_id: int, mod_id: int, reason: Optional[str] = None) -> Tuple[int, bool]:
+    # pin the time now, so a journaled warning keeps it when replayed
+    return await _mutate("add_warning", guild_id, user_id, mod_id, reason, datetime.utcnow())
 
 async def add_punishment(guild_id: int, user_id: int, reason: str, points: int, warning_count: int = 0) -> int:
-    """Add punishment to the database and update total points."""
-    user_data = await users_collection.find_one({"guild_id": guild_id, "user_id": user_id})
-    new_entry = {
-        "reason": reason,
-        "points": points,
-        "timestamp": datetime.utcnow(),
-        "warning_count": warning_count
-    }
-
-    if user_data:
-        # Handle third warning conversion to MP
-        if warning_count >= 3:
-            await users_collection.update_one(
-                {"guild_id": guild_id, "user_id": user_id},
-                {
-                    "$inc": {"total_points": 1},  # Add 1 MP for third warning
-                    "$push": {"punishments": new_entry},
-                    "$set": {"warnings": []}  # Clear warnings after conversion
-                }
-            )
-            return user_data["total_points"] + 1
-        else:
-            await users_collection.update_one(
-                {"guild_id": guild_id, "user_id": user_id},
-                {
-                    "$inc": {"total_points": points},
-                    "$push": {"punishments": new_entry}
-                }
-            )
-            return user_data["total_points"] + points
-    else:
-        await users_collection.insert_one({
-            "guild_id": guild_id,
-            "user_id": user_id,
-            "total_points": points,
-            "punishments": [new_entry],
-            "warnings": []
-        })
-        return points
+    # pin the time now; a replayed punishment would otherwise expire 20 days after the replay
+    return await _mutate("add_punishment", guild_id, user_id, reason, points, warning_count, datetime.utcnow())
 
 async def get_warnings(guild_id: int, user_id: int) -> List[Dict]:
-    """Get all warnings for a user"""
-    user_data = await users_collection.find_one(
-        {"guild_id": guild_id, "user_id": user_id},
-        {"warnings": 1}
-    )
-    return user_data.get("warnings", []) if user_data else []
+    return await _call("get_warnings", guild_id, user_id)
 
 async def get_warning_count(guild_id: int, user_id: int) -> int:
-    """Get number of warnings for a user"""
-    warnings = await get_warnings(guild_id, user_id)
-    return len(warnings)
+    return await _best_effort("get_warning_count", 0, guild_id, user_id)
 
 async def clear_warnings(guild_id: int, user_id: int) -> bool:
-    """Clear all warnings for a user"""
-    result = await users_collection.update_one(
-        {"guild_id": guild_id, "user_id": user_id},
-        {"$set": {"warnings": []}}
-    )
-    return result.modified_count > 0
-
-async def get_user_info(guild_id: int, user_id: int) -> Optional[Dict]:
-    """Get all user information including warnings and punishments"""
-    return await users_collection.find_one(
-        {"guild_id": guild_id, "user_id": user_id}
-    )
+    return await _mutate("clear_warnings", guild_id, user_id)
+
+async def get_user_info(guild_id: int, user_id: int, recent: Optional[int] = None) -> Optional[UserRecord]:
+    return await _call("get_user_info", guild_id, user_id, recent)
 
 async def clear_points(guild_id: int, user_id: int) -> bool:
-    """Clear all points and warnings for a user"""
-    result = await users_collection.update_one(
-        {"guild_id": guild_id, "user_id": user_id},
-        {
-            "$set": {
-                "total_points": 0,
-                "warnings": [],
-                "punishments": []
-            }
-        }
-    )
-    return result.modified_count > 0
+    return await _mutate("clear_points", guild_id, user_id)
 
 async def check_expired_points(guild_id: int, user_id: int) -> int:
-    """Remove expired points (older than 20 days) and return new total"""
-    expiry_date = datetime.utcnow() - timedelta(days=20)
-    
-    user_data = await users_collection.find_one({"guild_id": guild_id, "user_id": user_id})
-    if not user_data:
-        return 0
-
-    active_punishments = []
-    total_points = 0
-    
-    for punishment in user_data.get('punishments', []):
-        # tolerate malformed data so a single bad entry doesn't crash the bot
-        try:
-            ts = punishment.get('timestamp')
-            if not isinstance(ts, datetime):
-                # try parsing ISO string if present
-                if isinstance(ts, str):
-                    try:
-                        ts = datetime.fromisoformat(ts)
-                    except Exception:
-                        # give up on this entry
-                        print(f"[WARNING] bad timestamp for user {user_id}: {ts}")
-                        continue
-                else:
-                    print(f"[WARNING] unexpected timestamp type for user {user_id}: {type(ts)}")
-                    continue
-            if ts > expiry_date:
-                active_punishments.append(punishment)
-                total_points += punishment.get('points', 0)
-        except Exception as exc:
-            print(f"[ERROR] check_expired_points skipped entry due to {exc}")
-            continue
-
-    # Update database with only active punishments
-    await users_collection.update_one(
-        {"guild_id": guild_id, "user_id": user_id},
-        {
-            "$set": {
-                "punishments": active_punishments,
-                "total_points": total_points
-            }
-        }
-    )
-    
-    return total_points
+    # a recompute that the next call redoes anyway, so skipping it is safe
+    return await _best_effort("check_expired_points", 0, guild_id, user_id)
 
 async def deductpoints(guild_id: int, user_id: int, points_to_deduct: int) -> int:
-    """
-    Atomically deducts points from a user by modifying or removing their
-    most recent punishment entries.
-    """
-    user_data = await users_collection.find_one(
-        {"guild_id": guild_id, "user_id": user_id}
-    )
+    return await _mutate("deductpoints", guild_id, user_id, points_to_deduct)
 
-    if not user_data or not user_data.get('punishments'):
+async def bulk_add_punishments(guild_id: int, user_ids: List[int], reason: str, points: int) -> Dict[int, int]:
+    return await _mutate("bulk_add_punishments", guild_id, user_ids, reason, points, datetime.utcnow())
 
-        return 0
+def get_leaderboard_cursor(guild_id: int, batch_size: int = 20, after: Optional[Tuple[int, int]] = None):
+    # cursors are lazy and their round trips happen in the caller's to_list(), outside
+    # the breaker, so only refuse here instead of taking a half-open probe
+    if breaker.state != CLOSED:
+        raise DatabaseUnavailable("database unavailable, get_leaderboard_cursor not attempted")
+    return get_backend().get_leaderboard_cursor(guild_id, batch_size, after)
+
+async def get_leaderboard_users(guild_id: int) -> List[Dict]:
+    return await _call("get_leaderboard_users", guild_id)
 
+async def get_punishment_page(guild_id: int, user_id: int, page: int, page_size: int) -> Tuple[List[Punishment], int]:
+    return await _call("get_punishment_page", guild_id, user_id, page, page_size)
 
-    punishments = sorted(user_data.get('punishments', []), key=lambda p: p['timestamp'], reverse=True)
-    
-    remaining_deduction = points_to_deduct
-    updated_punishments = []
+async def get_archive_page(guild_id: int, user_id: int, page: int, page_size: int) -> Tuple[List[Punishment], int]:
+    return await _call("get_archive_page", guild_id, user_id, page, page_size)
 
-    for punishment in punishments:
-        points = punishment.get('points', 0)
-        if remaining_deduction > 0:
-            if points <= remaining_deduction:
+async def archive_expired_history(batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    return await _call("archive_expired_history", batch_size)
 
-                remaining_deduction -= points
+async def set_member_present(guild_id: int, user_id: int, present: bool) -> None:
+    await _mutate("set_member_present", guild_id, user_id, present)
 
-            else:
+async def add_pending_report(report: Dict, timeout: float):
+    return await _call("add_pending_report", report, timeout)
 
-                punishment['points'] -= remaining_deduction
-                remaining_deduction = 0
-                updated_punishments.append(punishment)
-        else:
-            # No more points to deduct, just keep the record as is.
-            updated_punishments.append(punishment)
+async def pop_pending_report(reporter_id: int) -> Optional[Dict]:
+    return await _call("pop_pending_report", reporter_id)
 
-    updated_punishments.sort(key=lambda p: p['timestamp'])
+async def expire_pending_report(report_id) -> bool:
+    return await _call("expire_pending_report", report_id)
 
-    new_total_points = sum(p.get('points', 0) for p in updated_punishments)
+async def add_timer(guild_id: int, user_id: int, role_id: int, due_at: datetime, reason: str, notify: bool = False):
+    """Persist a scheduled role removal so it survives restarts and shard moves; returns its id."""
+    ids = await add_timers([{"guild_id": guild_id, "user_id": user_id, "role_id": role_id,
+                             "due_at": due_at, "reason": reason, "notify": notify}])
+    return ids[0]
 
-    await users_collection.update_one(
-        {"guild_id": guild_id, "user_id": user_id},
-        {
-            "$set": {
-                "punishments": updated_punishments,
-                "total_points": new_total_points
-            }
-        }
-    )
-    
-    return new_total_points
+async def add_timers(timers: List[Dict]) -> List:
+    # ids are assigned here so a journaled timer can still be started and deleted by id
+    for timer in timers:
+        timer.setdefault("_id", ObjectId())
+    await _mutate("add_timers", timers)
+    return [timer["_id"] for timer in timers]
 
-async def get_leaderboard_users(guild_id: int) -> List[Dict]:
-    """
-    Gets users for the leaderboard, sorted by points accumulated in the last 20 days.
-    """
-    expiry_date = datetime.utcnow() - timedelta(days=20)
-    
+async def get_timers(guild_ids: List[int]) -> List[Dict]:
+    return await _call("get_timers", guild_ids)
+
+async def delete_timer(timer_id) -> None:
+    await _mutate("delete_timer", timer_id)
+
+async def add_ban_vote(vote: Dict):
+    # the id is assigned here, as for timers, so a journaled vote can still be run and deleted by id
+    vote.setdefault("_id", ObjectId())
+    await _mutate("add_ban_vote", vote)
+    return vote["_id"]
+
+async def get_ban_votes(guild_ids: List[int]) -> List[Dict]:
+    return await _call("get_ban_votes", guild_ids)
+
+async def open_ban_vote(vote_id, message_id: int, closes_at: datetime) -> None:
+    await _mutate("open_ban_vote", vote_id, message_id, closes_at)
 
-    pipeline = [
+async def delete_ban_vote(vote_id) -> None:
+    await _mutate("delete_ban_vote", vote_id)
 
-        {"$match": {"guild_id": guild_id}},
-        
+async def claim_event(kind: str, *ids: int) -> bool:
+    # unclaimable while the database is down: every replica acts, since a
+    # duplicate beats moderation that nobody carries out
+    try:
+        return await _best_effort("claim_event", True, kind, *ids)
+    except UNAVAILABLE_ERRORS:
+        return True
 
-        {"$unwind": "$punishments"},
+async def record_daily_stat(guild_id: int, category: str, mod_id: Optional[int] = None,
+                            channel_id: Optional[int] = None, when: Optional[datetime] = None,
+                            count: int = 1) -> None:
+    # pin the day now; a replay could land on the next one
+    await _mutate("record_daily_stat", guild_id, category, mod_id, channel_id, when or datetime.utcnow(), count)
 
-        {"$match": {"punishments.timestamp": {"$gte": expiry_date}}},
-        
+async def get_daily_stats(guild_id: int, days: int) -> List[Dict]:
+    return await _call("get_daily_stats", guild_id, days)
 
-        {"$group": {
-            "_id": "$user_id",
-            "recent_points": {"$sum": "$punishments.points"}
-        }},
-        
+async def add_report(guild_id: int, reported_user_id: int, reporter_id: int, channel_id: int,
+                     message_id: int, content: Optional[str], reason: str) -> None:
+    await _mutate("add_report", guild_id, reported_user_id, reporter_id, channel_id, message_id, content, reason)
 
-        {"$match": {"recent_points": {"$gt": 0}}},
-        
+async def get_reports(guild_id: int, reported_user_id: int, limit: int = 5) -> Tuple[int, List[Dict]]:
+    return await _call("get_reports", guild_id, reported_user_id, limit)
 
-        {"$sort": {"recent_points": -1}},
-        
-        {"$project": {
-            "user_id": "$_id",
-            "total_points": "$recent_points", 
-            "_id": 0
-        }}
-    ]
-    
+async def add_evidence(message: Dict, files: List[Dict]) -> None:
+    await _mutate("add_evidence", message, files)
 
-    cursor = users_collection.aggregate(pipeline)
-    return await cursor.to_list(length=None)
\ No newline at end of file
+async def get_evidence(guild_id: int, message_id: int) -> Optional[Dict]:
+    return await _call("get_evidence", guild_id, message_id)
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import aiofiles
+import aiofiles.os
+import aiohttp
+
+from utils import db
+
+EVIDENCE_DIR = os.getenv("EVIDENCE_DIR", "evidence")
+MAX_ATTACHMENT_BYTES = 25 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+RETENTION_DAYS = db.EVIDENCE_RETENTION_DAYS
+SWEEP_INTERVAL = 3600  # seconds between retention sweeps
+
+
+class EvidenceStore:
+    """Saves attachments of reported messages to disk in the background.
+
+    Jobs go through a bounded queue drained by a fixed number of workers, so
+    report handling only pays for a `put_nowait`. Files are streamed in chunks,
+    named by their SHA-256 so the same file reported twice is stored once, and
+    removed after RETENTION_DAYS by a periodic sweep.
+    """
+
+    def __init__(self, workers: int = 3, queue_size: int = 100, save_content: bool = True):
+        self.workers = workers
+        self.save_content = save_content
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        await aiofiles.os.makedirs(os.path.join(EVIDENCE_DIR, "tmp"), exist_ok=True)
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._session:
+            await self._session.close()
+
+    def submit(self, message) -> bool:
+        """Queue a reported message for capture; False if the queue is full."""
+        if not message.attachments and not self.save_content:
+            return False
+        job = {
+            "guild_id": message.guild.id,
+            "channel_id": message.channel.id,
+            "message_id": message.id,
+            "author_id": message.author.id,
+            "content": message.content if self.save_content else None,
+            "attachments": [
+                {"url": a.url, "filename": a.filename, "size": a.size, "content_type": a.content_type}
+                for a in message.attachments
+            ],
+        }
+        try:
+            self.queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            print(f"[ERROR] evidence queue full, skipping message {message.id}")
+            return False
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                files = []
+                for attachment in job["attachments"]:
+                    saved = await self._download(attachment)
+                    if saved:
+                        files.append(saved)
+                await db.add_evidence(job, files)
+            except Exception as e:
+                print(f"[ERROR] evidence capture failed for message {job['message_id']}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _download(self, attachment: Dict) -> Optional[Dict]:
+        if attachment["size"] > MAX_ATTACHMENT_BYTES:
+            print(f"[DEBUG] skipping {attachment['filename']}: {attachment['size']} bytes over cap")
+            return None
+
+        tmp_path = os.path.join(EVIDENCE_DIR, "tmp", uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with self._session.get(attachment["url"]) as resp:
+                resp.raise_for_status()
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > MAX_ATTACHMENT_BYTES:
+                            raise ValueError("attachment grew past the size cap")
+                        digest.update(chunk)
+                        await f.write(chunk)
+        except Exception as e:
+            print(f"[ERROR] could not download {attachment['filename']}: {e}")
+            if await aiofiles.os.path.exists(tmp_path):
+                await aiofiles.os.remove(tmp_path)
+            return None
+
+        sha256 = digest.hexdigest()
+        ext = os.path.splitext(attachment["filename"])[1][:16]
+        final_dir = os.path.join(EVIDENCE_DIR, sha256[:2])
+        final_path = os.path.join(final_dir, sha256 + ext)
+        await aiofiles.os.makedirs(final_dir, exist_ok=True)
+        if await aiofiles.os.path.exists(final_path):
+            # already captured for an earlier report; refresh its retention clock
+            await aiofiles.os.remove(tmp_path)
+            os.utime(final_path)
+        else:
+            await aiofiles.os.replace(tmp_path, final_path)
+
+        return {
+            "filename": attachment["filename"],
+            "content_type": attachment["content_type"],
+            "size": size,
+            "sha256": sha256,
+            "path": final_path,
+        }
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                removed = await asyncio.to_thread(sweep, RETENTION_DAYS)
+                if removed:
+                    print(f"[DEBUG] evidence sweep removed {removed} files")
+            except Exception as e:
+                print(f"[ERROR] evidence sweep failed: {e}")
+            await asyncio.sleep(SWEEP_INTERVAL)
+
+
+def sweep(retention_days: int) -> int:
+    """Delete stored files not written or re-referenced within the retention window."""
+    cutoff = time.time() - retention_days * 86400
+    removed = 0
+    for root, _, files in os.walk(EVIDENCE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.stat(path).st_mtime < cutoff:
+                os.remove(path)
+                removed += 1
+    return removed
@@ -0,0 +1,167 @@
+"""Stream a guild's moderation records to JSONL or CSV.
+
+Usage: python -m utils.export GUILD_ID [-o FILE] [--format jsonl|csv]
+                              [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--user ID ...]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import aiofiles
+
+from utils import db
+
+EXPORT_BATCH_SIZE = 500
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = ["guild_id", "user_id", "type", "timestamp", "reason", "points", "mod_id", "warning_count"]
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _in_range(field: str, since: Optional[datetime], until: Optional[datetime]) -> Dict:
+    """$filter expression keeping array entries whose timestamp is in [since, until)."""
+    conditions = []
+    if since:
+        conditions.append({"$gte": ["$$e.timestamp", since]})
+    if until:
+        conditions.append({"$lt": ["$$e.timestamp", until]})
+    entries = {"$ifNull": [f"${field}", []]}
+    if not conditions:
+        return entries
+    return {"$filter": {"input": entries, "as": "e", "cond": {"$and": conditions}}}
+
+
+def export_cursor(guild_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  user_ids: Optional[Iterable[int]] = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """Cursor over a guild's Users records with history trimmed to the date range on the server."""
+    match = {"guild_id": guild_id}
+    if user_ids:
+        match["user_id"] = {"$in": list(user_ids)}
+    if since or until:
+        window = {}
+        if since:
+            window["$gte"] = since
+        if until:
+            window["$lt"] = until
+        match["$or"] = [{"punishments.timestamp": window}, {"warnings.timestamp": window}, {"has_archive": True}]
+
+    archived_match = {"$expr": {"$and": [
+        {"$eq": ["$guild_id", "$$guild_id"]},
+        {"$eq": ["$user_id", "$$user_id"]},
+    ]}}
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"user_id": 1}},
+        # older punishments live in UsersArchive; fold them back in, oldest first
+        {"$lookup": {
+            "from": "UsersArchive",
+            "let": {"guild_id": "$guild_id", "user_id": "$user_id"},
+            "pipeline": [
+                {"$match": archived_match},
+                {"$sort": {"timestamp": 1}},
+                {"$project": {"_id": 0, "guild_id": 0, "user_id": 0, "archived_at": 0}},
+            ],
+            "as": "archived",
+        }},
+        {"$set": {"punishments": {"$concatArrays": ["$archived", {"$ifNull": ["$punishments", []]}]}}},
+        {"$project": {
+            "_id": 0,
+            "guild_id": 1,
+            "user_id": 1,
+            "total_points": 1,
+            "punishments": _in_range("punishments", since, until),
+            "warnings": _in_range("warnings", since, until),
+        }},
+    ]
+    if since or until:
+        # archived users matched regardless of dates; drop those with nothing in range
+        pipeline.append({"$match": {"$or": [{"punishments.0": {"$exists": True}}, {"warnings.0": {"$exists": True}}]}})
+    return db.get_database()["Users"].aggregate(pipeline, batchSize=batch_size)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def record_to_jsonl(record: Dict) -> str:
+    return json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+
+
+def record_to_csv_rows(record: Dict) -> List[Dict]:
+    """One row per punishment or warning."""
+    rows = []
+    for kind in ("punishments", "warnings"):
+        for entry in record.get(kind) or []:
+            ts = entry.get("timestamp")
+            rows.append({
+                "guild_id": record["guild_id"],
+                "user_id": record["user_id"],
+                "type": kind[:-1],
+                "timestamp": ts.isoformat() if isinstance(ts, datetime) else ts,
+                "reason": entry.get("reason"),
+                "points": entry.get("points", 0),
+                "mod_id": entry.get("mod_id"),
+                "warning_count": entry.get("warning_count"),
+            })
+    return rows
+
+
+async def export_records(guild_id: int, path: str, fmt: str = "jsonl", since: Optional[datetime] = None,
+                         until: Optional[datetime] = None, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Write matching records to `path` one batch at a time and return how many
+    records were exported. Memory use is bounded by the cursor batch size.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}")
+
+    count = 0
+    cursor = export_cursor(guild_id, since, until, user_ids)
+    async with aiofiles.open(path, "w", encoding="utf-8", newline="") as f:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+
+        async for record in cursor:
+            if writer:
+                writer.writerows(record_to_csv_rows(record))
+            else:
+                buffer.write(record_to_jsonl(record))
+            count += 1
+            if count % EXPORT_BATCH_SIZE == 0:
+                await f.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+
+        await f.write(buffer.getvalue())
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a guild's moderation records.")
+    parser.add_argument("guild_id", type=int)
+    parser.add_argument("-o", "--output", help="output file (default: <guild_id>.<format>)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--since", help="only entries at or after this ISO date")
+    parser.add_argument("--until", help="only entries before this ISO date")
+    parser.add_argument("--user", type=int, action="append", dest="users", help="limit to a user id (repeatable)")
+    args = parser.parse_args()
+
+    output = args.output or f"{args.guild_id}.{args.format}"
+    count = asyncio.run(export_records(
+        args.guild_id, output, args.format, parse_date(args.since), parse_date(args.until), args.users
+    ))
+    print(f"Exported {count} records to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from utils import db
+
+LEASE_TTL = float(os.getenv("LEASE_TTL", 15))  # seconds a holder keeps the lease without renewing
+RENEW_FRACTION = 3      # renew (or try to take over) LEASE_TTL / 3 seconds apart
+LEASE_OP_TIMEOUT = 3.0  # a renewal slower than this counts as failed
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _leases():
+    return db.get_database()["Leases"]
+
+
+async def ensure_lease_indexes():
+    # lookups are by _id only. Lease documents must never be deleted, or `term`
+    # restarts at 1, so drop the TTL index earlier versions created.
+    if "expires_at_1" in await _leases().index_information():
+        await _leases().drop_index("expires_at_1")
+
+
+class Lease:
+    """A named lease in Mongo; whoever holds it runs the singleton jobs it guards.
+
+    Expiry uses the server's clock ($$NOW), so hosts with skewed clocks agree
+    on who holds it. The holder renews every ttl / RENEW_FRACTION seconds;
+    everyone else tries to take over on the same schedule once it lapses.
+    The holder also tracks a local deadline (ttl after its last successful
+    renewal was sent, on its own monotonic clock) and steps down when that
+    passes, so a holder cut off from Mongo stops before anyone else can
+    start. `term` goes up on every change of holder and can fence writes;
+    lease documents are never deleted (release only marks them expired), so
+    it never goes back.
+
+    With the in-memory storage backend there is nobody to share with, so the
+    lease is simply held. Callbacks run inside the renewal loop and must not
+    block; start a task for anything long.
+    """
+
+    def __init__(self, name: str, ttl: float = LEASE_TTL):
+        self.name = name
+        self.ttl = ttl
+        self.term: Optional[int] = None
+        self._held_until = 0.0
+        self._local = False
+        self._task: Optional[asyncio.Task] = None
+        self._elected: List[Callable[[], Awaitable[None]]] = []
+        self._demoted: List[Callable[[], Awaitable[None]]] = []
+        self._leader_event = asyncio.Event()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._local or time.monotonic() < self._held_until
+
+    def on_elected(self, callback: Callable[[], Awaitable[None]]):
+        self._elected.append(callback)
+
+    def on_demoted(self, callback: Callable[[], Awaitable[None]]):
+        self._demoted.append(callback)
+
+    async def wait_until_leader(self):
+        await self._leader_event.wait()
+
+    def start(self):
+        """Begin competing for the lease; call once the storage backend is settled."""
+        from utils.memory_backend import MemoryBackend
+        self._local = isinstance(db.get_backend(), MemoryBackend)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _try_acquire(self) -> bool:
+        sent = time.monotonic()
+        ttl_ms = int(self.ttl * 1000)
+        try:
+            doc = await asyncio.wait_for(_leases().find_one_and_update(
+                {"_id": self.name, "$or": [{"holder": INSTANCE_ID}, {"$expr": {"$lt": ["$expires_at", "$$NOW"]}}]},
+                [{"$set": {
+                    "term": {"$cond": [{"$eq": ["$holder", INSTANCE_ID]}, "$term", {"$add": [{"$ifNull": ["$term", 0]}, 1]}]},
+                    "holder": INSTANCE_ID,
+                    "expires_at": {"$add": ["$$NOW", ttl_ms]},
+                }}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            ), LEASE_OP_TIMEOUT)
+        except DuplicateKeyError:
+            return False  # someone else holds it, so the upsert collided with their document
+        except (asyncio.TimeoutError, PyMongoError) as e:
+            print(f"[ERROR] lease {self.name} renewal failed: {e!r}")
+            return False
+        self.term = doc["term"]
+        self._held_until = sent + self.ttl
+        return True
+
+    async def _run(self):
+        if self._local:
+            self._leader_event.set()
+            await self._fire(self._elected)
+            return
+        try:
+            await asyncio.wait_for(ensure_lease_indexes(), LEASE_OP_TIMEOUT)
+        except (asyncio.TimeoutError, PyMongoError) as e:
+            print(f"[ERROR] could not create lease indexes: {e!r}")
+        leader = False
+        while True:
+            acquired = await self._try_acquire()
+            if acquired and not leader:
+                leader = True
+                self._leader_event.set()
+                print(f"[DEBUG] {INSTANCE_ID} holds lease {self.name} (term {self.term})")
+                await self._fire(self._elected)
+            elif leader and not self.is_leader:
+                leader = False
+                self._leader_event.clear()
+                print(f"[WARN] {INSTANCE_ID} lost lease {self.name}")
+                await self._fire(self._demoted)
+            # a holder that missed a renewal retries before its local deadline passes
+            await asyncio.sleep(self.ttl / RENEW_FRACTION)
+
+    async def _fire(self, callbacks):
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                print(f"[ERROR] lease {self.name} callback failed: {e}")
+
+    async def release(self):
+        """Give the lease up so a standby takes over on its next attempt instead of waiting out the TTL."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        was_leader = self.is_leader
+        self._held_until = 0.0
+        self._leader_event.clear()
+        if self._local or not was_leader:
+            return
+        await self._fire(self._demoted)
+        try:
+            # expire rather than delete, so the next holder's term follows this one
+            await asyncio.wait_for(_leases().update_one(
+                {"_id": self.name, "holder": INSTANCE_ID},
+                [{"$set": {"expires_at": "$$NOW"}}],
+            ), LEASE_OP_TIMEOUT)
+        except (asyncio.TimeoutError, PyMongoError) as e:
+            print(f"[ERROR] could not release lease {self.name}: {e!r}")
+
+
+def is_leader(bot, lease: str = "scheduler_lease") -> bool:
+    """True when this process should run the bot's singleton jobs (or has no lease at all)."""
+    held = getattr(bot, lease, None)
+    return held is None or held.is_leader
@@ -0,0 +1,30 @@
+import asyncio
+import weakref
+from typing import Hashable
+
+
+class KeyedLocks:
+    """One asyncio.Lock per key, created on demand.
+
+    Locks are held in a WeakValueDictionary: while a coroutine holds or waits
+    on a lock it stays referenced, and once nobody does the entry disappears,
+    so the registry only ever contains keys that are currently in use.
+    """
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __call__(self, key: Hashable) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+# (guild_id, user_id) -> lock serializing moderation changes to one member.
+# Only protects this process; utils/db.py version checks cover other processes.
+member_locks = KeyedLocks()
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+SAMPLE_INTERVAL = 0.25   # seconds between lag samples
+STALL_THRESHOLD = 0.1    # seconds the loop may go without running before it counts as blocked
+LAG_WINDOW = 2400        # lag samples kept for percentiles (10 minutes at SAMPLE_INTERVAL)
+STALLS_KEPT = 20         # blocked-loop reports kept for /health
+STACK_DEPTH = 12         # innermost frames kept per report
+
+
+def loop_debug_enabled() -> bool:
+    return os.getenv("LOOP_DEBUG", "0").lower() in ("1", "true", "yes")
+
+
+def install_event_loop_policy() -> Optional[str]:
+    """Switch asyncio to uvloop when UVLOOP=1; returns the policy name in use."""
+    if os.getenv("UVLOOP", "0").lower() not in ("1", "true", "yes"):
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        print("[WARN] UVLOOP=1 but uvloop is not installed; using the default event loop")
+        return None
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects asyncio debug mode's "Executing <handle> took N seconds" warnings."""
+
+    def __init__(self, monitor: "LoopMonitor"):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord):
+        if isinstance(record.msg, str) and record.msg.startswith("Executing") and len(record.args) == 2:
+            handle, seconds = record.args
+            self.monitor.stalls.append({
+                "at": datetime.utcnow().isoformat(timespec="seconds"),
+                "blocked_ms": round(seconds * 1000, 1),
+                "callback": repr(handle)[:500],
+            })
+
+
+class LoopMonitor:
+    """Measures event-loop lag and reports what is blocking the loop.
+
+    A task sleeps SAMPLE_INTERVAL at a time and records how late it wakes up.
+    A watchdog thread watches the same tick: once the loop has not run for
+    `stall_threshold`, it grabs the loop thread's current stack, which is the
+    synchronous code holding it (a blocking driver call, a long print, a big
+    embed build). With LOOP_DEBUG=1 asyncio's own slow-callback warnings are
+    collected too; debug mode is too costly to leave on in production.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, stall_threshold: float = STALL_THRESHOLD,
+                 debug: Optional[bool] = None):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.debug = loop_debug_enabled() if debug is None else debug
+        self.lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.stalls: Deque[Dict] = deque(maxlen=STALLS_KEPT)
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._pending_stall: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._log_handler: Optional[logging.Handler] = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        if self.debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.stall_threshold
+            self._log_handler = _SlowCallbackHandler(self)
+            logging.getLogger("asyncio").addHandler(self._log_handler)
+        self._task = loop.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+        if self._log_handler:
+            logging.getLogger("asyncio").removeHandler(self._log_handler)
+            self._log_handler = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_tick = time.monotonic()
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            stall = self._pending_stall
+            if stall is not None:
+                # the watchdog saw the start of this stall; now we know how long it lasted
+                self._pending_stall = None
+                stall["blocked_ms"] = round(lag * 1000, 1)
+                print(f"[WARN] event loop blocked for {stall['blocked_ms']:.0f}ms at:\n" + "".join(stall["stack"]))
+
+    def _watch(self):
+        while not self._stopped.wait(self.stall_threshold / 2):
+            blocked = time.monotonic() - self._last_tick - self.interval
+            if blocked < self.stall_threshold or self._pending_stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stall = {
+                "at": datetime.utcnow().isoformat(timespec="seconds"),
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": traceback.format_stack(frame)[-STACK_DEPTH:],
+            }
+            self.stall_count += 1
+            self.stalls.append(stall)
+            self._pending_stall = stall
+
+    def _percentile(self, q: float) -> float:
+        if not self.lags:
+            return 0.0
+        ordered = sorted(list(self.lags))  # /health calls this from the web server's thread
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    def summary(self) -> Dict:
+        """Headline numbers, small enough for a cluster heartbeat."""
+        return {
+            "lag_p50_ms": round(self._percentile(0.5) * 1000, 1),
+            "lag_p99_ms": round(self._percentile(0.99) * 1000, 1),
+            "lag_max_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stall_count,
+        }
+
+    def metrics(self) -> Dict:
+        """summary() plus the most recent blocked-loop reports with their stacks."""
+        recent: List[Dict] = list(self.stalls)[-5:]
+        return dict(self.summary(), recent_stalls=recent, loop_policy=type(asyncio.get_event_loop_policy()).__module__)
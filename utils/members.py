@@ -0,0 +1,61 @@
+import asyncio
+import os
+from typing import Dict, Iterable, Optional
+
+import discord
+
+QUERY_BATCH = 100  # max user_ids per gateway member query
+
+
+def low_memory_enabled() -> bool:
+    return os.getenv("LOW_MEMORY", "0").lower() in ("1", "true", "yes")
+
+
+def cache_options(low_memory: Optional[bool] = None) -> Dict:
+    """Keyword arguments for the bot's member and message caches.
+
+    Low-memory mode keeps no member cache, skips chunking at startup and
+    shrinks the message cache; members are fetched on demand instead.
+    """
+    if low_memory is None:
+        low_memory = low_memory_enabled()
+    if low_memory:
+        return {
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": int(os.getenv("MAX_MESSAGES", 200)),
+        }
+    return {"max_messages": int(os.getenv("MAX_MESSAGES", 1000))}
+
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    """Cached member if available, otherwise one REST fetch. None if they left."""
+    member = guild.get_member(user_id)
+    if member:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except (discord.NotFound, discord.Forbidden):
+        return None
+
+
+async def resolve_members(guild: discord.Guild, user_ids: Iterable[int]) -> Dict[int, discord.Member]:
+    """Resolve many ids at once; ids missing from the result are not in the guild."""
+    found = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member:
+            found[user_id] = member
+        else:
+            missing.append(user_id)
+
+    for start in range(0, len(missing), QUERY_BATCH):
+        batch = missing[start:start + QUERY_BATCH]
+        try:
+            members = await guild.query_members(user_ids=batch, limit=len(batch), cache=False)
+        except (asyncio.TimeoutError, discord.ClientException):
+            members = [m for m in await asyncio.gather(*(get_or_fetch_member(guild, uid) for uid in batch)) if m]
+        for member in members:
+            found[member.id] = member
+    return found
@@ -0,0 +1,350 @@
+"""In-process implementation of the storage interface.
+
+Records live in dicts indexed the way the Mongo queries are (users by
+guild then user, reports by guild and reported user, rollups by guild and
+day). Every method finishes without awaiting, so each call is atomic on
+the event loop and needs none of MotorBackend's version checks. Nothing
+survives a restart: use it for tests, benchmarks and as a degraded-mode
+fallback.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from utils.db import (
+    ARCHIVE_BATCH_SIZE, EVIDENCE_RETENTION_DAYS, HOT_PUNISHMENT_LIMIT,
+    REPORT_RETENTION_DAYS, day_start,
+)
+from utils.models import Punishment, UserRecord
+from utils.storage import ListCursor, StorageBackend
+
+
+def _new_user(guild_id: int, user_id: int) -> Dict:
+    return {"_id": ObjectId(), "guild_id": guild_id, "user_id": user_id,
+            "total_points": 0, "warnings": [], "punishments": [], "version": 0}
+
+
+def _active_points(punishments: List[Dict], expiry_date: datetime) -> int:
+    return sum(p.get("points", 0) for p in punishments if p["timestamp"] > expiry_date)
+
+
+class MemoryBackend(StorageBackend):
+    def __init__(self):
+        self._users: Dict[int, Dict[int, Dict]] = defaultdict(dict)  # guild_id -> user_id -> record
+        self._archive: Dict[Tuple[int, int], Dict[datetime, Dict]] = defaultdict(dict)
+        self._pending_reports: Dict[ObjectId, Dict] = {}
+        self._timers: Dict[ObjectId, Dict] = {}
+        self._ban_votes: Dict[ObjectId, Dict] = {}
+        self._daily_stats: Dict[Tuple[int, datetime], Dict] = {}
+        self._reports: Dict[Tuple[int, int], List[Dict]] = defaultdict(list)  # oldest first
+        self._evidence: Dict[Tuple[int, int], Dict] = {}
+
+    def _get(self, guild_id: int, user_id: int) -> Optional[Dict]:
+        return self._users.get(guild_id, {}).get(user_id)
+
+    def _get_or_create(self, guild_id: int, user_id: int) -> Dict:
+        guild = self._users[guild_id]
+        if user_id not in guild:
+            guild[user_id] = _new_user(guild_id, user_id)
+        return guild[user_id]
+
+    @staticmethod
+    def _push_punishment(user: Dict, entry: Dict) -> None:
+        punishments = user["punishments"]
+        punishments.append(entry)
+        punishments.sort(key=lambda p: p["timestamp"])
+
+    async def warmup(self) -> float:
+        return 0.0
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    # --- points and warnings ---
+
+    async def add_warning(self, guild_id: int, user_id: int, mod_id: int,
+                          reason: Optional[str] = None, when: Optional[datetime] = None) -> Tuple[int, bool]:
+        user = self._get_or_create(guild_id, user_id)
+        user["warnings"].append({"timestamp": when or datetime.utcnow(), "mod_id": mod_id, "reason": reason})
+        user["present"] = True
+        user["version"] += 1
+        warning_count = len(user["warnings"])
+        return warning_count, warning_count in [2, 3]
+
+    async def add_punishment(self, guild_id: int, user_id: int, reason: str, points: int,
+                             warning_count: int = 0, when: Optional[datetime] = None) -> int:
+        user = self._get_or_create(guild_id, user_id)
+        entry = {"reason": reason, "points": points, "timestamp": when or datetime.utcnow(), "warning_count": warning_count}
+        if warning_count >= 3:
+            user["total_points"] += 1
+            user["warnings"] = []
+        else:
+            user["total_points"] += points
+        self._push_punishment(user, entry)
+        user["present"] = True
+        user["version"] += 1
+        return user["total_points"]
+
+    async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict]:
+        user = self._get(guild_id, user_id)
+        return list(user["warnings"]) if user else []
+
+    async def get_warning_count(self, guild_id: int, user_id: int) -> int:
+        user = self._get(guild_id, user_id)
+        return len(user["warnings"]) if user else 0
+
+    async def clear_warnings(self, guild_id: int, user_id: int) -> bool:
+        user = self._get(guild_id, user_id)
+        if not user:
+            return False
+        user["warnings"] = []
+        user["version"] += 1
+        return True
+
+    async def get_user_info(self, guild_id: int, user_id: int,
+                            recent: Optional[int] = None) -> Optional[UserRecord]:
+        user = self._get(guild_id, user_id)
+        if not user:
+            return None
+        punishments = user["punishments"]
+        if recent is not None:
+            punishments = punishments[-recent:] if recent > 0 else []
+        return UserRecord(dict(user, punishments=list(punishments), warnings=list(user["warnings"])))
+
+    async def clear_points(self, guild_id: int, user_id: int) -> bool:
+        user = self._get(guild_id, user_id)
+        if not user:
+            return False
+        user.update(total_points=0, warnings=[], punishments=[])
+        user["version"] += 1
+        return True
+
+    async def check_expired_points(self, guild_id: int, user_id: int) -> int:
+        user = self._get(guild_id, user_id)
+        if not user:
+            return 0
+        total_points = _active_points(user["punishments"], datetime.utcnow() - timedelta(days=20))
+        if total_points != user["total_points"]:
+            user["total_points"] = total_points
+            user["version"] += 1
+        return total_points
+
+    async def deductpoints(self, guild_id: int, user_id: int, points_to_deduct: int) -> int:
+        user = self._get(guild_id, user_id)
+        if not user or not user["punishments"]:
+            return 0
+        expiry_date = datetime.utcnow() - timedelta(days=20)
+
+        remaining_deduction = points_to_deduct
+        updated_punishments = []
+        for punishment in sorted(user["punishments"], key=lambda p: p["timestamp"], reverse=True):
+            points = punishment.get("points", 0)
+            if remaining_deduction > 0 and punishment["timestamp"] > expiry_date:
+                if points <= remaining_deduction:
+                    remaining_deduction -= points
+                else:
+                    updated_punishments.append(dict(punishment, points=points - remaining_deduction))
+                    remaining_deduction = 0
+            else:
+                updated_punishments.append(punishment)
+
+        updated_punishments.sort(key=lambda p: p["timestamp"])
+        user["punishments"] = updated_punishments
+        user["total_points"] = _active_points(updated_punishments, expiry_date)
+        user["version"] += 1
+        return user["total_points"]
+
+    async def bulk_add_punishments(self, guild_id: int, user_ids: List[int], reason: str,
+                                   points: int, when: Optional[datetime] = None) -> Dict[int, int]:
+        now = datetime.utcnow()
+        when = when or now
+        expiry_date = now - timedelta(days=20)
+        totals = {}
+        for user_id in user_ids:
+            user = self._get_or_create(guild_id, user_id)
+            user["total_points"] = _active_points(user["punishments"], expiry_date) + points
+            self._push_punishment(user, {"reason": reason, "points": points, "timestamp": when, "warning_count": 0})
+            user["present"] = True
+            user["version"] += 1
+            totals[user_id] = user["total_points"]
+        return totals
+
+    # --- leaderboard and history ---
+
+    def get_leaderboard_cursor(self, guild_id: int, batch_size: int = 20,
+                               after: Optional[Tuple[int, int]] = None):
+        expiry_date = datetime.utcnow() - timedelta(days=20)
+        rows = []
+        for user_id, user in self._users.get(guild_id, {}).items():
+            if user.get("present") is False:
+                continue
+            recent_points = sum(p.get("points", 0) for p in user["punishments"] if p["timestamp"] >= expiry_date)
+            if recent_points > 0:
+                rows.append((-recent_points, user_id))
+        rows.sort()
+        if after is not None:
+            last_points, last_user_id = after
+            rows = [r for r in rows if r > (-last_points, last_user_id)]
+        return ListCursor([{"user_id": user_id, "total_points": -points} for points, user_id in rows])
+
+    async def get_leaderboard_users(self, guild_id: int) -> List[Dict]:
+        return await self.get_leaderboard_cursor(guild_id).to_list(length=None)
+
+    async def get_punishment_page(self, guild_id: int, user_id: int, page: int,
+                                  page_size: int) -> Tuple[List[Punishment], int]:
+        user = self._get(guild_id, user_id)
+        entries = user["punishments"] if user else []
+        newest_first = entries[::-1][page * page_size:(page + 1) * page_size]
+        return [Punishment(p) for p in newest_first], len(entries)
+
+    async def get_archive_page(self, guild_id: int, user_id: int, page: int,
+                               page_size: int) -> Tuple[List[Punishment], int]:
+        archived = self._archive.get((guild_id, user_id), {})
+        newest_first = sorted(archived, reverse=True)[page * page_size:(page + 1) * page_size]
+        return [Punishment(archived[ts]) for ts in newest_first], len(archived)
+
+    async def archive_expired_history(self, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=20)
+        now = datetime.utcnow()
+        moved = 0
+        for guild in self._users.values():
+            for user in guild.values():
+                punishments = user["punishments"]  # kept sorted by _push_punishment
+                overflow = len(punishments) - HOT_PUNISHMENT_LIMIT
+                expired = [p for i, p in enumerate(punishments) if p["timestamp"] < cutoff or i < overflow]
+                if not expired:
+                    continue
+                archive = self._archive[(user["guild_id"], user["user_id"])]
+                for p in expired:
+                    archive.setdefault(p["timestamp"], dict(p, archived_at=now))
+                user["punishments"] = punishments[len(expired):]
+                user["has_archive"] = True
+                user["version"] += 1
+                moved += len(expired)
+        return moved
+
+    async def set_member_present(self, guild_id: int, user_id: int, present: bool) -> None:
+        user = self._get(guild_id, user_id)
+        if user:
+            user["present"] = present
+
+    # --- pending reports and timers ---
+
+    async def add_pending_report(self, report: Dict, timeout: float):
+        now = datetime.utcnow()
+        doc = dict(report, created_at=now, expires_at=now + timedelta(seconds=timeout))
+        doc.setdefault("_id", ObjectId())
+        self._pending_reports[doc["_id"]] = doc
+        return doc["_id"]
+
+    async def pop_pending_report(self, reporter_id: int) -> Optional[Dict]:
+        now = datetime.utcnow()
+        candidates = [r for r in self._pending_reports.values()
+                      if r["reporter_id"] == reporter_id and r["expires_at"] > now]
+        if not candidates:
+            return None
+        newest = max(candidates, key=lambda r: r["created_at"])
+        return self._pending_reports.pop(newest["_id"])
+
+    async def expire_pending_report(self, report_id) -> bool:
+        return self._pending_reports.pop(report_id, None) is not None
+
+    async def add_timers(self, timers: List[Dict]) -> List:
+        for timer in timers:
+            timer.setdefault("_id", ObjectId())  # insert_many sets _id on the caller's dicts too
+            self._timers[timer["_id"]] = dict(timer)
+        return [timer["_id"] for timer in timers]
+
+    async def get_timers(self, guild_ids: List[int]) -> List[Dict]:
+        wanted = set(guild_ids)
+        return [dict(t) for t in self._timers.values() if t["guild_id"] in wanted]
+
+    async def delete_timer(self, timer_id) -> None:
+        self._timers.pop(timer_id, None)
+
+    async def add_ban_vote(self, vote: Dict):
+        vote.setdefault("_id", ObjectId())
+        self._ban_votes[vote["_id"]] = dict(vote)
+        return vote["_id"]
+
+    async def get_ban_votes(self, guild_ids: List[int]) -> List[Dict]:
+        wanted = set(guild_ids)
+        return [dict(v) for v in self._ban_votes.values() if v["guild_id"] in wanted]
+
+    async def open_ban_vote(self, vote_id, message_id: int, closes_at: datetime) -> None:
+        vote = self._ban_votes.get(vote_id)
+        if vote:
+            vote.update(message_id=message_id, closes_at=closes_at)
+
+    async def delete_ban_vote(self, vote_id) -> None:
+        self._ban_votes.pop(vote_id, None)
+
+    async def claim_event(self, kind: str, *ids: int) -> bool:
+        return True  # one process, so nobody to share events with
+
+    # --- stats, reports and evidence ---
+
+    async def record_daily_stat(self, guild_id: int, category: str, mod_id: Optional[int] = None,
+                                channel_id: Optional[int] = None, when: Optional[datetime] = None,
+                                count: int = 1) -> None:
+        day = day_start(when or datetime.utcnow())
+        stats = self._daily_stats.get((guild_id, day))
+        if stats is None:
+            stats = self._daily_stats[(guild_id, day)] = {
+                "guild_id": guild_id, "day": day, "total": 0, "categories": {}, "moderators": {}, "channels": {}
+            }
+        stats["total"] += count
+        stats["categories"][category] = stats["categories"].get(category, 0) + count
+        if mod_id is not None:
+            stats["moderators"][str(mod_id)] = stats["moderators"].get(str(mod_id), 0) + count
+        if channel_id is not None:
+            stats["channels"][str(channel_id)] = stats["channels"].get(str(channel_id), 0) + count
+
+    async def get_daily_stats(self, guild_id: int, days: int) -> List[Dict]:
+        since = day_start(datetime.utcnow()) - timedelta(days=days - 1)
+        return [dict(stats) for (guild, day), stats in sorted(self._daily_stats.items(), key=lambda kv: kv[0][1])
+                if guild == guild_id and day >= since]
+
+    async def add_report(self, guild_id: int, reported_user_id: int, reporter_id: int, channel_id: int,
+                         message_id: int, content: Optional[str], reason: str) -> None:
+        self._reports[(guild_id, reported_user_id)].append({
+            "_id": ObjectId(),
+            "guild_id": guild_id,
+            "reported_user_id": reported_user_id,
+            "reporter_id": reporter_id,
+            "channel_id": channel_id,
+            "message_id": message_id,
+            "content": content,
+            "reason": reason,
+            "created_at": datetime.utcnow()
+        })
+
+    async def get_reports(self, guild_id: int, reported_user_id: int,
+                          limit: int = 5) -> Tuple[int, List[Dict]]:
+        cutoff = datetime.utcnow() - timedelta(days=REPORT_RETENTION_DAYS)
+        reports = self._reports.get((guild_id, reported_user_id), [])
+        # the TTL index drops old reports in Mongo; trim the same way here
+        reports[:] = [r for r in reports if r["created_at"] > cutoff]
+        return len(reports), [dict(r) for r in reversed(reports[-limit:])] if limit > 0 else []
+
+    async def add_evidence(self, message: Dict, files: List[Dict]) -> None:
+        key = (message["guild_id"], message["message_id"])
+        self._evidence.setdefault(key, {
+            "_id": ObjectId(),
+            "guild_id": message["guild_id"],
+            "message_id": message["message_id"],
+            "channel_id": message["channel_id"],
+            "author_id": message["author_id"],
+            "content": message.get("content"),
+            "files": files,
+            "created_at": datetime.utcnow()
+        })
+
+    async def get_evidence(self, guild_id: int, message_id: int) -> Optional[Dict]:
+        evidence = self._evidence.get((guild_id, message_id))
+        if evidence and evidence["created_at"] <= datetime.utcnow() - timedelta(days=EVIDENCE_RETENTION_DAYS):
+            del self._evidence[(guild_id, message_id)]
+            return None
+        return dict(evidence) if evidence else None
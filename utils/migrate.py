@@ -0,0 +1,238 @@
+"""One-shot data fixes and bulk import for the Users collection.
+
+Usage:
+  python -m utils.migrate normalize [--batch-size N] [--dry-run]
+  python -m utils.migrate import FILE.jsonl [--guild-id ID] [--batch-size N]
+  python -m utils.migrate backfill-stats [--batch-size N]
+  python -m utils.migrate archive [--batch-size N]
+
+`normalize` converts legacy string timestamps to BSON dates, drops history
+entries with no usable timestamp, backfills missing `warnings`,
+`punishments` and `total_points`, and recomputes `total_points` from the
+last 20 days.
+`import` loads a file written by `python -m utils.export` (JSONL format),
+replacing existing records for the same guild and user.
+`backfill-stats` builds DailyStats rollups from the history in Users and
+UsersArchive; days that already have a rollup are left alone.
+`archive` moves expired punishments to UsersArchive now instead of waiting
+for the bot's hourly pass; run it once after upgrading.
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+from utils import db
+
+MIGRATION_BATCH_SIZE = 500
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        # stored dates are naive UTC
+        return _to_naive_utc(parsed)
+    return None
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return (value - value.utcoffset()).replace(tzinfo=None)
+
+
+def _normalize_entries(entries) -> Tuple[List[Dict], bool]:
+    """Return entries with datetime timestamps and whether anything changed."""
+    if not isinstance(entries, list):
+        return [], True
+    normalized = []
+    changed = False
+    for entry in entries:
+        if not isinstance(entry, dict):
+            changed = True
+            continue
+        ts = _parse_timestamp(entry.get("timestamp"))
+        if ts is None:
+            changed = True
+            continue
+        if ts is not entry.get("timestamp"):
+            entry = dict(entry, timestamp=ts)
+            changed = True
+        normalized.append(entry)
+    return normalized, changed
+
+
+def normalize_record(record: Dict) -> Optional[Dict]:
+    """Compute the $set needed to normalize one record, or None if it is clean."""
+    fixes = {}
+    punishments, changed = _normalize_entries(record.get("punishments"))
+    if changed or "punishments" not in record:
+        fixes["punishments"] = punishments
+    warnings, changed = _normalize_entries(record.get("warnings"))
+    if changed or "warnings" not in record:
+        fixes["warnings"] = warnings
+
+    expiry_date = datetime.utcnow() - timedelta(days=20)
+    total_points = sum(p.get("points", 0) for p in punishments if p["timestamp"] > expiry_date)
+    if record.get("total_points") != total_points:
+        fixes["total_points"] = total_points
+    return fixes or None
+
+
+async def normalize(batch_size: int = MIGRATION_BATCH_SIZE, dry_run: bool = False) -> Tuple[int, int]:
+    """Scan every record and fix it with unordered bulk writes. Returns (scanned, fixed)."""
+    users = db.get_database()["Users"]
+    scanned = fixed = 0
+    ops = []
+    cursor = users.find({}, {"punishments": 1, "warnings": 1, "total_points": 1}, batch_size=batch_size)
+    async for record in cursor:
+        scanned += 1
+        fixes = normalize_record(record)
+        if fixes:
+            fixed += 1
+            ops.append(UpdateOne({"_id": record["_id"]}, {"$set": fixes, "$inc": {"version": 1}}))
+        if len(ops) >= batch_size:
+            if not dry_run:
+                await users.bulk_write(ops, ordered=False)
+            ops = []
+    if ops and not dry_run:
+        await users.bulk_write(ops, ordered=False)
+    return scanned, fixed
+
+
+def parse_import_line(line: str, guild_id: Optional[int] = None) -> Dict:
+    record = json.loads(line)
+    if guild_id is not None:
+        record["guild_id"] = guild_id
+    record.pop("_id", None)
+    record.pop("present", None)
+    fixes = normalize_record(record)
+    if fixes:
+        record.update(fixes)
+    return record
+
+
+async def import_jsonl(path: str, guild_id: Optional[int] = None, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """Upsert every record in an exported JSONL file. Returns the number imported."""
+    users = db.get_database()["Users"]
+    imported = 0
+    ops = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = parse_import_line(line, guild_id)
+            ops.append(ReplaceOne(
+                {"guild_id": record["guild_id"], "user_id": record["user_id"]},
+                record,
+                upsert=True
+            ))
+            if len(ops) >= batch_size:
+                await users.bulk_write(ops, ordered=False)
+                imported += len(ops)
+                ops = []
+    if ops:
+        await users.bulk_write(ops, ordered=False)
+        imported += len(ops)
+    return imported
+
+
+def _stats_category(reason: Optional[str]) -> str:
+    # the third advisory warning is stored as an "advisory_conversion" punishment
+    if not reason or reason.startswith("advisory"):
+        return "advisory"
+    return reason
+
+
+async def backfill_stats(batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Rebuild per-day rollups from hot and archived history. Channels were never stored
+    on history entries, so only category and moderator counts are recovered.
+    Returns the number of rollup documents created.
+    """
+    users = db.get_database()["Users"]
+    days: Dict[Tuple[int, datetime], Dict[str, Counter]] = defaultdict(
+        lambda: {"categories": Counter(), "moderators": Counter()}
+    )
+    cursor = users.find({}, {"guild_id": 1, "punishments": 1, "warnings": 1}, batch_size=batch_size)
+    async for record in cursor:
+        events = [(p.get("timestamp"), p.get("reason"), None) for p in record.get("punishments") or []]
+        events += [(w.get("timestamp"), "advisory", w.get("mod_id")) for w in record.get("warnings") or []]
+        for ts, reason, mod_id in events:
+            if not isinstance(ts, datetime):
+                continue
+            counts = days[(record["guild_id"], db.day_start(ts))]
+            counts["categories"][_stats_category(reason)] += 1
+            if mod_id is not None:
+                counts["moderators"][str(mod_id)] += 1
+
+    archive = db.get_database()["UsersArchive"].find({}, {"guild_id": 1, "timestamp": 1, "reason": 1}, batch_size=batch_size)
+    async for entry in archive:
+        days[(entry["guild_id"], db.day_start(entry["timestamp"]))]["categories"][_stats_category(entry.get("reason"))] += 1
+
+    ops = [
+        UpdateOne(
+            {"guild_id": guild_id, "day": day},
+            {"$setOnInsert": {
+                "total": sum(counts["categories"].values()),
+                "categories": dict(counts["categories"]),
+                "moderators": dict(counts["moderators"]),
+                "channels": {},
+                "backfilled": True
+            }},
+            upsert=True
+        )
+        for (guild_id, day), counts in days.items()
+    ]
+    created = 0
+    for start in range(0, len(ops), batch_size):
+        result = await db.get_database()["DailyStats"].bulk_write(ops[start:start + batch_size], ordered=False)
+        created += result.upserted_count
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize or import Users records.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    normalize_parser = sub.add_parser("normalize", help="fix legacy timestamps and missing fields")
+    normalize_parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    normalize_parser.add_argument("--dry-run", action="store_true", help="report without writing")
+
+    import_parser = sub.add_parser("import", help="load a JSONL export")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--guild-id", type=int, help="import into this guild instead of the exported one")
+    import_parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+
+    stats_parser = sub.add_parser("backfill-stats", help="build DailyStats rollups from history")
+    stats_parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+
+    archive_parser = sub.add_parser("archive", help="move expired punishments to UsersArchive")
+    archive_parser.add_argument("--batch-size", type=int, default=db.ARCHIVE_BATCH_SIZE)
+
+    args = parser.parse_args()
+    if args.command == "backfill-stats":
+        created = asyncio.run(backfill_stats(args.batch_size))
+        print(f"Created {created} daily rollups")
+    elif args.command == "archive":
+        moved = asyncio.run(db.archive_expired_history(args.batch_size))
+        print(f"Archived {moved} expired punishments")
+    elif args.command == "normalize":
+        scanned, fixed = asyncio.run(normalize(args.batch_size, args.dry_run))
+        print(f"Scanned {scanned} records, {'would fix' if args.dry_run else 'fixed'} {fixed}")
+    else:
+        imported = asyncio.run(import_jsonl(args.path, args.guild_id, args.batch_size))
+        print(f"Imported {imported} records from {args.path}")
+
+
+if __name__ == "__main__":
+    main()
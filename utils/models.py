@@ -0,0 +1,158 @@
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+# Collections read with these options hand back undecoded BSON; fields are
+# only turned into Python objects when a model property touches them.
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+# BSON value sizes by element type, for walking a document without decoding it
+_FIXED_SIZE = {0x01: 8, 0x06: 0, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4,
+               0x11: 8, 0x12: 8, 0x13: 16, 0x7F: 0, 0xFF: 0}
+_STRING_TYPES = (0x02, 0x0D, 0x0E)   # int32 length + bytes
+_DOCUMENT_TYPES = (0x03, 0x04, 0x0F)  # int32 total length
+
+_INT32 = struct.Struct("<i")
+
+
+def _elements(data: bytes, start: int = 0):
+    """Yield (type, key, value offset, end offset) for each element of the document at `start`."""
+    end = start + _INT32.unpack_from(data, start)[0] - 1
+    pos = start + 4
+    while pos < end:
+        kind = data[pos]
+        key_end = data.index(b"\x00", pos + 1)
+        value = key_end + 1
+        if kind in _FIXED_SIZE:
+            size = _FIXED_SIZE[kind]
+        elif kind in _STRING_TYPES:
+            size = 4 + _INT32.unpack_from(data, value)[0]
+        elif kind in _DOCUMENT_TYPES:
+            size = _INT32.unpack_from(data, value)[0]
+        elif kind == 0x05:  # binary: int32 length + subtype
+            size = 5 + _INT32.unpack_from(data, value)[0]
+        elif kind == 0x0B:  # regex: pattern and flags cstrings
+            size = data.index(b"\x00", data.index(b"\x00", value) + 1) + 1 - value
+        elif kind == 0x0C:  # DBPointer: string + ObjectId
+            size = 4 + _INT32.unpack_from(data, value)[0] + 12
+        else:
+            raise bson.InvalidBSON(f"unknown BSON element type {kind:#x}")
+        yield kind, data[pos + 1:key_end], value, value + size
+        pos = value + size
+
+
+def _decode_element(data: bytes, kind: int, key: bytes, value: int, end: int) -> Any:
+    element = bytes((kind,)) + key + b"\x00" + data[value:end]
+    return bson.decode(_INT32.pack(len(element) + 5) + element + b"\x00")[key.decode()]
+
+
+class Punishment:
+    """One entry of a user's `punishments` array."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: Mapping[str, Any]):
+        self.raw = raw
+
+    @property
+    def reason(self) -> str:
+        return self.raw.get("reason", "")
+
+    @property
+    def points(self) -> int:
+        return self.raw.get("points", 0)
+
+    @property
+    def timestamp(self) -> datetime:
+        return self.raw["timestamp"]
+
+    @property
+    def warning_count(self) -> int:
+        return self.raw.get("warning_count", 0)
+
+
+class UserRecord:
+    """A `Users` document.
+
+    Built from raw BSON (a RawBSONDocument or bytes) or a plain dict. For
+    raw input, the top-level element offsets are indexed on first access,
+    stepping over arrays by their length prefix, and each field is decoded
+    only when read. Reading `total_points` never touches the punishment
+    history; reading `punishments` decodes just that array.
+    """
+
+    __slots__ = ("raw", "_offsets", "_values", "_punishments")
+
+    def __init__(self, raw: Union[bytes, RawBSONDocument, Mapping[str, Any]]):
+        if isinstance(raw, RawBSONDocument):
+            raw = raw.raw
+        self.raw = raw
+        self._offsets: Optional[Dict[str, Tuple[int, bytes, int, int]]] = None
+        self._values: Dict[str, Any] = {} if isinstance(raw, bytes) else raw
+        self._punishments: Optional[Tuple[Punishment, ...]] = None
+
+    def _index(self) -> Dict[str, Tuple[int, bytes, int, int]]:
+        if self._offsets is None:
+            self._offsets = {key.decode(): (kind, key, value, end)
+                             for kind, key, value, end in _elements(self.raw)}
+        return self._offsets
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field in self._values or not isinstance(self.raw, bytes):
+            return self._values.get(field, default)
+        span = self._index().get(field)
+        if span is None:
+            return default
+        value = self._values[field] = _decode_element(self.raw, *span)
+        return value
+
+    @property
+    def id(self):
+        return self.get("_id")
+
+    @property
+    def guild_id(self) -> int:
+        return self.get("guild_id")
+
+    @property
+    def user_id(self) -> int:
+        return self.get("user_id")
+
+    @property
+    def version(self) -> Optional[int]:
+        return self.get("version")
+
+    @property
+    def total_points(self) -> int:
+        return self.get("total_points", 0)
+
+    @property
+    def present(self) -> bool:
+        return self.get("present", True)
+
+    @property
+    def warnings(self) -> List[Mapping[str, Any]]:
+        return self.get("warnings") or []
+
+    @property
+    def warning_count(self) -> int:
+        return len(self.warnings)
+
+    @property
+    def punishments(self) -> Tuple[Punishment, ...]:
+        """All punishments, oldest first."""
+        if self._punishments is None:
+            self._punishments = tuple(Punishment(p) for p in self.get("punishments") or ())
+        return self._punishments
+
+    def recent_punishments(self, count: int) -> List[Punishment]:
+        """The newest `count` punishments, oldest first."""
+        if count <= 0:
+            return []
+        if self._punishments is not None:
+            return list(self._punishments[-count:])
+        return [Punishment(p) for p in (self.get("punishments") or [])[-count:]]
@@ -4,10 +4,24 @@ from dotenv import load_dotenv
 from datetime import datetime
 
 load_dotenv()
-MONGO_URI = os.getenv('MONGODB_URI')
-if not MONGO_URI:
-    raise ValueError("No MONGODB_URI found in environment variables.")
 
-client = MongoClient(MONGO_URI)
-db = client["SentinelOne"]
-users = db["Users"]
+_client = None
+
+
+def get_client() -> MongoClient:
+    """Create the synchronous client on first use instead of at import time."""
+    global _client
+    if _client is None:
+        mongo_uri = os.getenv('MONGODB_URI')
+        if not mongo_uri:
+            raise ValueError("No MONGODB_URI found in environment variables.")
+        _client = MongoClient(mongo_uri)
+    return _client
+
+
+def get_users():
+    return get_client()["SentinelOne"]["Users"]
+
+
+def get_clusters():
+    return get_client()["SentinelOne"]["Clusters"]
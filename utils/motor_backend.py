@@ -0,0 +1,817 @@
+"""MongoDB (Motor) implementation of the storage interface; the production backend."""
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import async_timeout
+from bson import ObjectId
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+from utils.db import (
+    ARCHIVE_BATCH_SIZE, EVENT_CLAIM_RETENTION, EVIDENCE_RETENTION_DAYS, HOT_PUNISHMENT_LIMIT,
+    MAX_VERSION_RETRIES, REPORT_RETENTION_DAYS, UNAVAILABLE_ERRORS, ConcurrentUpdateError, breaker, day_start,
+    get_client, get_database, journal,
+)
+from utils.models import RAW_CODEC_OPTIONS, Punishment, UserRecord
+from utils.storage import StorageBackend
+
+
+def _users():
+    return get_database()["Users"]
+
+
+def _users_raw():
+    """Users, returning undecoded documents for the model layer."""
+    return _users().with_options(codec_options=RAW_CODEC_OPTIONS)
+
+
+def _users_archive():
+    return get_database()["UsersArchive"]
+
+
+def _pending_reports():
+    return get_database()["PendingReports"]
+
+
+def _timers():
+    return get_database()["Timers"]
+
+
+def _ban_votes():
+    return get_database()["BanVotes"]
+
+
+def _event_claims():
+    return get_database()["EventClaims"]
+
+
+def _daily_stats():
+    return get_database()["DailyStats"]
+
+
+def _reports():
+    return get_database()["Reports"]
+
+
+def _evidence():
+    return get_database()["Evidence"]
+
+
+WRITE_BUFFER_FLUSH_SIZE = 200   # queued ops in one collection that trigger an early flush
+WRITE_BUFFER_INTERVAL = 2.0     # seconds a queued op may wait for its flush
+WRITE_BUFFER_MAX_PENDING = 5000  # queued ops across collections before writers wait
+WRITE_BUFFER_DEADLINE = 10.0    # seconds one bulk_write may take before it counts as failed
+WRITE_BUFFER_MAX_BACKOFF = 60.0  # longest wait between retries of a failing flush
+
+
+class WriteBehindBuffer:
+    """
+    Collects non-critical writes (report records, stat counters) per collection
+    and sends them as unordered bulk_writes every WRITE_BUFFER_INTERVAL seconds,
+    or sooner once a collection has WRITE_BUFFER_FLUSH_SIZE ops queued. When
+    WRITE_BUFFER_MAX_PENDING ops are waiting, add() blocks until a flush drains
+    them. Anything that decides a moderation outcome (points, warning counts)
+    must not go through here.
+
+    Flushes report to the shared circuit breaker. A batch that fails because
+    the database is unreachable goes back to the front of its queue and is
+    retried with exponential backoff, still counted against max_pending.
+    Whatever is left when close() gives up is written to the journal as the
+    storage call that queued it (`journal_as`), so it is replayed on restart.
+    """
+
+    def __init__(self, flush_size: int = WRITE_BUFFER_FLUSH_SIZE, interval: float = WRITE_BUFFER_INTERVAL,
+                 max_pending: int = WRITE_BUFFER_MAX_PENDING):
+        self.flush_size = flush_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self._ops: Dict[str, List] = defaultdict(list)  # collection -> [(op, journal_as)]
+        self._pending = 0
+        self._failures = 0
+        self._space = asyncio.Condition()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def __len__(self):
+        return self._pending
+
+    async def add(self, collection: str, op, journal_as: Optional[Tuple[str, list]] = None) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        async with self._space:
+            await self._space.wait_for(lambda: self._pending < self.max_pending)
+            queue = self._ops[collection]
+            queue.append((op, journal_as))
+            self._pending += 1
+            if len(queue) >= self.flush_size or self._pending >= self.max_pending:
+                self._wake.set()
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of ops taken off the queue."""
+        batches, self._ops = self._ops, defaultdict(list)
+        done = 0
+        unavailable = not breaker.allow()
+        for collection, entries in batches.items():
+            if not unavailable:
+                try:
+                    async with async_timeout.timeout(WRITE_BUFFER_DEADLINE):
+                        await get_database()[collection].bulk_write([op for op, _ in entries], ordered=False)
+                    breaker.record_success()
+                except UNAVAILABLE_ERRORS as e:
+                    breaker.record_failure()
+                    unavailable = True
+                    print(f"[WARN] write-behind flush to {collection} failed ({len(entries)} ops), will retry: {e!r}")
+                except BulkWriteError as e:
+                    # the server answered; ops rejected on their own would fail the same way again,
+                    # and a duplicate _id means a retried insert had already landed
+                    breaker.record_success()
+                    rejected = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+                    if rejected:
+                        print(f"[ERROR] write-behind flush to {collection} rejected {len(rejected)} ops: {rejected[0].get('errmsg')}")
+                except PyMongoError as e:
+                    breaker.record_success()
+                    print(f"[ERROR] write-behind flush to {collection} failed ({len(entries)} ops dropped): {e}")
+            if unavailable:
+                # back in front of anything queued since, so the order holds
+                self._ops[collection][:0] = entries
+                continue
+            done += len(entries)
+        self._failures = self._failures + 1 if unavailable else 0
+        async with self._space:
+            self._pending -= done
+            self._space.notify_all()
+        return done
+
+    async def _wait(self, delay: float):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not self._closing:
+            if self._failures:
+                # only close() cuts the backoff short; a full queue waits like everything else
+                retry_at = loop.time() + min(self.interval * 2 ** self._failures, WRITE_BUFFER_MAX_BACKOFF)
+                while not self._closing and loop.time() < retry_at:
+                    await self._wait(retry_at - loop.time())
+            else:
+                await self._wait(self.interval)
+            if self._pending:
+                await self.flush()
+
+    async def close(self) -> None:
+        """Stop the background flusher, write out whatever is still queued and journal what can't be."""
+        # let an in-flight flush finish instead of cancelling it mid-batch
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pending:
+            await self.flush()
+        if self._pending:
+            left = [entry for entries in self._ops.values() for entry in entries]
+            for _, journal_as in left:
+                if journal_as:
+                    await journal.append(*journal_as)
+            print(f"[WARN] journaled {len(left)} unflushed write-behind ops for replay")
+            self._ops = defaultdict(list)
+            self._pending = 0
+        self._closing = False
+
+
+
+async def _compare_and_set(user_data: Dict, fields: Dict) -> bool:
+    """
+    Write `fields` only if the record still has the version it was read at.
+    Records written before versioning have no `version`, which {"version": None} matches.
+    """
+    result = await _users().update_one(
+        {"_id": user_data["_id"], "version": user_data.get("version")},
+        {"$set": fields, "$inc": {"version": 1}}
+    )
+    return result.matched_count > 0
+
+
+
+async def _upsert_user(guild_id: int, user_id: int, update: Dict, projection: Dict) -> Dict:
+    """
+    find_one_and_update with upsert on one user's record, returning it after
+    the update. When two processes make a user's first write at once, the
+    unique (guild_id, user_id) index rejects one insert; the retry finds the
+    other's document and updates it.
+    """
+    for _ in range(MAX_VERSION_RETRIES):
+        try:
+            return await _users().find_one_and_update(
+                {"guild_id": guild_id, "user_id": user_id},
+                update,
+                projection=projection,
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            continue
+    raise ConcurrentUpdateError(f"user {user_id} in guild {guild_id} kept colliding on first write")
+
+
+
+def _sorted_push(entry: Dict) -> Dict:
+    """$push modifier that keeps the punishments array sorted oldest first."""
+    return {"$each": [entry], "$sort": {"timestamp": 1}}
+
+
+
+def _entries_to_archive(punishments: List[Dict], cutoff: datetime) -> List[Dict]:
+    """Expired entries plus the oldest beyond HOT_PUNISHMENT_LIMIT: always a prefix of the sorted array."""
+    ordered = sorted(punishments, key=lambda p: p["timestamp"])
+    overflow = len(ordered) - HOT_PUNISHMENT_LIMIT
+    return [p for i, p in enumerate(ordered) if p["timestamp"] < cutoff or i < overflow]
+
+
+
+async def _archive_batch(users: List[Dict], cutoff: datetime) -> int:
+    now = datetime.utcnow()
+    moving = [(doc, _entries_to_archive(doc.get("punishments", []), cutoff)) for doc in users]
+    moving = [(doc, entries) for doc, entries in moving if entries]
+    archive_ops = [
+        UpdateOne(
+            {"guild_id": doc["guild_id"], "user_id": doc["user_id"], "timestamp": p["timestamp"]},
+            {"$setOnInsert": {**{k: v for k, v in p.items() if k != "timestamp"}, "archived_at": now}},
+            upsert=True
+        )
+        for doc, entries in moving
+        for p in entries
+    ]
+    if not archive_ops:
+        return 0
+    # copy first, then pull: a crash in between leaves duplicates the upserts absorb, never a loss
+    await _users_archive().bulk_write(archive_ops, ordered=False)
+    await _users().bulk_write([
+        UpdateOne(
+            {"_id": doc["_id"]},
+            {
+                # exactly the copied entries: a replayed journal entry can be older than some of them
+                "$pull": {"punishments": {"timestamp": {"$in": [p["timestamp"] for p in entries]}}},
+                "$set": {"has_archive": True},
+                "$inc": {"version": 1}
+            }
+        )
+        for doc, entries in moving
+    ], ordered=False)
+    return len(archive_ops)
+
+
+
+class MotorBackend(StorageBackend):
+    """Everything stored in the SentinelOne database through the shared Motor client."""
+
+    journaled = True
+
+    def __init__(self):
+        self.write_buffer = WriteBehindBuffer()
+
+    async def close(self) -> None:
+        # queued stat counters and report records would otherwise be lost
+        await self.write_buffer.close()
+
+    async def warmup(self) -> float:
+        """Open the connection pool with a ping and return the round trip in seconds."""
+        start = time.perf_counter()
+        await get_client().admin.command("ping")
+        return time.perf_counter() - start
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes the queries below rely on (no-op when they exist)."""
+        # one record per member: concurrent first writes from two processes can't both insert
+        await _users().create_index([("guild_id", 1), ("user_id", 1)], unique=True)
+        await _users().create_index("punishments.timestamp")
+        await _users_archive().create_index([("guild_id", 1), ("user_id", 1), ("timestamp", -1)], unique=True)
+        await _daily_stats().create_index([("guild_id", 1), ("day", 1)], unique=True)
+        await _reports().create_index([("guild_id", 1), ("reported_user_id", 1), ("created_at", -1)])
+        await _reports().create_index([("guild_id", 1), ("message_id", 1)])
+        # reports are kept for REPORT_RETENTION_DAYS, then Mongo's TTL monitor drops them
+        await _reports().create_index("created_at", expireAfterSeconds=REPORT_RETENTION_DAYS * 86400)
+        await _evidence().create_index([("guild_id", 1), ("message_id", 1)])
+        await _evidence().create_index("created_at", expireAfterSeconds=EVIDENCE_RETENTION_DAYS * 86400)
+        await _event_claims().create_index("created_at", expireAfterSeconds=EVENT_CLAIM_RETENTION)
+
+    async def add_warning(self, guild_id: int, user_id: int, mod_id: int, reason: Optional[str] = None,
+                          when: Optional[datetime] = None) -> Tuple[int, bool]:
+        """
+        Add a warning to a user's record
+        Returns: (warning_count, is_mutable)
+        is_mutable indicates if the warning should result in a mute
+        """
+        warning = {
+            "timestamp": when or datetime.utcnow(),
+            "mod_id": mod_id,
+            "reason": reason
+        }
+    
+        user_data = await _upsert_user(guild_id, user_id, {
+            "$push": {"warnings": warning},
+            "$inc": {"version": 1},
+            "$set": {"present": True},
+            "$setOnInsert": {"total_points": 0, "punishments": []}
+        }, {"warnings": 1})
+        warning_count = len(user_data.get("warnings", []))
+    
+        # Second warning gets 5min mute, third warning converts to 1MP
+        return warning_count, warning_count in [2, 3]
+
+    async def add_punishment(self, guild_id: int, user_id: int, reason: str, points: int, warning_count: int = 0,
+                             when: Optional[datetime] = None) -> int:
+        """Add punishment to the database and update total points."""
+        new_entry = {
+            "reason": reason,
+            "points": points,
+            "timestamp": when or datetime.utcnow(),
+            "warning_count": warning_count
+        }
+
+        push = {"punishments": _sorted_push(new_entry)}
+
+        # Handle third warning conversion to MP
+        if warning_count >= 3:
+            update = {
+                "$inc": {"total_points": 1, "version": 1},  # Add 1 MP for third warning
+                "$push": push,
+                "$set": {"warnings": [], "present": True}  # Clear warnings after conversion
+            }
+        else:
+            update = {
+                "$inc": {"total_points": points, "version": 1},
+                "$push": push,
+                "$set": {"present": True},
+                "$setOnInsert": {"warnings": []}
+            }
+
+        # single atomic update, so the returned total includes concurrent writers
+        user_data = await _upsert_user(guild_id, user_id, update, {"total_points": 1})
+        return user_data["total_points"]
+
+    async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict]:
+        """Get all warnings for a user"""
+        user_data = await _users().find_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"warnings": 1}
+        )
+        return user_data.get("warnings", []) if user_data else []
+
+    async def get_warning_count(self, guild_id: int, user_id: int) -> int:
+        """Get number of warnings for a user"""
+        warnings = await self.get_warnings(guild_id, user_id)
+        return len(warnings)
+
+    async def clear_warnings(self, guild_id: int, user_id: int) -> bool:
+        """Clear all warnings for a user"""
+        result = await _users().update_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"$set": {"warnings": []}, "$inc": {"version": 1}}
+        )
+        return result.modified_count > 0
+
+    async def get_user_info(self, guild_id: int, user_id: int, recent: Optional[int] = None) -> Optional[UserRecord]:
+        """
+        Get all user information including warnings and punishments.
+        With `recent`, only the newest `recent` punishments leave the server.
+        """
+        user_data = await _users_raw().find_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"punishments": {"$slice": -recent}} if recent is not None else None
+        )
+        return UserRecord(user_data) if user_data else None
+
+    async def clear_points(self, guild_id: int, user_id: int) -> bool:
+        """Clear all points and warnings for a user"""
+        result = await _users().update_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {
+                "$set": {
+                    "total_points": 0,
+                    "warnings": [],
+                    "punishments": []
+                },
+                "$inc": {"version": 1}
+            }
+        )
+        return result.modified_count > 0
+
+    async def check_expired_points(self, guild_id: int, user_id: int) -> int:
+        """
+        Recompute total points from punishments of the last 20 days and return it.
+        Expired entries stay until archive_expired_history moves them out.
+        """
+        for _ in range(MAX_VERSION_RETRIES):
+            expiry_date = datetime.utcnow() - timedelta(days=20)
+
+            user_data = await _users_raw().find_one({"guild_id": guild_id, "user_id": user_id})
+            if not user_data:
+                return 0
+            record = UserRecord(user_data)
+
+            # timestamps are BSON dates once `python -m utils.migrate normalize` has run
+            total_points = sum(p.points for p in record.punishments if p.timestamp > expiry_date)
+            if total_points == record.total_points:
+                return total_points  # nothing expired, skip the write
+
+            if await _compare_and_set({"_id": record.id, "version": record.version}, {
+                "total_points": total_points
+            }):
+                return total_points
+
+        raise ConcurrentUpdateError(f"user {user_id} in guild {guild_id} kept changing during expiry check")
+
+    async def deductpoints(self, guild_id: int, user_id: int, points_to_deduct: int) -> int:
+        """
+        Atomically deducts points from a user by modifying or removing their
+        most recent punishment entries.
+        """
+        for _ in range(MAX_VERSION_RETRIES):
+            user_data = await _users().find_one(
+                {"guild_id": guild_id, "user_id": user_id}
+            )
+
+            if not user_data or not user_data.get('punishments'):
+
+                return 0
+
+
+            punishments = sorted(user_data.get('punishments', []), key=lambda p: p['timestamp'], reverse=True)
+            expiry_date = datetime.utcnow() - timedelta(days=20)
+        
+            remaining_deduction = points_to_deduct
+            updated_punishments = []
+
+            for punishment in punishments:
+                points = punishment.get('points', 0)
+                if remaining_deduction > 0 and punishment['timestamp'] > expiry_date:
+                    if points <= remaining_deduction:
+
+                        remaining_deduction -= points
+
+                    else:
+
+                        punishment['points'] -= remaining_deduction
+                        remaining_deduction = 0
+                        updated_punishments.append(punishment)
+                else:
+                    # Nothing left to deduct, or already expired: keep the record as is.
+                    updated_punishments.append(punishment)
+
+            updated_punishments.sort(key=lambda p: p['timestamp'])
+
+            # expired entries are still on the document until they are archived
+            new_total_points = sum(p.get('points', 0) for p in updated_punishments if p['timestamp'] > expiry_date)
+
+            if await _compare_and_set(user_data, {
+                "punishments": updated_punishments,
+                "total_points": new_total_points
+            }):
+                return new_total_points
+
+        raise ConcurrentUpdateError(f"user {user_id} in guild {guild_id} kept changing during deduction")
+
+    async def bulk_add_punishments(self, guild_id: int, user_ids: List[int], reason: str, points: int,
+                                   when: Optional[datetime] = None) -> Dict[int, int]:
+        """
+        Expire old points and add the same punishment to many users in a single
+        ordered bulk_write, then read back every new total in one query.
+        Returns {user_id: total_points}.
+        """
+        if not user_ids:
+            return {}
+        now = datetime.utcnow()
+        expiry_date = now - timedelta(days=20)
+        new_entry = {"reason": reason, "points": points, "timestamp": when or now, "warning_count": 0}
+
+        ops = []
+        for user_id in user_ids:
+            key = {"guild_id": guild_id, "user_id": user_id}
+            # same effect as check_expired_points, done server-side
+            ops.append(UpdateOne(key, [
+                {"$set": {
+                    "total_points": {"$sum": {"$map": {
+                        "input": {"$filter": {
+                            "input": {"$ifNull": ["$punishments", []]},
+                            "as": "p",
+                            "cond": {"$gt": ["$$p.timestamp", expiry_date]}
+                        }},
+                        "as": "p",
+                        "in": "$$p.points"
+                    }}},
+                    "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+                }}
+            ]))
+            ops.append(UpdateOne(key, {
+                "$inc": {"total_points": points, "version": 1},
+                "$push": {"punishments": _sorted_push(new_entry)},
+                "$set": {"present": True},
+                "$setOnInsert": {"warnings": []}
+            }, upsert=True))
+        for _ in range(MAX_VERSION_RETRIES):
+            try:
+                await _users().bulk_write(ops, ordered=True)
+                break
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if not errors or errors[0].get("code") != 11000:
+                    raise
+                # another process inserted that user first; an ordered bulk stops at the
+                # rejected upsert, so resume from it and it updates their document instead
+                ops = ops[errors[0]["index"]:]
+        else:
+            raise ConcurrentUpdateError(f"bulk punishment in guild {guild_id} kept colliding on first writes")
+
+        cursor = _users().find(
+            {"guild_id": guild_id, "user_id": {"$in": user_ids}},
+            {"user_id": 1, "total_points": 1, "_id": 0}
+        )
+        return {doc["user_id"]: doc["total_points"] async for doc in cursor}
+
+    def get_leaderboard_cursor(self, guild_id: int, batch_size: int = 20, after: Optional[Tuple[int, int]] = None):
+        """
+        Cursor over users sorted by points accumulated in the last 20 days.
+        Members flagged as departed are filtered out on the server; records that
+        predate the `present` flag count as present.
+        `after` is the (total_points, user_id) of the last row already shown, so
+        later pages resume from that key instead of skipping rows.
+        """
+        expiry_date = datetime.utcnow() - timedelta(days=20)
+    
+
+        pipeline = [
+
+            {"$match": {"guild_id": guild_id, "present": {"$ne": False}}},
+        
+
+            {"$unwind": "$punishments"},
+
+            {"$match": {"punishments.timestamp": {"$gte": expiry_date}}},
+        
+
+            {"$group": {
+                "_id": "$user_id",
+                "recent_points": {"$sum": "$punishments.points"}
+            }},
+        
+
+            {"$match": {"recent_points": {"$gt": 0}}},
+        
+
+            {"$sort": {"recent_points": -1, "_id": 1}},
+        
+            {"$project": {
+                "user_id": "$_id",
+                "total_points": "$recent_points", 
+                "_id": 0
+            }}
+        ]
+    
+
+        if after is not None:
+            last_points, last_user_id = after
+            pipeline.insert(-2, {"$match": {"$or": [
+                {"recent_points": {"$lt": last_points}},
+                {"recent_points": last_points, "_id": {"$gt": last_user_id}}
+            ]}})
+
+        return _users().aggregate(pipeline, batchSize=batch_size)
+
+    async def get_leaderboard_users(self, guild_id: int) -> List[Dict]:
+        """
+        Gets users for the leaderboard, sorted by points accumulated in the last 20 days.
+        """
+        return await self.get_leaderboard_cursor(guild_id).to_list(length=None)
+
+    async def get_punishment_page(self, guild_id: int, user_id: int, page: int, page_size: int) -> Tuple[List[Punishment], int]:
+        """
+        Get one page of a user's punishments, newest first, plus the total count.
+        Only the requested slice of the array leaves the server.
+        """
+        start = page * page_size
+        count = {"$size": {"$ifNull": ["$punishments", []]}}
+        pipeline = [
+            {"$match": {"guild_id": guild_id, "user_id": user_id}},
+            {"$project": {
+                "_id": 0,
+                "count": count,
+                # newest entries are at the end of the array
+                "page": {"$slice": [
+                    {"$ifNull": ["$punishments", []]},
+                    {"$max": [0, {"$subtract": [count, start + page_size]}]},
+                    {"$max": [1, {"$min": [page_size, {"$subtract": [count, start]}]}]}
+                ]}
+            }}
+        ]
+        result = await _users_raw().aggregate(pipeline).to_list(length=1)
+        if not result or start >= result[0]["count"]:
+            return [], result[0]["count"] if result else 0
+        return [Punishment(p) for p in reversed(result[0]["page"])], result[0]["count"]
+
+    async def get_archive_page(self, guild_id: int, user_id: int, page: int, page_size: int) -> Tuple[List[Punishment], int]:
+        """One page of a user's archived punishments, newest first, plus the archived count."""
+        result = await _users_archive().aggregate([
+            {"$match": {"guild_id": guild_id, "user_id": user_id}},
+            {"$facet": {
+                "count": [{"$count": "n"}],
+                "page": [
+                    {"$sort": {"timestamp": -1}},
+                    {"$skip": page * page_size},
+                    {"$limit": page_size},
+                    {"$project": {"_id": 0, "guild_id": 0, "user_id": 0, "archived_at": 0}}
+                ]
+            }}
+        ]).to_list(length=1)
+        facet = result[0]
+        count = facet["count"][0]["n"] if facet["count"] else 0
+        return [Punishment(p) for p in facet["page"]], count
+
+    async def archive_expired_history(self, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """
+        Move punishments older than the 20-day window, and the oldest beyond
+        HOT_PUNISHMENT_LIMIT, from Users to UsersArchive, batch_size users per
+        round trip. Returns the number of entries moved.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=20)
+        cursor = _users().find(
+            {"$or": [
+                {"punishments.timestamp": {"$lt": cutoff}},
+                {f"punishments.{HOT_PUNISHMENT_LIMIT}": {"$exists": True}},  # more than the cap
+            ]},
+            {"guild_id": 1, "user_id": 1, "punishments": 1}
+        ).batch_size(batch_size)
+
+        moved = 0
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                moved += await _archive_batch(batch, cutoff)
+                batch = []
+        if batch:
+            moved += await _archive_batch(batch, cutoff)
+        return moved
+
+    async def set_member_present(self, guild_id: int, user_id: int, present: bool) -> None:
+        """Flag whether a user with a record is still in the guild (no record is created)."""
+        await _users().update_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"$set": {"present": present}}
+        )
+
+    async def add_pending_report(self, report: Dict, timeout: float):
+        """
+        Store a report that is waiting for the reporter's DM reply.
+        Kept in Mongo rather than in memory because the DM can arrive on a
+        different process than the guild's shard.
+        """
+        now = datetime.utcnow()
+        doc = dict(report, created_at=now, expires_at=now + timedelta(seconds=timeout))
+        result = await _pending_reports().insert_one(doc)
+        return result.inserted_id
+
+    async def pop_pending_report(self, reporter_id: int) -> Optional[Dict]:
+        """Claim the newest unexpired pending report for a reporter, if any."""
+        return await _pending_reports().find_one_and_delete(
+            {"reporter_id": reporter_id, "expires_at": {"$gt": datetime.utcnow()}},
+            sort=[("created_at", -1)]
+        )
+
+    async def expire_pending_report(self, report_id) -> bool:
+        """Drop a pending report; True means nobody answered it in time."""
+        result = await _pending_reports().delete_one({"_id": report_id})
+        return result.deleted_count > 0
+
+    async def add_timers(self, timers: List[Dict]) -> List:
+        """Persist role removals in one round trip so they survive restarts and shard moves."""
+        if not timers:
+            return []
+        result = await _timers().insert_many(timers)
+        return result.inserted_ids
+
+    async def get_timers(self, guild_ids: List[int]) -> List[Dict]:
+        """Get pending role removals for the guilds this process owns."""
+        cursor = _timers().find({"guild_id": {"$in": guild_ids}})
+        return await cursor.to_list(length=None)
+
+    async def delete_timer(self, timer_id) -> None:
+        await _timers().delete_one({"_id": timer_id})
+
+    async def add_ban_vote(self, vote: Dict):
+        """
+        Persist a ban vote so the scheduler lease holder runs it, whichever
+        replica handled the punishment, and a new holder finishes it.
+        """
+        result = await _ban_votes().insert_one(vote)
+        return result.inserted_id
+
+    async def get_ban_votes(self, guild_ids: List[int]) -> List[Dict]:
+        cursor = _ban_votes().find({"guild_id": {"$in": guild_ids}})
+        return await cursor.to_list(length=None)
+
+    async def open_ban_vote(self, vote_id, message_id: int, closes_at: datetime) -> None:
+        await _ban_votes().update_one({"_id": vote_id}, {"$set": {"message_id": message_id, "closes_at": closes_at}})
+
+    async def delete_ban_vote(self, vote_id) -> None:
+        await _ban_votes().delete_one({"_id": vote_id})
+
+    async def claim_event(self, kind: str, *ids: int) -> bool:
+        """
+        Claim a gateway event for this process. Replicas serving the same
+        shards all receive it; the unique _id lets exactly one insert win.
+        """
+        try:
+            await _event_claims().insert_one({"_id": ":".join([kind, *map(str, ids)]), "created_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def record_daily_stat(self, guild_id: int, category: str, mod_id: Optional[int] = None,
+                                channel_id: Optional[int] = None, when: Optional[datetime] = None,
+                                count: int = 1) -> None:
+        """Count `count` moderation events in the guild's rollup document for that day."""
+        inc = {"total": count, f"categories.{category}": count}
+        if mod_id is not None:
+            inc[f"moderators.{mod_id}"] = count
+        if channel_id is not None:
+            inc[f"channels.{channel_id}"] = count
+        when = when or datetime.utcnow()
+        # counters only feed !modstats, so they ride the write-behind buffer
+        await self.write_buffer.add("DailyStats", UpdateOne(
+            {"guild_id": guild_id, "day": day_start(when)},
+            {"$inc": inc},
+            upsert=True
+        ), ("record_daily_stat", [guild_id, category, mod_id, channel_id, when, count]))
+
+    async def get_daily_stats(self, guild_id: int, days: int) -> List[Dict]:
+        """Rollup documents for the last `days` days, today included."""
+        since = day_start(datetime.utcnow()) - timedelta(days=days - 1)
+        cursor = _daily_stats().find({"guild_id": guild_id, "day": {"$gte": since}}, {"_id": 0})
+        return await cursor.to_list(length=days)
+
+    async def add_report(self, guild_id: int, reported_user_id: int, reporter_id: int, channel_id: int,
+                         message_id: int, content: Optional[str], reason: str) -> None:
+        """
+        Queue a completed report. It goes through the write-behind buffer, so it
+        lands within WRITE_BUFFER_INTERVAL seconds rather than before this returns.
+        """
+        # _id set here so a batch retried after an ambiguous failure can't insert it twice
+        await self.write_buffer.add("Reports", InsertOne({
+            "_id": ObjectId(),
+            "guild_id": guild_id,
+            "reported_user_id": reported_user_id,
+            "reporter_id": reporter_id,
+            "channel_id": channel_id,
+            "message_id": message_id,
+            "content": content,
+            "reason": reason,
+            "created_at": datetime.utcnow()
+        }), ("add_report", [guild_id, reported_user_id, reporter_id, channel_id, message_id, content, reason]))
+
+    async def get_reports(self, guild_id: int, reported_user_id: int, limit: int = 5) -> Tuple[int, List[Dict]]:
+        """Count a user's retained reports and fetch the newest `limit` in one indexed query."""
+        if limit <= 0:
+            # $limit must be positive; a bare count is cheaper anyway
+            count = await _reports().count_documents({"guild_id": guild_id, "reported_user_id": reported_user_id})
+            return count, []
+        pipeline = [
+            {"$match": {"guild_id": guild_id, "reported_user_id": reported_user_id}},
+            {"$sort": {"created_at": -1}},
+            {"$facet": {
+                "count": [{"$count": "n"}],
+                "recent": [{"$limit": limit}]
+            }}
+        ]
+        result = await _reports().aggregate(pipeline).to_list(length=1)
+        facet = result[0] if result else {"count": [], "recent": []}
+        count = facet["count"][0]["n"] if facet["count"] else 0
+        return count, facet["recent"]
+
+    async def add_evidence(self, message: Dict, files: List[Dict]) -> None:
+        """Record what was captured from a reported message (see utils/evidence.py)."""
+        await _evidence().update_one(
+            {"guild_id": message["guild_id"], "message_id": message["message_id"]},
+            {
+                "$setOnInsert": {
+                    "channel_id": message["channel_id"],
+                    "author_id": message["author_id"],
+                    "content": message.get("content"),
+                    "files": files,
+                    "created_at": datetime.utcnow()
+                }
+            },
+            upsert=True
+        )
+
+    async def get_evidence(self, guild_id: int, message_id: int) -> Optional[Dict]:
+        return await _evidence().find_one({"guild_id": guild_id, "message_id": message_id})
+
@@ -0,0 +1,63 @@
+from typing import Awaitable, Callable, Tuple
+
+import discord
+
+# fetch_page(page) -> (embed, has_next)
+PageFetcher = Callable[[int], Awaitable[Tuple[discord.Embed, bool]]]
+
+
+class PageView(discord.ui.View):
+    """Previous/next buttons that re-render an embed one page at a time.
+
+    Only the member who ran the command can flip pages; the view stops
+    responding after `timeout` seconds.
+    """
+
+    def __init__(self, author_id: int, fetch_page: PageFetcher, timeout: float = 120.0):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.fetch_page = fetch_page
+        self.page = 0
+        self.message = None
+
+    async def start(self, ctx):
+        embed, has_next = await self.fetch_page(0)
+        self._update_buttons(has_next)
+        if not has_next:
+            # single page, no buttons needed
+            self.stop()
+            self.message = await ctx.send(embed=embed)
+        else:
+            self.message = await ctx.send(embed=embed, view=self)
+        return self.message
+
+    def _update_buttons(self, has_next: bool):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the person who ran the command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = page
+        embed, has_next = await self.fetch_page(page)
+        self._update_buttons(has_next)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, max(0, self.page - 1))
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
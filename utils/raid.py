@@ -0,0 +1,119 @@
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+MENTION_OR_URL = re.compile(r"<[@#][!&]?\d+>|https?://\S+")
+NON_WORD = re.compile(r"[^\w\s]+")
+
+FINGERPRINT_BITS = 64
+BANDS = 8                 # 8 x 8-bit bands: fingerprints within 7 bits always share
+BAND_BITS = FINGERPRINT_BITS // BANDS  # a band, and almost always up to MAX_DISTANCE
+MAX_DISTANCE = 12         # a one-character edit of a short message moves ~8-12 bits;
+                          # unrelated texts sit around 32
+MAX_BUCKET = 32           # clusters kept per band key, newest first
+
+
+def normalize(content: str) -> str:
+    text = MENTION_OR_URL.sub(" ", content.lower())
+    return " ".join(NON_WORD.sub(" ", text).split())
+
+
+def simhash(text: str, shingle: int = 4) -> int:
+    """64-bit SimHash over character shingles; near-identical texts differ in few bits."""
+    if len(text) <= shingle:
+        grams = {text}
+    else:
+        grams = {text[i:i + shingle] for i in range(len(text) - shingle + 1)}
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "big"), "064b")
+        for g in grams
+    ]
+    half = len(hashes) / 2
+    fingerprint = 0
+    # column-wise bit counts; zip does the transposition in C
+    for column in zip(*hashes):
+        fingerprint = (fingerprint << 1) | (column.count("1") > half)
+    return fingerprint
+
+
+class RaidCluster:
+    """Near-duplicate messages from distinct authors inside one window."""
+
+    __slots__ = ("fingerprint", "authors", "sample", "first_seen", "alerted")
+
+    def __init__(self, fingerprint: int, sample: str, now: float):
+        self.fingerprint = fingerprint
+        self.authors: Dict[int, Tuple[int, int]] = {}   # author_id -> (channel_id, message_id)
+        self.sample = sample
+        self.first_seen = now
+        self.alerted = False
+
+
+class RaidDetector:
+    """Flags clusters of near-identical messages posted by many authors.
+
+    Each message is reduced to a 64-bit SimHash and looked up through eight
+    8-bit band keys, so candidates are found by dict lookups and compared
+    only as integers; message contents are never compared with each other.
+    The index is split into two generations that rotate every half window
+    (or when a generation fills up), which bounds both age and size.
+    """
+
+    MIN_LENGTH = 20          # shorter messages ("gm", "lol") are too common to mean anything
+    AUTHOR_THRESHOLD = 5     # distinct authors that make a cluster
+    MAX_CLUSTER_AUTHORS = 100
+
+    def __init__(self, window: float = 60.0, max_keys: int = 20000):
+        self.window = window
+        self.max_keys = max_keys
+        self._current: Dict[tuple, List[RaidCluster]] = {}
+        self._previous: Dict[tuple, List[RaidCluster]] = {}
+        self._rotated = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
+
+    def _rotate(self, now: float):
+        if now - self._rotated >= self.window / 2 or len(self._current) >= self.max_keys:
+            self._previous, self._current = self._current, {}
+            self._rotated = now
+
+    def _find(self, keys: List[tuple], fingerprint: int) -> Optional[RaidCluster]:
+        for index in (self._current, self._previous):
+            for key in keys:
+                for cluster in index.get(key, ()):
+                    if (cluster.fingerprint ^ fingerprint).bit_count() <= MAX_DISTANCE:
+                        return cluster
+        return None
+
+    def observe(self, guild_id: int, author_id: int, channel_id: int, message_id: int,
+                content: str, now: Optional[float] = None) -> Optional[RaidCluster]:
+        """Record a message; returns its cluster the first time it reaches the author threshold."""
+        text = normalize(content or "")
+        if len(text) < self.MIN_LENGTH:
+            return None
+        if now is None:
+            now = time.monotonic()
+        self._rotate(now)
+
+        fingerprint = simhash(text)
+        mask = (1 << BAND_BITS) - 1
+        keys = [(guild_id, band, (fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+        cluster = self._find(keys, fingerprint)
+        if cluster is None or now - cluster.first_seen > self.window:
+            cluster = RaidCluster(fingerprint, content[:300], now)
+        # (re)index in the current generation so an active cluster survives rotation
+        for key in keys:
+            bucket = self._current.setdefault(key, [])
+            if cluster not in bucket:
+                bucket.insert(0, cluster)
+                del bucket[MAX_BUCKET:]
+
+        if len(cluster.authors) < self.MAX_CLUSTER_AUTHORS:
+            cluster.authors.setdefault(author_id, (channel_id, message_id))
+        if not cluster.alerted and len(cluster.authors) >= self.AUTHOR_THRESHOLD:
+            cluster.alerted = True
+            return cluster
+        return None
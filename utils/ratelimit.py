@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Token bucket with a concurrency cap, for bursts of REST calls.
+
+    At most `concurrency` calls run at once and no more than `rate` start per
+    `per` seconds. discord.py still handles any 429 it gets; this keeps a
+    mass action from hitting them in the first place.
+    """
+
+    def __init__(self, rate: float, per: float = 1.0, concurrency: int = 5):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+
+    async def _take_token(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
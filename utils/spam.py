@@ -0,0 +1,102 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+CUSTOM_EMOJI = re.compile(r"<a?:\w+:\d+>")
+# common emoji blocks; good enough for density, not a full Unicode emoji parser
+UNICODE_EMOJI = re.compile("[\U0001F000-\U0001FAFF☀-➿⬀-⯿]")
+
+
+def count_emoji(content: str) -> Tuple[int, int]:
+    """Return (emoji, words) where words are the non-emoji tokens left over."""
+    if not content:
+        return 0, 0
+    stripped, custom = CUSTOM_EMOJI.subn(" ", content)
+    stripped, unicode = UNICODE_EMOJI.subn(" ", stripped)
+    return custom + unicode, len(stripped.split())
+
+
+class _UserState:
+    __slots__ = ("messages", "mentions", "emoji", "updated", "flagged")
+
+    def __init__(self, now: float, detector: "SpamDetector"):
+        self.messages = float(detector.MESSAGE_BURST)
+        self.mentions = float(detector.MENTION_BURST)
+        self.emoji = float(detector.EMOJI_BURST)
+        self.updated = now
+        self.flagged = float("-inf")
+
+
+class SpamDetector:
+    """Per-user token buckets for message rate, mentions and emoji.
+
+    Every observation is O(1) in the user's history: three buckets are
+    refilled from the elapsed time and charged for the new message. State is
+    one small slotted object per active user, kept in LRU order so idle users
+    are evicted from the front and the total is capped at `max_users`.
+    """
+
+    # bucket size / refill per second; a bucket that goes negative is a detection
+    MESSAGE_BURST, MESSAGE_RATE = 6, 1.0        # >6 messages in a burst, ~1/s sustained
+    MENTION_BURST, MENTION_RATE = 8, 0.2        # >8 pings in a burst
+    EMOJI_BURST, EMOJI_RATE = 15, 0.5           # >15 emoji in a burst
+    EMOJI_DENSITY = 0.8                         # or one message that's mostly emoji
+    EMOJI_DENSITY_MIN = 6
+
+    FLAG_COOLDOWN = 60.0   # seconds before the same user can be flagged again
+    IDLE_TTL = 300.0       # seconds of silence before a user's state is dropped
+
+    def __init__(self, max_users: int = 50000):
+        self.max_users = max_users
+        self._users: "OrderedDict[Tuple[int, int], _UserState]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _evict(self, now: float):
+        users = self._users
+        while users:
+            oldest = next(iter(users.values()))
+            if now - oldest.updated < self.IDLE_TTL and len(users) <= self.max_users:
+                break
+            users.popitem(last=False)
+
+    def observe(self, guild_id: int, user_id: int, content: str, mention_count: int = 0,
+                now: Optional[float] = None) -> Optional[str]:
+        """Record one message and return the offense keyword it triggers, if any."""
+        if now is None:
+            now = time.monotonic()
+        key = (guild_id, user_id)
+        state = self._users.get(key)
+        if state is None:
+            state = _UserState(now, self)
+            self._users[key] = state
+            self._evict(now)
+        else:
+            self._users.move_to_end(key)
+            elapsed = now - state.updated
+            state.messages = min(self.MESSAGE_BURST, state.messages + elapsed * self.MESSAGE_RATE)
+            state.mentions = min(self.MENTION_BURST, state.mentions + elapsed * self.MENTION_RATE)
+            state.emoji = min(self.EMOJI_BURST, state.emoji + elapsed * self.EMOJI_RATE)
+            state.updated = now
+
+        emoji, words = count_emoji(content)
+        state.messages -= 1
+        state.mentions -= mention_count
+        state.emoji -= emoji
+
+        if now - state.flagged < self.FLAG_COOLDOWN:
+            return None
+
+        offense = None
+        if state.mentions < 0:
+            offense = "mass ping"
+        elif state.emoji < 0 or (emoji >= self.EMOJI_DENSITY_MIN and emoji >= (emoji + words) * self.EMOJI_DENSITY):
+            offense = "emoji spam"
+        elif state.messages < 0:
+            offense = "minor spam"
+
+        if offense:
+            state.flagged = now
+        return offense
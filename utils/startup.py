@@ -0,0 +1,40 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    """Collects wall-clock timings for each startup phase and prints a report."""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.reported = False
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+
+    def since_start(self, name: str):
+        """Record a phase that began when the process started."""
+        self.record(name, time.perf_counter() - self.started)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> str:
+        lines = [f"  {name:<16} {seconds * 1000:8.1f} ms" for name, seconds in self.phases.items()]
+        total = time.perf_counter() - self.started
+        lines.append(f"  {'total':<16} {total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def print_report(self):
+        if self.reported:
+            return
+        self.reported = True
+        print("[STARTUP] Startup timing report:")
+        print(self.report())
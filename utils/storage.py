@@ -0,0 +1,217 @@
+"""The storage interface behind utils.db.
+
+Cogs call the module-level functions in utils.db, which forward to the
+active backend: MotorBackend (utils/motor_backend.py) in production,
+MemoryBackend (utils/memory_backend.py) for tests, benchmarks and as a
+fallback when Mongo is unreachable. Both keep the same semantics: points
+expire after 20 days, the leaderboard is ordered by recent points then
+user id, and history arrays are capped as described in utils.db.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.models import Punishment, UserRecord
+
+
+class ListCursor:
+    """The slice of Motor's cursor API callers use, over an in-memory list."""
+
+    def __init__(self, documents: List[Dict]):
+        self._documents = documents
+        self._position = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict:
+        if self._position >= len(self._documents):
+            raise StopAsyncIteration
+        self._position += 1
+        return self._documents[self._position - 1]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        end = len(self._documents) if length is None else self._position + length
+        batch = self._documents[self._position:end]
+        self._position += len(batch)
+        return batch
+
+    async def close(self) -> None:
+        """Nothing to release; kept so callers can close either kind of cursor."""
+
+
+class StorageBackend(ABC):
+    """Every operation the bot performs on its data."""
+
+    # whether utils.db journals this backend's writes during an outage and
+    # replays the journal into it; only a backend that outlives the process may
+    journaled = False
+
+    async def close(self) -> None:
+        """Flush anything buffered; called once on shutdown."""
+
+    @abstractmethod
+    async def warmup(self) -> float:
+        """Make the backend ready and return how long that took in seconds."""
+
+    @abstractmethod
+    async def ensure_indexes(self) -> None:
+        """Create whatever lookup structures the queries rely on."""
+
+    # --- points and warnings ---
+
+    @abstractmethod
+    async def add_warning(self, guild_id: int, user_id: int, mod_id: int,
+                          reason: Optional[str] = None, when: Optional[datetime] = None) -> Tuple[int, bool]:
+        """Add a warning given at `when` (default now); returns (warning_count, should_mute)."""
+
+    @abstractmethod
+    async def add_punishment(self, guild_id: int, user_id: int, reason: str, points: int,
+                             warning_count: int = 0, when: Optional[datetime] = None) -> int:
+        """Record a punishment given at `when` (default now) atomically and return the new total points."""
+
+    @abstractmethod
+    async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict]:
+        """All current warnings for a user."""
+
+    @abstractmethod
+    async def get_warning_count(self, guild_id: int, user_id: int) -> int:
+        """Number of current warnings for a user."""
+
+    @abstractmethod
+    async def clear_warnings(self, guild_id: int, user_id: int) -> bool:
+        """Clear a user's warnings; True if the record changed."""
+
+    @abstractmethod
+    async def get_user_info(self, guild_id: int, user_id: int,
+                            recent: Optional[int] = None) -> Optional[UserRecord]:
+        """A user's record; with `recent`, only the newest `recent` punishments."""
+
+    @abstractmethod
+    async def clear_points(self, guild_id: int, user_id: int) -> bool:
+        """Reset points, warnings and hot history; True if the record changed."""
+
+    @abstractmethod
+    async def check_expired_points(self, guild_id: int, user_id: int) -> int:
+        """Recompute total points from the last 20 days and return it."""
+
+    @abstractmethod
+    async def deductpoints(self, guild_id: int, user_id: int, points_to_deduct: int) -> int:
+        """Take points off the newest active punishments; returns the new total."""
+
+    @abstractmethod
+    async def bulk_add_punishments(self, guild_id: int, user_ids: List[int], reason: str,
+                                   points: int, when: Optional[datetime] = None) -> Dict[int, int]:
+        """Expire and punish many users at once, stamped `when`; returns {user_id: total_points}."""
+
+    # --- leaderboard and history ---
+
+    @abstractmethod
+    def get_leaderboard_cursor(self, guild_id: int, batch_size: int = 20,
+                               after: Optional[Tuple[int, int]] = None):
+        """
+        Cursor of {"user_id", "total_points"} for present users with recent
+        points, ordered by points descending then user id; `after` resumes
+        after that (points, user_id) key.
+        """
+
+    @abstractmethod
+    async def get_leaderboard_users(self, guild_id: int) -> List[Dict]:
+        """The whole leaderboard as a list."""
+
+    @abstractmethod
+    async def get_punishment_page(self, guild_id: int, user_id: int, page: int,
+                                  page_size: int) -> Tuple[List[Punishment], int]:
+        """One page of hot history, newest first, plus its size."""
+
+    @abstractmethod
+    async def get_archive_page(self, guild_id: int, user_id: int, page: int,
+                               page_size: int) -> Tuple[List[Punishment], int]:
+        """One page of archived history, newest first, plus its size."""
+
+    @abstractmethod
+    async def archive_expired_history(self, batch_size: int) -> int:
+        """Move expired punishments and any beyond HOT_PUNISHMENT_LIMIT to the archive; returns how many moved."""
+
+    @abstractmethod
+    async def set_member_present(self, guild_id: int, user_id: int, present: bool) -> None:
+        """
+        Flag whether a user with a record is still in the guild. Adding a
+        punishment or warning flags the user present again.
+        """
+
+    # --- pending reports and timers ---
+
+    @abstractmethod
+    async def add_pending_report(self, report: Dict, timeout: float):
+        """Store a report awaiting the reporter's DM (keeping a preset _id); returns its id."""
+
+    @abstractmethod
+    async def pop_pending_report(self, reporter_id: int) -> Optional[Dict]:
+        """Claim the newest unexpired pending report for a reporter."""
+
+    @abstractmethod
+    async def expire_pending_report(self, report_id) -> bool:
+        """Drop a pending report; True if it was still pending."""
+
+    @abstractmethod
+    async def add_timers(self, timers: List[Dict]) -> List:
+        """Persist scheduled role removals, keeping any preset _id; returns their ids."""
+
+    @abstractmethod
+    async def get_timers(self, guild_ids: List[int]) -> List[Dict]:
+        """Pending role removals for the given guilds."""
+
+    @abstractmethod
+    async def delete_timer(self, timer_id) -> None:
+        """Forget a role removal."""
+
+    @abstractmethod
+    async def add_ban_vote(self, vote: Dict):
+        """Persist a pending ban vote, keeping a preset _id; returns its id."""
+
+    @abstractmethod
+    async def get_ban_votes(self, guild_ids: List[int]) -> List[Dict]:
+        """Ban votes not yet closed for the given guilds."""
+
+    @abstractmethod
+    async def open_ban_vote(self, vote_id, message_id: int, closes_at: datetime) -> None:
+        """Record the vote message once it is posted and when the vote closes."""
+
+    @abstractmethod
+    async def delete_ban_vote(self, vote_id) -> None:
+        """Forget a ban vote once it is closed."""
+
+    @abstractmethod
+    async def claim_event(self, kind: str, *ids: int) -> bool:
+        """Record that this process handles a gateway event; False if another process already claimed it."""
+
+    # --- stats, reports and evidence ---
+
+    @abstractmethod
+    async def record_daily_stat(self, guild_id: int, category: str, mod_id: Optional[int] = None,
+                                channel_id: Optional[int] = None, when: Optional[datetime] = None,
+                                count: int = 1) -> None:
+        """Count moderation events in the guild's rollup for that day."""
+
+    @abstractmethod
+    async def get_daily_stats(self, guild_id: int, days: int) -> List[Dict]:
+        """Rollups for the last `days` days, today included."""
+
+    @abstractmethod
+    async def add_report(self, guild_id: int, reported_user_id: int, reporter_id: int, channel_id: int,
+                         message_id: int, content: Optional[str], reason: str) -> None:
+        """Persist a completed report."""
+
+    @abstractmethod
+    async def get_reports(self, guild_id: int, reported_user_id: int,
+                          limit: int = 5) -> Tuple[int, List[Dict]]:
+        """(retained report count, newest `limit` reports)."""
+
+    @abstractmethod
+    async def add_evidence(self, message: Dict, files: List[Dict]) -> None:
+        """Record what was captured from a reported message (first capture wins)."""
+
+    @abstractmethod
+    async def get_evidence(self, guild_id: int, message_id: int) -> Optional[Dict]:
+        """The evidence record for a message, if any."""